@@ -38,4 +38,7 @@ from .infant_feeding_admin import InfantFeedingAdmin
 from .infant_feeding_practices_admin import InfantFeedingPracticesAdmin
 from .offschedule_admin import ChildOffScheduleAdmin
 from .child_covid_19_admin import Covid19Admin
-from .child_requisition_admin import ChildRequisitionAdmin
\ No newline at end of file
+from .child_requisition_admin import ChildRequisitionAdmin
+from .export_job_admin import ExportJobAdmin
+from .receiver_timing_admin import ReceiverTimingAdmin
+from .side_effect_failure_admin import SideEffectFailureAdmin
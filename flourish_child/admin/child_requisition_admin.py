@@ -22,7 +22,8 @@ class ChildRequisitionAdmin(ChildCrfModelAdminMixin,
                                 RequisitionAdminMixin, admin.ModelAdmin):
 
     form = ChildRequisitionForm
-    actions = ["export_as_csv"]
+    actions = ["export_as_csv", "stream_export_as_csv", "stream_export_as_xlsx",
+               "export_in_background", "export_as_parquet"]
     ordering = ('requisition_identifier',)
 
     fieldsets = (
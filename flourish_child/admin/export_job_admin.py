@@ -0,0 +1,74 @@
+from django.contrib import admin
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from ..admin_site import flourish_child_admin
+from ..constants import EXPORT_COMPLETE
+from ..forms import ExportArchiveForm
+from ..helper_classes import submit_archive_job
+from ..models import ExportJob
+
+
+@admin.register(ExportJob, site=flourish_child_admin)
+class ExportJobAdmin(admin.ModelAdmin):
+
+    list_display = ('description', 'status', 'row_count', 'user_created',
+                    'created', 'finished_datetime', 'download')
+
+    list_filter = ('status', 'created')
+
+    readonly_fields = ('description', 'model_labels', 'status', 'task_id',
+                       'row_count', 'started_datetime', 'finished_datetime',
+                       'error_message', 'download')
+
+    fields = readonly_fields
+
+    change_list_template = 'admin/flourish_child/exportjob/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('archive/', self.admin_site.admin_view(self.archive_view),
+                 name='flourish_child_exportjob_archive'),
+        ]
+        return urls + super().get_urls()
+
+    def archive_view(self, request):
+        """Submits a background export of the chosen models to a single
+        zip archive.
+        """
+        form = ExportArchiveForm(request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            export_job = submit_archive_job(
+                form.cleaned_data['models'],
+                user_created=request.user.username)
+            self.message_user(
+                request, f'Export archive submitted as {export_job}.')
+            return redirect(
+                'flourish_child_admin:flourish_child_exportjob_change',
+                export_job.id)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Export models to archive',
+            form=form)
+        return TemplateResponse(
+            request, 'admin/flourish_child/exportjob/archive_form.html', context)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if not request.user.is_superuser:
+            queryset = queryset.filter(user_created=request.user.username)
+        return queryset
+
+    def has_add_permission(self, request):
+        return False
+
+    def download(self, obj):
+        if obj.status == EXPORT_COMPLETE and obj.document:
+            url = reverse('flourish_child:export_job_download', args=[obj.id])
+            return format_html('<a href="{}">Download</a>', url)
+        return '-'
+
+    download.short_description = 'File'
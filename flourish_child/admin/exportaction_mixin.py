@@ -1,16 +1,21 @@
 import datetime
-import uuid
+import tempfile
 
 from django.apps import apps as django_apps
-from django.db.models import ManyToManyField, ForeignKey, OneToOneField, ManyToOneRel
-from django.http import HttpResponse
-from django.utils import timezone
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.html import format_html
 from django.utils.translation import ugettext_lazy as _
 import xlwt
 
+from ..helper_classes import CaregiverIdentifierMap, CsvStreamWriter, XlsxStreamWriter
+from ..helper_classes import get_export_schema, submit_export_job
+
 
 class ExportActionMixin:
 
+    export_chunk_size = 2000
+
     def export_as_csv(self, request, queryset):
 
         response = HttpResponse(content_type='application/ms-excel')
@@ -21,151 +26,167 @@ class ExportActionMixin:
         ws = wb.add_sheet('%s')
 
         row_num = 0
-        obj_count = 0
 
         font_style = xlwt.XFStyle()
         font_style.font.bold = True
         font_style.num_format_str = 'YYYY/MM/DD h:mm:ss'
 
-        field_names = [field.name for field in self.get_model_fields]
-
-        if queryset and self.is_assent(queryset[0]):
-            field_names.insert(0, 'previous_study')
+        schema = self.export_schema
+        for col_num, field_name in enumerate(schema.header):
+            ws.write(row_num, col_num, field_name, font_style)
 
-        if queryset and getattr(queryset[0], 'child_visit', None):
-            field_names.insert(0, 'subject_identifier')
-            field_names.insert(1, 'new_maternal_study_subject_identifier')
-            field_names.insert(2, 'old_study_maternal_identifier')
-            field_names.insert(3, 'previous_study')
-            field_names.insert(4, 'visit_code')
-
-        for col_num in range(len(field_names)):
-            ws.write(row_num, col_num, field_names[col_num], font_style)
+        identifier_map = self.export_identifier_map(queryset)
+        queryset = self.export_field_plan.apply(queryset)
 
         for obj in queryset:
-            data = []
-
-            # Add subject identifier and visit code
-            if getattr(obj, 'child_visit', None):
-                subject_identifier = obj.child_visit.subject_identifier
-                screening_identifier = self.screening_identifier(subject_identifier=subject_identifier[:-3])
-                previous_study = self.previous_bhp_study(screening_identifier=screening_identifier)
-                study_maternal_identifier = self.study_maternal_identifier(screening_identifier=screening_identifier)
-                data.append(subject_identifier)
-                data.append(subject_identifier[:-3])
-                data.append(study_maternal_identifier)
-                data.append(previous_study)
-                data.append(obj.child_visit.visit_code)
-            elif self.is_assent(obj):
-                subject_identifier = getattr(obj, 'subject_identifier')
-                screening_identifier = self.screening_identifier(subject_identifier=subject_identifier[:-3])
-                previous_study = self.previous_bhp_study(screening_identifier=screening_identifier)
-                data.append(previous_study)
-
-            inline_objs = []
-            for field in self.get_model_fields:
-                if isinstance(field, ManyToManyField):
-                    key_manager = getattr(obj, field.name)
-                    field_value = ', '.join([obj.name for obj in key_manager.all()])
-                    data.append(field_value)
-                    continue
-                if isinstance(field, (ForeignKey, OneToOneField, )):
-                    field_value = getattr(obj, field.name)
-                    data.append(field_value.id)
-                    continue
-                if isinstance(field, ManyToOneRel):
-                    key_manager = getattr(obj, f'{field.name}_set')
-                    inline_objs = key_manager.all()
-                field_value = getattr(obj, field.name, '')
-                data.append(field_value)
-
-            if inline_objs:
-                # Update header
-                inline_fields = inline_objs[0].__dict__
-                inline_fields = self.inline_exclude(field_names=inline_fields)
-                inline_fields = list(inline_fields.keys())
-                if obj_count == 0:
-                    self.update_headers_inline(
-                        inline_fields=inline_fields, field_names=field_names,
-                        ws=ws, row_num=row_num, font_style=font_style)
-
-                for inline_obj in inline_objs:
-                    inline_data = []
-                    inline_data.extend(data)
-                    for field in inline_fields:
-                        field_value = getattr(inline_obj, field, '')
-                        inline_data.append(field_value)
-                    row_num += 1
-                    self.write_rows(data=inline_data, row_num=row_num, ws=ws)
-            else:
+            for data in schema.rows(obj, identifier_map):
                 row_num += 1
-                self.write_rows(data=data, row_num=row_num, ws=ws)
-            obj_count += 1
+                self.write_rows(
+                    data=data, row_num=row_num, ws=ws,
+                    writers=schema.xls_writers)
         wb.save(response)
         return response
 
     export_as_csv.short_description = _(
         'Export selected %(verbose_name_plural)s')
 
-    actions = [export_as_csv]
-
-    def write_rows(self, data=None, row_num=None, ws=None):
-        for col_num in range(len(data)):
-            if isinstance(data[col_num], uuid.UUID):
-                ws.write(row_num, col_num, str(data[col_num]))
-            elif isinstance(data[col_num], datetime.datetime):
-                dt = data[col_num]
-                if dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None:
-                    dt = timezone.make_naive(dt)
-                ws.write(row_num, col_num, dt, xlwt.easyxf(num_format_str='YYYY/MM/DD h:mm:ss'))
-            elif isinstance(data[col_num], datetime.date):
-                ws.write(row_num, col_num, data[col_num], xlwt.easyxf(num_format_str='YYYY/MM/DD'))
-            else:
-                ws.write(row_num, col_num, data[col_num])
-
-    def update_headers_inline(self, inline_fields=None, field_names=None,
-                              ws=None, row_num=None, font_style=None):
-        top_num = len(field_names)
-        for col_num in range(len(inline_fields)):
-            ws.write(row_num, top_num, inline_fields[col_num], font_style)
-            top_num += 1
+    def stream_export_as_csv(self, request, queryset):
+        """Streams the selected rows as CSV, reading the queryset in chunks.
+        """
+        writer = CsvStreamWriter()
+        response = StreamingHttpResponse(
+            writer.stream(self.export_rows(queryset)),
+            content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename=%s.csv' % (
+            self.get_export_filename())
+        return response
+
+    stream_export_as_csv.short_description = _(
+        'Export selected %(verbose_name_plural)s (streamed CSV)')
+
+    def stream_export_as_xlsx(self, request, queryset):
+        """Writes the selected rows to a write-only xlsx workbook, reading
+        the queryset in chunks, and streams the file back.
+        """
+        export_file = XlsxStreamWriter().write(self.export_rows(queryset))
+        return FileResponse(
+            export_file, as_attachment=True,
+            filename='%s.xlsx' % self.get_export_filename(),
+            content_type=('application/vnd.openxmlformats-officedocument.'
+                          'spreadsheetml.sheet'))
+
+    stream_export_as_xlsx.short_description = _(
+        'Export selected %(verbose_name_plural)s (streamed XLSX)')
+
+    def export_in_background(self, request, queryset):
+        """Submits the export to the django_q cluster and links the user to
+        the job, where the file can be downloaded once complete.
+        """
+        export_job = submit_export_job(
+            queryset, user_created=request.user.username)
+        url = reverse(
+            'flourish_child_admin:flourish_child_exportjob_change',
+            args=[export_job.id])
+        self.message_user(request, format_html(
+            'Export submitted. <a href="{}">Follow its progress here</a>.', url))
+
+    export_in_background.short_description = _(
+        'Export selected %(verbose_name_plural)s in the background')
+
+    def export_as_parquet(self, request, queryset):
+        """Writes the selected rows to a Parquet file with typed columns.
+        """
+        from ..helper_classes.columnar_export import ColumnarExporter
+
+        export_file = tempfile.TemporaryFile()
+        ColumnarExporter(self).write(queryset, export_file)
+        export_file.seek(0)
+        return FileResponse(
+            export_file, as_attachment=True,
+            filename='%s.parquet' % self.get_export_filename(),
+            content_type='application/octet-stream')
+
+    export_as_parquet.short_description = _(
+        'Export selected %(verbose_name_plural)s (Parquet)')
+
+    actions = [export_as_csv, stream_export_as_csv, stream_export_as_xlsx,
+               export_in_background, export_as_parquet]
+
+    def export_rows(self, queryset):
+        """Yields the header followed by one list of values per exported
+        row, fetching the queryset `export_chunk_size` rows at a time.
+        """
+        schema = self.export_schema
+        yield schema.header
+
+        identifier_map = self.export_identifier_map(queryset)
+        queryset = self.export_field_plan.apply(queryset)
+
+        for chunk in self.iter_export_chunks(queryset):
+            for obj in chunk:
+                yield from schema.rows(obj, identifier_map)
+
+    def iter_export_chunks(self, queryset):
+        """Yields lists of at most `export_chunk_size` objects, paging on the
+        primary key so that each chunk is a bounded query.
+        """
+        queryset = queryset.order_by('pk')
+        last_pk = None
+        while True:
+            chunk_qs = queryset
+            if last_pk is not None:
+                chunk_qs = queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk_qs[:self.export_chunk_size])
+            if not chunk:
+                break
+            yield chunk
+            last_pk = chunk[-1].pk
+
+    def export_identifier_map(self, queryset):
+        """Returns a map of the caregiver identifiers for every row in the
+        queryset, resolved up front in a fixed number of queries.
+        """
+        if self.has_child_visit:
+            subject_identifiers = queryset.values_list(
+                'child_visit__subject_identifier', flat=True)
+        elif self.is_assent_model:
+            subject_identifiers = queryset.values_list(
+                'subject_identifier', flat=True)
+        else:
+            return CaregiverIdentifierMap()
+        return CaregiverIdentifierMap(
+            {subject_identifier[:-3]
+             for subject_identifier in subject_identifiers.order_by().distinct()
+             if subject_identifier})
+
+    @property
+    def export_schema(self):
+        return get_export_schema(self.model)
+
+    @property
+    def export_field_plan(self):
+        return self.export_schema.plan
+
+    @property
+    def has_child_visit(self):
+        return self.export_field_plan.has_child_visit
+
+    @property
+    def is_assent_model(self):
+        return self.export_schema.is_assent_model
+
+    def write_rows(self, data=None, row_num=None, ws=None, writers=None):
+        """Writes a row using the schema's cell writer for each column.
+        """
+        writers = writers or self.export_schema.xls_writers
+        for col_num, value in enumerate(data):
+            writers[col_num](ws, row_num, col_num, value)
 
     def get_export_filename(self):
         date_str = datetime.datetime.now().strftime('%Y-%m-%d')
         filename = "%s-%s" % (self.model.__name__, date_str)
         return filename
 
-    def screening_identifier(self, subject_identifier=None):
-        """Returns a screening identifier.
-        """
-        consent_cls = django_apps.get_model('flourish_caregiver.subjectconsent')
-        consent = consent_cls.objects.filter(subject_identifier=subject_identifier)
-        if consent:
-            return consent.last().screening_identifier
-        return None
-
-    def previous_bhp_study(self, screening_identifier=None):
-        dataset_cls = django_apps.get_model('flourish_caregiver.maternaldataset')
-        if screening_identifier:
-            try:
-                dataset_obj = dataset_cls.objects.get(
-                    screening_identifier=screening_identifier)
-            except dataset_cls.DoesNotExist:
-                return None
-            else:
-                return dataset_obj.protocol
-
-    def study_maternal_identifier(self, screening_identifier=None):
-        dataset_cls = django_apps.get_model('flourish_caregiver.maternaldataset')
-        if screening_identifier:
-            try:
-                dataset_obj = dataset_cls.objects.get(
-                    screening_identifier=screening_identifier)
-            except dataset_cls.DoesNotExist:
-                return None
-            else:
-                return dataset_obj.study_maternal_identifier
-
     def is_assent(self, obj):
         assent_cls = django_apps.get_model('flourish_child.childassent')
         return isinstance(obj, assent_cls)
@@ -174,9 +195,11 @@ class ExportActionMixin:
     def get_model_fields(self):
         return self.model._meta.get_fields()
 
-    def inline_exclude(self, field_names={}):
-        exclude = ['_state', 'revision', 'hostname_modified', 'hostname_created',
-                   'user_modified', 'user_created', 'device_created', 'device_modified']
-        for field in exclude:
-            del field_names[field]
-        return field_names
+
+class ModelExporter(ExportActionMixin):
+    """Runs the export for a model outside of the admin, e.g. in a worker
+    or a management command.
+    """
+
+    def __init__(self, model):
+        self.model = model
@@ -75,23 +75,35 @@ class ChildCrfModelAdminMixin(
     def get_previous_instance(self, request, instance=None, **kwargs):
         """Returns a model instance that is the first occurrence of a previous
         instance relative to this object's appointment.
+
+        The result is kept on the request, so the form and the fieldset
+        keys share one lookup.
         """
-        obj = None
         appointment = instance or self.get_instance(request)
-
-        if appointment:
-            while appointment:
-                options = {
-                    '{}__appointment'.format(self.model.visit_model_attr()):
-                    self.get_previous_appt_instance(appointment)}
-                try:
-                    obj = self.model.objects.get(**options)
-                except ObjectDoesNotExist:
-                    pass
-                else:
-                    break
-                appointment = self.get_previous_appt_instance(appointment)
-        return obj
+        if not appointment:
+            return None
+        if request is None:
+            return self.previous_instance(appointment)
+        previous_instances = request.__dict__.setdefault(
+            '_previous_instances', {})
+        key = (self.model._meta.label_lower, appointment.pk)
+        if key not in previous_instances:
+            previous_instances[key] = self.previous_instance(appointment)
+        return previous_instances[key]
+
+    def previous_instance(self, appointment):
+        """Returns the latest instance of this model, in one query, whose
+        appointment is a scheduled visit of the same schedule family before
+        `appointment`.
+        """
+        appointment_lookup = f'{self.model.visit_model_attr()}__appointment'
+        return self.model.objects.filter(**{
+            f'{appointment_lookup}__subject_identifier': appointment.subject_identifier,
+            f'{appointment_lookup}__timepoint__lt': appointment.timepoint,
+            f'{appointment_lookup}__schedule_name__startswith':
+                appointment.schedule_name[:7],
+            f'{appointment_lookup}__visit_code_sequence': 0}).order_by(
+                f'-{appointment_lookup}__timepoint').first()
 
     def get_previous_appt_instance(self, appointment):
 
@@ -102,12 +114,17 @@ class ChildCrfModelAdminMixin(
             visit_code_sequence=0).order_by('timepoint').last()
 
     def get_instance(self, request):
-        try:
-            appointment = self.get_appointment(request)
-        except ObjectDoesNotExist:
+        """Returns the appointment for this request, fetched once per
+        request.
+        """
+        if request is None:
             return None
-        else:
-            return appointment
+        if '_appointment' not in request.__dict__:
+            try:
+                request._appointment = self.get_appointment(request)
+            except ObjectDoesNotExist:
+                request._appointment = None
+        return request._appointment
 
     def get_key(self, request, obj=None):
 
@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from ..admin_site import flourish_child_admin
+from ..helper_classes import receiver_instrumentation
+from ..models import ReceiverTiming
+
+
+@admin.register(ReceiverTiming, site=flourish_child_admin)
+class ReceiverTimingAdmin(admin.ModelAdmin):
+
+    list_display = ('dispatch_uid', 'sender', 'duration', 'query_count',
+                    'exception', 'created')
+
+    list_filter = ('dispatch_uid', 'created')
+
+    change_list_template = 'admin/flourish_child/receivertiming/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        """Adds wall time and query count percentiles per receiver, for
+        the filtered timings, above the list.
+        """
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+        response.context_data['summary'] = receiver_instrumentation.summary(queryset)
+        return response
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
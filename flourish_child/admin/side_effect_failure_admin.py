@@ -0,0 +1,39 @@
+from django.contrib import admin, messages
+
+from ..admin_site import flourish_child_admin
+from ..helper_classes import side_effects
+from ..models import SideEffectFailure
+
+
+@admin.register(SideEffectFailure, site=flourish_child_admin)
+class SideEffectFailureAdmin(admin.ModelAdmin):
+
+    list_display = ('dispatch_uid', 'subject_identifier', 'model_label',
+                    'exception', 'created')
+
+    list_filter = ('dispatch_uid', 'created')
+
+    search_fields = ('subject_identifier', )
+
+    actions = ['replay']
+
+    def replay(self, request, queryset):
+        replayed = 0
+        for failure in queryset:
+            try:
+                side_effects.replay(failure)
+            except Exception as e:
+                self.message_user(
+                    request, f'{failure}: {e.__class__.__name__}: {e}',
+                    level=messages.ERROR)
+            else:
+                replayed += 1
+        self.message_user(request, f'{replayed} side effects replayed.')
+
+    replay.short_description = 'Replay selected side effects'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
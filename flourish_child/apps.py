@@ -2,6 +2,7 @@ from datetime import datetime
 from dateutil.tz import gettz
 from django.apps import AppConfig as DjangoAppConfig
 from django.conf import settings
+from django.core.checks import register
 
 
 class AppConfig(DjangoAppConfig):
@@ -14,7 +15,23 @@ class AppConfig(DjangoAppConfig):
             2024, 6, 30, 0, 0, 0, tzinfo=gettz('UTC')).date()
 
     def ready(self):
+        import atexit
+        from django.core.signals import request_finished
+        from django_q.signals import post_execute
         from .models import child_consent_on_post_save
+        from .helper_classes import cohort_schedule_table, receiver_instrumentation
+        from .system_checks import cohort_schedule_check, consent_version_cache_check
+
+        cohort_schedule_table.load()
+        register(cohort_schedule_check)
+        register(consent_version_cache_check)
+        request_finished.connect(
+            receiver_instrumentation.flush,
+            dispatch_uid='flourish_child_receiver_timings_flush')
+        post_execute.connect(
+            receiver_instrumentation.flush,
+            dispatch_uid='flourish_child_receiver_timings_task_flush')
+        atexit.register(receiver_instrumentation.flush)
 
 
 if settings.APP_NAME == 'flourish_child':
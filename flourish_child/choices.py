@@ -8,6 +8,7 @@ from edc_visit_tracking.constants import MISSED_VISIT, COMPLETED_PROTOCOL_VISIT
 from edc_visit_tracking.constants import SCHEDULED, UNSCHEDULED, LOST_VISIT
 
 from .constants import BREASTFEED_ONLY
+from .constants import EXPORT_PENDING, EXPORT_RUNNING, EXPORT_COMPLETE, EXPORT_FAILED
 
 ALIVE_DEAD_UNKNOWN = (
     (ALIVE, 'Alive'),
@@ -143,6 +144,13 @@ ETHNICITY = (
     (OTHER, 'Other, specify')
 )
 
+EXPORT_JOB_STATUS = (
+    (EXPORT_PENDING, 'Pending'),
+    (EXPORT_RUNNING, 'Running'),
+    (EXPORT_COMPLETE, 'Complete'),
+    (EXPORT_FAILED, 'Failed'),
+)
+
 FACIAL_DEFECT = (
     ('None', 'None'),
     ('Anophthalmia/micro-opthalmia', 'Anophthalmia/micro-opthalmia'),
@@ -2,3 +2,8 @@ BREASTFEED_ONLY = 'breastfeeding_only'
 INFANT = 'infant'
 BOTH_BREAST_FEEDING_AND_FORMULA = 'Both breastfeeding and formula feeding'
 FORMULA_ONLY = 'Formula feeding only'
+
+EXPORT_PENDING = 'pending'
+EXPORT_RUNNING = 'running'
+EXPORT_COMPLETE = 'complete'
+EXPORT_FAILED = 'failed'
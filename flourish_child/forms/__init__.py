@@ -56,4 +56,5 @@ from .infant_congenital_anomalies_form import InfantTrisomiesForm
 from .infant_feeding_form import InfantFeedingForm
 from .infant_feeding_practices_form import InfantFeedingPracticesForm
 from .offschedule_form import ChildOffScheduleForm
-from .child_requisition_form import ChildRequisitionForm
\ No newline at end of file
+from .child_requisition_form import ChildRequisitionForm
+from .export_archive_form import ExportArchiveForm
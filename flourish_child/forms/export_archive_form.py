@@ -0,0 +1,15 @@
+from django import forms
+from django.apps import apps as django_apps
+
+
+class ExportArchiveForm(forms.Form):
+
+    models = forms.MultipleChoiceField(
+        label='Models to export',
+        widget=forms.CheckboxSelectMultiple)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['models'].choices = sorted(
+            (model._meta.label_lower, model._meta.verbose_name.title())
+            for model in django_apps.get_app_config('flourish_child').get_models())
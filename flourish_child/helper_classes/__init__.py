@@ -0,0 +1,20 @@
+from .export_writers import CsvStreamWriter, XlsxStreamWriter
+from .caregiver_identifier_map import CaregiverIdentifierMap, CaregiverIdentifiers
+from .export_jobs import submit_export_job, submit_archive_job, run_export_job
+from .incremental_export import IncrementalExport
+from .export_field_plan import ExportFieldPlan, get_export_field_plan
+from .wide_export import WideExport
+from .export_archive import ExportArchive
+from .export_schema import ExportSchema, get_export_schema
+from .cohort_schedule_table import CohortScheduleTable, cohort_schedule_table
+from .receiver_instrumentation import ReceiverInstrumentation, receiver_instrumentation
+from .receiver_instrumentation import instrumented_receiver
+from .side_effects import SideEffectQueue, side_effects, deferred_receiver
+from .bulk_enrollment import BulkEnrollment
+from .action_item_reconciliation import ActionItemReconciliation
+from .education_level_sync import EducationLevelSync, education_level_key
+from .caregiver_consent_propagation import CaregiverConsentPropagation, caregiver_consent_propagation
+from .schedule_simulator import ScheduleSimulator, SubjectSnapshot, SubjectSnapshots
+from .caregiver_identity_index import CaregiverIdentityIndex, caregiver_identity_index
+from .consent_version_resolver import ConsentVersionResolver, consent_version_resolver
+from .child_identifier_allocator import ChildIdentifierAllocator, child_identifier_allocator
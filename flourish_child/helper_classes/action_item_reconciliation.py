@@ -0,0 +1,223 @@
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+from edc_action_item.site_action_items import site_action_items
+from edc_constants.constants import CLOSED, NEW, OPEN, POS
+
+ActionItemRule = namedtuple(
+    'ActionItemRule',
+    ['model', 'field', 'response', 'subject_identifier_lookup', 'prn_model',
+     'repeat'])
+ActionItemRule.__new__.__defaults__ = (False, )
+
+
+class ActionItemReconciliation:
+    """Evaluates the `trigger_action_item` rules of the child signals
+    for many subjects at once and applies the difference between the
+    desired and the current action items in bulk.
+
+    An action item is wanted for a subject when any record of a rule
+    for that action has the triggering response and, unless the rule
+    repeats, the PRN form has not been completed. Wanted items that do
+    not exist are created. A subject whose items are all closed has the
+    latest one re-opened, but only while the PRN form is not completed:
+    the receivers re-open on a save of the triggering record, which a
+    scheduled run cannot tell from an item closed by completing the PRN.
+    With `reopen_completed=True`, e.g. for records just loaded, closed
+    items are re-opened as the receivers would.
+
+    With `delete=True`, NEW or OPEN items of subjects whose records no
+    longer trigger the action are deleted, as the receivers do. Only
+    items the rules could have created are deleted: items opened as the
+    next action of another PRN are kept. Items opened by hand cannot be
+    told apart, so deletion is off by default.
+    """
+
+    batch_size = 900
+
+    def __init__(self, subject_identifiers=None, delete=False,
+                 reopen_completed=False):
+        self.subject_identifiers = (
+            set(subject_identifiers) if subject_identifiers else None)
+        self.delete = delete
+        self.reopen_completed = reopen_completed
+        self.created = {}
+        self.reopened = {}
+        self.deleted = {}
+
+    @property
+    def rules(self):
+        """Returns the rules by action name, as applied by the child
+        post_save receivers.
+        """
+        from flourish_prn.action_items import (
+            CHILD_DEATH_REPORT_ACTION, CHILDOFF_STUDY_ACTION)
+        return {
+            CHILD_DEATH_REPORT_ACTION: [
+                ActionItemRule(
+                    'flourish_child.childvisit', 'survival_status', 'dead',
+                    'subject_identifier', 'flourish_prn.childdeathreport',
+                    repeat=True)],
+            CHILDOFF_STUDY_ACTION: [
+                ActionItemRule(
+                    'flourish_child.childhivrapidtestcounseling', 'result', POS,
+                    'child_visit__subject_identifier', 'flourish_prn.childoffstudy',
+                    repeat=True),
+                ActionItemRule(
+                    'flourish_child.childpregtesting', 'preg_test_result', POS,
+                    'child_visit__subject_identifier', 'flourish_prn.childoffstudy',
+                    repeat=True),
+                ActionItemRule(
+                    'flourish_child.childcontinuedconsent', 'is_eligible', False,
+                    'subject_identifier', 'flourish_prn.childoffstudy',
+                    repeat=True)]}
+
+    def _subjects(self, queryset, lookup):
+        if self.subject_identifiers is not None:
+            queryset = queryset.filter(
+                **{f'{lookup}__in': self.subject_identifiers})
+        return set(queryset.values_list(lookup, flat=True).distinct())
+
+    def _batches(self, values):
+        values = sorted(values)
+        for index in range(0, len(values), self.batch_size):
+            yield values[index:index + self.batch_size]
+
+    def evaluate(self, action_name):
+        """Returns the subjects evaluated for the action and the subjects
+        that should have an action item.
+        """
+        evaluated, wanted = set(), set()
+        for rule in self.rules[action_name]:
+            model_cls = django_apps.get_model(rule.model)
+            evaluated |= self._subjects(
+                model_cls.objects.all(), rule.subject_identifier_lookup)
+            triggered = self._subjects(
+                model_cls.objects.filter(**{rule.field: rule.response}),
+                rule.subject_identifier_lookup)
+            if not rule.repeat:
+                triggered -= self.completed(rule.prn_model, triggered)
+            wanted |= triggered
+        return evaluated, wanted
+
+    def completed(self, prn_model, subject_identifiers):
+        """Returns the subjects that have completed the PRN form.
+        """
+        prn_model_cls = django_apps.get_model(prn_model)
+        completed = set()
+        for batch in self._batches(subject_identifiers):
+            completed.update(prn_model_cls.objects.filter(
+                subject_identifier__in=batch).values_list(
+                    'subject_identifier', flat=True))
+        return completed
+
+    def diff(self, action_name):
+        """Returns the subjects whose action items should be created,
+        re-opened and deleted for the action.
+        """
+        action_item_model_cls = site_action_items.get(
+            action_name).action_item_model_cls()
+        evaluated, wanted = self.evaluate(action_name)
+
+        statuses = {}
+        for batch in self._batches(evaluated):
+            for subject_identifier, status in action_item_model_cls.objects.filter(
+                    subject_identifier__in=batch,
+                    action_type__name=action_name).values_list(
+                        'subject_identifier', 'status'):
+                statuses.setdefault(subject_identifier, set()).add(status)
+
+        to_create = wanted - set(statuses)
+        to_reopen = set(
+            subject_identifier for subject_identifier in wanted & set(statuses)
+            if CLOSED in statuses[subject_identifier]
+            and not statuses[subject_identifier] & {NEW, OPEN})
+        if not self.reopen_completed:
+            for prn_model in set(rule.prn_model for rule in self.rules[action_name]):
+                to_reopen -= self.completed(prn_model, to_reopen)
+        to_delete = set()
+        if self.delete:
+            for batch in self._batches(evaluated - wanted):
+                to_delete.update(self.deletable(action_item_model_cls).filter(
+                    subject_identifier__in=batch,
+                    action_type__name=action_name).values_list(
+                        'subject_identifier', flat=True))
+        return to_create, to_reopen, to_delete
+
+    @staticmethod
+    def deletable(action_item_model_cls):
+        """Returns the NEW or OPEN action items the rules could have
+        created, i.e. not the next action of another action item.
+        """
+        return action_item_model_cls.objects.filter(
+            status__in=[NEW, OPEN], parent_action_item__isnull=True)
+
+    def apply(self, action_name, to_create, to_reopen, to_delete):
+        action_cls = site_action_items.get(action_name)
+        action_item_model_cls = action_cls.action_item_model_cls()
+
+        for subject_identifier in sorted(to_create):
+            action_cls(subject_identifier=subject_identifier)
+
+        for batch in self._batches(to_reopen):
+            reopened = set()
+            for action_item in action_item_model_cls.objects.filter(
+                    subject_identifier__in=batch,
+                    action_type__name=action_name,
+                    status=CLOSED).order_by('subject_identifier', '-created'):
+                if action_item.subject_identifier in reopened:
+                    continue
+                reopened.add(action_item.subject_identifier)
+                action_item.status = OPEN
+                action_item.save()
+
+        for batch in self._batches(to_delete):
+            self.deletable(action_item_model_cls).filter(
+                subject_identifier__in=batch,
+                action_type__name=action_name).delete()
+
+        self.created[action_name] = len(to_create)
+        self.reopened[action_name] = len(to_reopen)
+        self.deleted[action_name] = len(to_delete)
+
+    def reconcile(self, dry_run=False):
+        """Reconciles the action items of every rule and returns the
+        subjects to create, re-open and delete by action name.
+        """
+        diffs = {}
+        for action_name in self.rules:
+            diffs[action_name] = self.diff(action_name)
+            if not dry_run:
+                self.apply(action_name, *diffs[action_name])
+        return diffs
+
+
+def reconcile_action_items(subject_identifiers=None, delete=False):
+    """Entry point for a nightly django_q schedule, e.g.
+    `flourish_child.helper_classes.action_item_reconciliation.reconcile_action_items`.
+    """
+    reconciliation = ActionItemReconciliation(subject_identifiers, delete=delete)
+    reconciliation.reconcile()
+    return {'created': reconciliation.created,
+            'reopened': reconciliation.reopened,
+            'deleted': reconciliation.deleted}
+
+
+def reconcile_loaded_action_items(loaded):
+    """Reconciles the action items of the subjects of bulk loaded
+    records, given as {model_cls: [pk, ...]}. Re-opens closed items and
+    deletes items the loaded records no longer trigger, as their
+    receivers would have.
+    """
+    reconciliation = ActionItemReconciliation(delete=True, reopen_completed=True)
+    lookups = {rule.model: rule.subject_identifier_lookup
+               for rules in reconciliation.rules.values() for rule in rules}
+    subject_identifiers = set()
+    for model_cls, pks in loaded.items():
+        lookup = lookups[model_cls._meta.label_lower]
+        for batch in reconciliation._batches(pks):
+            subject_identifiers.update(model_cls.objects.filter(
+                pk__in=batch).values_list(lookup, flat=True))
+    if subject_identifiers:
+        reconciliation.subject_identifiers = subject_identifiers
+        reconciliation.reconcile()
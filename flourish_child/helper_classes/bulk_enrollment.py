@@ -0,0 +1,165 @@
+import time
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from .cohort_schedule_table import cohort_schedule_table
+
+Enrollment = namedtuple(
+    'Enrollment', ['subject_identifier', 'consent', 'cohort', 'base_appt_datetime'])
+
+
+class BulkEnrollment:
+    """Puts many consented children on a cohort's schedules, following
+    the same rules as the child consent post_save receiver.
+
+    A previously enrolled caregiver puts the child on the cohort's
+    enrolment schedule from the date the caregiver was enrolled. A
+    maternal delivery on the consent date puts the child on the birth
+    schedule from the date the delivery was captured. Consents and
+    caregiver records are resolved in a fixed number of queries, and
+    subjects are enrolled in batches, one transaction per batch.
+    """
+
+    lookup_batch_size = 900
+
+    child_consent_model = 'flourish_child.childdummysubjectconsent'
+    caregiver_prev_enrolled_model = 'flourish_caregiver.caregiverpreviouslyenrolled'
+    maternal_delivery_model = 'flourish_caregiver.maternaldelivery'
+
+    def __init__(self, cohort, subject_identifiers, batch_size=100):
+        self.cohort = cohort
+        self.subject_identifiers = list(dict.fromkeys(subject_identifiers))
+        self.batch_size = batch_size
+        self.skipped = []
+        self.failed = {}
+        self.enrolled = 0
+        self.elapsed = 0
+        self._enrollments = None
+
+    @property
+    def enrollments(self):
+        """Returns the schedules each subject will be put on.
+        """
+        if self._enrollments is None:
+            self._enrollments = self._plan()
+        return self._enrollments
+
+    @property
+    def cohort_keys(self):
+        return sorted(set(enrollment.cohort for enrollment in self.enrollments))
+
+    def schedule_names(self):
+        """Returns the schedule name of each cohort key in the plan,
+        raising SiteVisitScheduleError for a cohort that does not resolve.
+        """
+        return {cohort: cohort_schedule_table.get(cohort)[1].name
+                for cohort in self.cohort_keys}
+
+    def _plan(self):
+        consents = self._latest_consents()
+        caregiver_subject_identifiers = set(
+            subject_identifier[:-3] for subject_identifier in consents)
+        prev_enrolled = self._prev_enrolled_datetimes(caregiver_subject_identifiers)
+        deliveries = self._delivery_datetimes(caregiver_subject_identifiers)
+
+        enrolment_cohort = cohort_schedule_table.enrolment_cohort(self.cohort)
+        enrollments = []
+        self.skipped = []
+        for subject_identifier in self.subject_identifiers:
+            consent = consents.get(subject_identifier)
+            if not consent:
+                self.skipped.append(subject_identifier)
+                continue
+            caregiver_subject_identifier = subject_identifier[:-3]
+            planned = len(enrollments)
+            if caregiver_subject_identifier in prev_enrolled:
+                enrollments.append(Enrollment(
+                    subject_identifier, consent, enrolment_cohort,
+                    prev_enrolled[caregiver_subject_identifier]))
+            delivery_created = deliveries.get(
+                (caregiver_subject_identifier, consent.consent_datetime))
+            if delivery_created:
+                enrollments.append(Enrollment(
+                    subject_identifier, consent, self.cohort + '_birth',
+                    delivery_created))
+            if len(enrollments) == planned:
+                self.skipped.append(subject_identifier)
+        return enrollments
+
+    def _lookup_batches(self, values):
+        values = sorted(values)
+        for index in range(0, len(values), self.lookup_batch_size):
+            yield values[index:index + self.lookup_batch_size]
+
+    def _latest_consents(self):
+        consent_cls = django_apps.get_model(self.child_consent_model)
+        consents = {}
+        for batch in self._lookup_batches(self.subject_identifiers):
+            for consent in consent_cls.objects.filter(
+                    subject_identifier__in=batch).order_by('consent_datetime'):
+                consents[consent.subject_identifier] = consent
+        return consents
+
+    def _prev_enrolled_datetimes(self, caregiver_subject_identifiers):
+        prev_enrolled_cls = django_apps.get_model(self.caregiver_prev_enrolled_model)
+        prev_enrolled = {}
+        for batch in self._lookup_batches(caregiver_subject_identifiers):
+            prev_enrolled.update(prev_enrolled_cls.objects.filter(
+                subject_identifier__in=batch).values_list(
+                    'subject_identifier', 'created'))
+        return prev_enrolled
+
+    def _delivery_datetimes(self, caregiver_subject_identifiers):
+        maternal_delivery_cls = django_apps.get_model(self.maternal_delivery_model)
+        deliveries = {}
+        for batch in self._lookup_batches(caregiver_subject_identifiers):
+            for subject_identifier, delivery_datetime, created in (
+                    maternal_delivery_cls.objects.filter(
+                        subject_identifier__in=batch).values_list(
+                            'subject_identifier', 'delivery_datetime', 'created')):
+                deliveries[(subject_identifier, delivery_datetime)] = created
+        return deliveries
+
+    @property
+    def subjects(self):
+        """Returns the planned enrollments grouped by subject, in order.
+        """
+        subjects = {}
+        for enrollment in self.enrollments:
+            subjects.setdefault(enrollment.subject_identifier, []).append(enrollment)
+        return list(subjects.items())
+
+    def run(self):
+        """Enrolls the planned subjects and returns how many were enrolled.
+        Each subject is enrolled in a savepoint, so a subject that fails
+        is rolled back on its own and kept in `failed`.
+        """
+        from ..models.signals import put_on_schedule
+
+        start = time.monotonic()
+        subjects = self.subjects
+        for index in range(0, len(subjects), self.batch_size):
+            with transaction.atomic():
+                for subject_identifier, enrollments in subjects[
+                        index:index + self.batch_size]:
+                    try:
+                        with transaction.atomic():
+                            enrollments[0].consent.registration_update_or_create()
+                            for enrollment in enrollments:
+                                put_on_schedule(
+                                    enrollment.cohort, instance=enrollment.consent,
+                                    base_appt_datetime=enrollment.base_appt_datetime)
+                    except Exception as e:
+                        self.failed[subject_identifier] = str(e)
+                    else:
+                        self.enrolled += 1
+        self.elapsed = time.monotonic() - start
+        return self.enrolled
+
+    @property
+    def throughput(self):
+        """Returns the number of subjects enrolled per second.
+        """
+        return self.enrolled / self.elapsed if self.elapsed else 0
@@ -0,0 +1,102 @@
+from django.apps import apps as django_apps
+from edc_base.utils import get_utcnow
+
+
+class CaregiverConsentPropagation:
+    """Copies child details captured on the child forms to the caregiver's
+    consent on behalf of the child, writing only the fields that changed.
+
+    `propagate_birth` and `propagate_assent` update one consent with
+    `save(update_fields=...)`; `propagate_births` updates the consents
+    of many births with `bulk_update`, e.g. to back-populate names.
+    """
+
+    batch_size = 500
+
+    caregiver_child_consent_model = 'flourish_caregiver.caregiverchildconsent'
+    child_birth_model = 'flourish_child.childbirth'
+
+    @property
+    def caregiver_child_consent_cls(self):
+        return django_apps.get_model(self.caregiver_child_consent_model)
+
+    @staticmethod
+    def birth_values(child_birth, caregiver_child_consent):
+        return {
+            'first_name': child_birth.first_name,
+            'last_name': caregiver_child_consent.subject_consent.last_name,
+            'gender': child_birth.gender,
+            'child_dob': child_birth.dob}
+
+    @staticmethod
+    def apply_changes(obj, values):
+        """Sets the values that differ on `obj` and returns their field
+        names.
+        """
+        changed = []
+        for field_name, value in values.items():
+            if getattr(obj, field_name) != value:
+                setattr(obj, field_name, value)
+                changed.append(field_name)
+        return changed
+
+    def save_changes(self, obj, values):
+        changed = self.apply_changes(obj, values)
+        if changed:
+            obj.save(update_fields=changed + ['modified', 'user_modified'])
+        return changed
+
+    def propagate_birth(self, child_birth):
+        """Updates the caregiver child consent of a child birth, raising
+        DoesNotExist if there is none.
+        """
+        caregiver_child_consent = self.caregiver_child_consent_cls.objects.select_related(
+            'subject_consent').get(subject_identifier=child_birth.subject_identifier)
+        return self.save_changes(
+            caregiver_child_consent,
+            self.birth_values(child_birth, caregiver_child_consent))
+
+    def propagate_assent(self, child_assent, caregiver_child_consent):
+        """Sets the child's subject identifier on the caregiver child
+        consent the assent was matched to.
+        """
+        return self.save_changes(
+            caregiver_child_consent,
+            {'subject_identifier': child_assent.subject_identifier})
+
+    def propagate_births(self, child_births=None, dry_run=False):
+        """Updates the caregiver child consents of many child births and
+        returns the number of consents that changed.
+        """
+        if child_births is None:
+            child_births = django_apps.get_model(self.child_birth_model).objects.all()
+        child_births = {
+            child_birth.subject_identifier: child_birth for child_birth in child_births}
+
+        subject_identifiers = sorted(child_births)
+        changed_count = 0
+        for index in range(0, len(subject_identifiers), self.batch_size):
+            batch = subject_identifiers[index:index + self.batch_size]
+            consents = self.caregiver_child_consent_cls.objects.select_related(
+                'subject_consent').filter(subject_identifier__in=batch)
+
+            changed_consents, changed_fields = [], set()
+            modified = get_utcnow()
+            for caregiver_child_consent in consents:
+                child_birth = child_births[caregiver_child_consent.subject_identifier]
+                changed = self.apply_changes(
+                    caregiver_child_consent,
+                    self.birth_values(child_birth, caregiver_child_consent))
+                if changed:
+                    caregiver_child_consent.modified = modified
+                    changed_consents.append(caregiver_child_consent)
+                    changed_fields.update(changed)
+
+            changed_count += len(changed_consents)
+            if changed_consents and not dry_run:
+                self.caregiver_child_consent_cls.objects.bulk_update(
+                    changed_consents, sorted(changed_fields) + ['modified'])
+        return changed_count
+
+
+caregiver_consent_propagation = CaregiverConsentPropagation()
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+
+CaregiverIdentifiers = namedtuple(
+    'CaregiverIdentifiers',
+    ['screening_identifier', 'previous_study', 'study_maternal_identifier'])
+
+EMPTY_IDENTIFIERS = CaregiverIdentifiers(None, None, None)
+
+
+class CaregiverIdentifierMap:
+    """Resolves the screening identifier, previous BHP study and study
+    maternal identifier of many caregivers in a fixed number of queries
+    and keeps them in memory for the row writers.
+    """
+
+    batch_size = 900
+
+    subject_consent_model = 'flourish_caregiver.subjectconsent'
+    maternal_dataset_model = 'flourish_caregiver.maternaldataset'
+
+    def __init__(self, caregiver_subject_identifiers=None):
+        self._identifiers = {}
+        if caregiver_subject_identifiers:
+            self.resolve(caregiver_subject_identifiers)
+
+    @property
+    def subject_consent_cls(self):
+        return django_apps.get_model(self.subject_consent_model)
+
+    @property
+    def maternal_dataset_cls(self):
+        return django_apps.get_model(self.maternal_dataset_model)
+
+    def get(self, caregiver_subject_identifier):
+        return self._identifiers.get(
+            caregiver_subject_identifier, EMPTY_IDENTIFIERS)
+
+    def resolve(self, caregiver_subject_identifiers):
+        """Looks up any caregiver identifiers not already in the map.
+        """
+        missing = sorted(
+            set(filter(None, caregiver_subject_identifiers)) - set(self._identifiers))
+        for index in range(0, len(missing), self.batch_size):
+            self._resolve_batch(missing[index:index + self.batch_size])
+
+    def _resolve_batch(self, caregiver_subject_identifiers):
+        consent_cls = self.subject_consent_cls
+        ordering = consent_cls._meta.ordering or ['pk']
+        consents = consent_cls.objects.filter(
+            subject_identifier__in=caregiver_subject_identifiers).order_by(
+                *ordering).values_list('subject_identifier', 'screening_identifier')
+
+        # Later consents overwrite earlier ones, matching `.last()`.
+        screening_identifiers = dict(consents)
+
+        datasets = self.maternal_dataset_cls.objects.filter(
+            screening_identifier__in=set(screening_identifiers.values())).values_list(
+                'screening_identifier', 'protocol', 'study_maternal_identifier')
+        dataset_values = {
+            screening_identifier: (protocol, study_maternal_identifier)
+            for screening_identifier, protocol, study_maternal_identifier in datasets}
+
+        for caregiver_subject_identifier in caregiver_subject_identifiers:
+            screening_identifier = screening_identifiers.get(
+                caregiver_subject_identifier)
+            protocol, study_maternal_identifier = dataset_values.get(
+                screening_identifier, (None, None))
+            self._identifiers[caregiver_subject_identifier] = CaregiverIdentifiers(
+                screening_identifier, protocol, study_maternal_identifier)
@@ -0,0 +1,157 @@
+from django.apps import apps as django_apps
+from edc_base.utils import get_utcnow
+
+
+class CaregiverIdentityIndex:
+    """Maintains the caregiver identity table, which maps a caregiver
+    subject identifier to its screening identifier and consent version,
+    so requisition saves look a caregiver up by primary key instead of
+    a `subject_identifier__startswith` scan of each screening table.
+
+    Pregnant women screening takes precedence over prior participant
+    screening, as in the original lookup.
+    """
+
+    batch_size = 500
+
+    caregiver_identity_model = 'flourish_child.caregiveridentity'
+    consent_version_model = 'flourish_caregiver.flourishconsentversion'
+    screening_models = ['flourish_caregiver.screeningpregwomen',
+                        'flourish_caregiver.screeningpriorbhpparticipants']
+
+    caregiver_identifier_length = 16
+
+    @property
+    def caregiver_identity_cls(self):
+        return django_apps.get_model(self.caregiver_identity_model)
+
+    @property
+    def consent_version_cls(self):
+        return django_apps.get_model(self.consent_version_model)
+
+    def caregiver_subject_identifier(self, subject_identifier):
+        return subject_identifier[0:self.caregiver_identifier_length]
+
+    def screening_identifier(self, caregiver_subject_identifier):
+        """Returns the caregiver's screening identifier in one query,
+        adding the caregiver from the screening forms if it is not in the
+        table yet. Returns None if the caregiver has not been screened.
+        """
+        screening_identifier = self.caregiver_identity_cls.objects.filter(
+            caregiver_subject_identifier=caregiver_subject_identifier).values_list(
+                'screening_identifier', flat=True).first()
+        if screening_identifier is None:
+            caregiver_identity = self.refresh(caregiver_subject_identifier)
+            if caregiver_identity:
+                screening_identifier = caregiver_identity.screening_identifier
+        return screening_identifier
+
+    def consent_version(self, screening_identifier):
+        """Returns the consent version of the caregivers screened under
+        `screening_identifier`, in one query.
+        """
+        return self.caregiver_identity_cls.objects.filter(
+            screening_identifier=screening_identifier,
+            consent_version__isnull=False).values_list(
+                'consent_version', flat=True).first()
+
+    def screened(self, caregiver_subject_identifier):
+        """Returns the screening identifier using the original lookup.
+        """
+        for screening_model in self.screening_models:
+            screening_cls = django_apps.get_model(screening_model)
+            try:
+                return screening_cls.objects.values_list(
+                    'screening_identifier', flat=True).get(
+                        subject_identifier__startswith=caregiver_subject_identifier)
+            except screening_cls.DoesNotExist:
+                continue
+        return None
+
+    def refresh(self, caregiver_subject_identifier):
+        """Updates or creates the caregiver's identity from the screening
+        and consent version forms.
+        """
+        screening_identifier = self.screened(caregiver_subject_identifier)
+        if not screening_identifier:
+            return None
+        consent_version = self.consent_version_cls.objects.filter(
+            screening_identifier=screening_identifier).values_list(
+                'version', flat=True).first()
+        caregiver_identity, _ = self.caregiver_identity_cls.objects.update_or_create(
+            caregiver_subject_identifier=caregiver_subject_identifier,
+            defaults={'screening_identifier': screening_identifier,
+                      'consent_version': consent_version})
+        return caregiver_identity
+
+    def update_consent_version(self, screening_identifier, consent_version):
+        """Sets the consent version of the caregivers screened under
+        `screening_identifier`.
+        """
+        caregiver_identities = self.caregiver_identity_cls.objects.filter(
+            screening_identifier=screening_identifier)
+        if consent_version is None:
+            caregiver_identities = caregiver_identities.filter(
+                consent_version__isnull=False)
+        else:
+            caregiver_identities = caregiver_identities.exclude(
+                consent_version=consent_version)
+        return caregiver_identities.update(
+            consent_version=consent_version, modified=get_utcnow())
+
+    def refresh_consent_version(self, screening_identifier):
+        """Sets the consent version of the caregivers screened under
+        `screening_identifier` from the remaining consent version forms,
+        e.g. after one is deleted.
+        """
+        consent_version = self.consent_version_cls.objects.filter(
+            screening_identifier=screening_identifier).values_list(
+                'version', flat=True).first()
+        return self.update_consent_version(screening_identifier, consent_version)
+
+    def backfill(self):
+        """Rebuilds the table from all screening and consent version
+        forms, returning the number of identities created and updated.
+        """
+        screening_identifiers = {}
+        for screening_model in reversed(self.screening_models):
+            screening_cls = django_apps.get_model(screening_model)
+            for subject_identifier, screening_identifier in screening_cls.objects.filter(
+                    subject_identifier__isnull=False).exclude(
+                        subject_identifier='').values_list(
+                            'subject_identifier', 'screening_identifier'):
+                # later, preferred, screening models overwrite earlier ones
+                screening_identifiers[self.caregiver_subject_identifier(
+                    subject_identifier)] = screening_identifier
+        consent_versions = dict(self.consent_version_cls.objects.values_list(
+            'screening_identifier', 'version'))
+
+        existing = {obj.caregiver_subject_identifier: obj
+                    for obj in self.caregiver_identity_cls.objects.all()}
+        created, updated = [], []
+        modified = get_utcnow()
+        for caregiver_subject_identifier, screening_identifier in (
+                screening_identifiers.items()):
+            consent_version = consent_versions.get(screening_identifier)
+            obj = existing.get(caregiver_subject_identifier)
+            if not obj:
+                created.append(self.caregiver_identity_cls(
+                    caregiver_subject_identifier=caregiver_subject_identifier,
+                    screening_identifier=screening_identifier,
+                    consent_version=consent_version))
+            elif (obj.screening_identifier, obj.consent_version) != (
+                    screening_identifier, consent_version):
+                obj.screening_identifier = screening_identifier
+                obj.consent_version = consent_version
+                obj.modified = modified
+                updated.append(obj)
+
+        self.caregiver_identity_cls.objects.bulk_create(
+            created, batch_size=self.batch_size)
+        self.caregiver_identity_cls.objects.bulk_update(
+            updated, ['screening_identifier', 'consent_version', 'modified'],
+            batch_size=self.batch_size)
+        return len(created), len(updated)
+
+
+caregiver_identity_index = CaregiverIdentityIndex()
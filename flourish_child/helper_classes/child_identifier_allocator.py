@@ -0,0 +1,125 @@
+from django.apps import apps as django_apps
+from django.db import IntegrityError, transaction
+from edc_base.utils import get_utcnow
+
+
+class ChildIdentifierAllocator:
+    """Hands out child subject identifiers, e.g. '<caregiver>-10',
+    '<caregiver>-20', from a per-caregiver counter row.
+
+    The counter row is locked with `select_for_update` for the rest of
+    the transaction, so concurrent assents of twins get different
+    numbers. Under the lock the counter is moved past the highest child
+    identifier in use, so identifiers added without the allocator, e.g.
+    by fixtures, sync imports or the caregiver app, are not handed out
+    again.
+    """
+
+    batch_size = 500
+
+    sequence_model = 'flourish_child.childidentifiersequence'
+    child_consent_model = 'flourish_child.childdummysubjectconsent'
+
+    step = 10
+
+    @property
+    def sequence_cls(self):
+        return django_apps.get_model(self.sequence_model)
+
+    @property
+    def child_consent_cls(self):
+        return django_apps.get_model(self.child_consent_model)
+
+    def child_number(self, subject_identifier):
+        """Returns the child number of a child identifier, e.g. 2 for
+        '<caregiver>-20', or None if the suffix is not a child number.
+        """
+        suffix = subject_identifier.rsplit('-', 1)[-1]
+        if suffix.isdigit() and int(suffix) % self.step == 0:
+            return int(suffix) // self.step
+        return None
+
+    def last_used(self, caregiver_subject_identifier):
+        numbers = [
+            self.child_number(subject_identifier)
+            for subject_identifier in self.child_consent_cls.objects.filter(
+                subject_identifier__startswith=f'{caregiver_subject_identifier}-'
+            ).values_list('subject_identifier', flat=True).distinct()]
+        return max(filter(None, numbers), default=0)
+
+    def existing(self, caregiver_subject_identifier, identity):
+        """Returns the identifier already given to the child with this
+        identity under the caregiver, if any.
+        """
+        return self.child_consent_cls.objects.filter(
+            subject_identifier__startswith=f'{caregiver_subject_identifier}-',
+            identity=identity).values_list('subject_identifier', flat=True).first()
+
+    def allocate(self, caregiver_subject_identifier, count=1):
+        """Reserves the next `count` child identifiers for the caregiver
+        and returns them in order.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.sequence_cls.objects.create(
+                        caregiver_subject_identifier=caregiver_subject_identifier,
+                        last_sequence=0)
+            except IntegrityError:
+                pass
+            sequence = self.sequence_cls.objects.select_for_update().get(
+                caregiver_subject_identifier=caregiver_subject_identifier)
+            first = max(
+                sequence.last_sequence,
+                self.last_used(caregiver_subject_identifier)) + 1
+            sequence.last_sequence = first + count - 1
+            sequence.save(update_fields=['last_sequence', 'modified'])
+        return [f'{caregiver_subject_identifier}-{number * self.step}'
+                for number in range(first, first + count)]
+
+    def subject_identifier(self, caregiver_subject_identifier, identity=None):
+        """Returns the child's existing identifier, or allocates one.
+        """
+        if identity:
+            subject_identifier = self.existing(caregiver_subject_identifier, identity)
+            if subject_identifier:
+                return subject_identifier
+        return self.allocate(caregiver_subject_identifier)[0]
+
+    def backfill(self):
+        """Sets every caregiver's counter to its highest child identifier
+        in one pass, e.g. after migrating historical children. Returns the
+        number of counters created and updated.
+        """
+        last_used = {}
+        for subject_identifier in self.child_consent_cls.objects.values_list(
+                'subject_identifier', flat=True).distinct():
+            caregiver_subject_identifier, _, _ = subject_identifier.rpartition('-')
+            number = self.child_number(subject_identifier)
+            if caregiver_subject_identifier and number:
+                last_used[caregiver_subject_identifier] = max(
+                    number, last_used.get(caregiver_subject_identifier, 0))
+
+        with transaction.atomic():
+            existing = {
+                sequence.caregiver_subject_identifier: sequence
+                for sequence in self.sequence_cls.objects.select_for_update()}
+            created, updated = [], []
+            modified = get_utcnow()
+            for caregiver_subject_identifier, number in last_used.items():
+                sequence = existing.get(caregiver_subject_identifier)
+                if not sequence:
+                    created.append(self.sequence_cls(
+                        caregiver_subject_identifier=caregiver_subject_identifier,
+                        last_sequence=number))
+                elif sequence.last_sequence < number:
+                    sequence.last_sequence = number
+                    sequence.modified = modified
+                    updated.append(sequence)
+            self.sequence_cls.objects.bulk_create(created, batch_size=self.batch_size)
+            self.sequence_cls.objects.bulk_update(
+                updated, ['last_sequence', 'modified'], batch_size=self.batch_size)
+        return len(created), len(updated)
+
+
+child_identifier_allocator = ChildIdentifierAllocator()
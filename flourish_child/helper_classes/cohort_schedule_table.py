@@ -0,0 +1,123 @@
+from django.apps import apps as django_apps
+from edc_visit_schedule.site_visit_schedules import SiteVisitScheduleError
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+
+class CohortScheduleTable:
+    """Maps each cohort key passed to `put_on_schedule`, e.g.
+    'cohort_a_enrol' or 'cohort_b_sec_qt', to its onschedule model label
+    and schedule object.
+
+    The table is built once, when the app is ready, by applying the
+    cohort naming rules to every candidate key and resolving the result
+    against the visit schedule registry. Keys whose onschedule model does
+    not exist are not cohort keys and are skipped; keys whose model
+    exists but whose schedule is not registered are kept in `errors` and
+    reported by the system checks.
+    """
+
+    cohorts = ['cohort_a', 'cohort_b', 'cohort_c']
+
+    suffixes = ['enrol', 'quarterly', 'sec', 'sec_qt', 'birth', 'pool']
+
+    enrolment_visit_codes = ['2000', '2000D']
+
+    def __init__(self):
+        self._table = {}
+        self.errors = {}
+        self.loaded = False
+
+    @staticmethod
+    def onschedule_model_schedule_name(cohort):
+        """Returns the onschedule model label and schedule name for a
+        cohort key from the naming rules.
+        """
+        cohort_label_lower = ''.join(cohort.split('_'))
+
+        if 'enrol' in cohort:
+            cohort_label_lower = cohort_label_lower.replace('enrol', 'enrollment')
+        elif 'sec' in cohort:
+            cohort_label_lower = cohort_label_lower.replace('qt', 'quart')
+
+        if 'birth' in cohort:
+            onschedule_model = 'flourish_child.onschedule' + cohort_label_lower
+            schedule_name = cohort.replace('cohort_', '') + '_schedule1'
+        else:
+            onschedule_model = 'flourish_child.onschedulechild' + cohort_label_lower
+            schedule_name = cohort.replace('cohort', 'child') + '_schedule1'
+
+        if 'quarterly' in cohort:
+            schedule_name = schedule_name.replace('quarterly', 'quart')
+        return onschedule_model, schedule_name
+
+    @staticmethod
+    def enrolment_cohort(cohort):
+        """Returns the cohort key a consented child is first put on,
+        e.g. 'cohort_a_enrol' for 'cohort_a'.
+        """
+        if 'sec' in cohort or 'pool' in cohort:
+            return cohort
+        return cohort + '_enrol'
+
+    @staticmethod
+    def quarterly_cohort(schedule_name):
+        """Returns the cohort key a child is put on at the enrolment
+        visit of a schedule, e.g. 'cohort_a_quarterly' for
+        'child_a_schedule1' or 'cohort_b_sec_qt' for 'child_b_sec_schedule1'.
+        """
+        cohort = schedule_name.split('_')[1]
+        if 'sec' in schedule_name:
+            return '_'.join(['cohort', cohort, 'sec_qt'])
+        return '_'.join(['cohort', cohort, 'quarterly'])
+
+    @property
+    def cohort_keys(self):
+        keys = ['cohort_pool']
+        for cohort in self.cohorts:
+            keys.extend(f'{cohort}_{suffix}' for suffix in self.suffixes)
+            keys.append(f'child_{cohort}_birth')
+        return keys
+
+    def load(self):
+        self._table = {}
+        self.errors = {}
+        for cohort in self.cohort_keys:
+            onschedule_model, schedule_name = self.onschedule_model_schedule_name(
+                cohort)
+            try:
+                django_apps.get_model(onschedule_model)
+            except LookupError:
+                continue
+            try:
+                _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
+                    onschedule_model=onschedule_model, name=schedule_name)
+            except SiteVisitScheduleError as e:
+                self.errors[cohort] = str(e)
+            else:
+                self._table[cohort] = (onschedule_model, schedule)
+        self.loaded = True
+
+    def get(self, cohort):
+        """Returns (onschedule_model, schedule) for a cohort key.
+
+        Keys outside the table are resolved from the naming rules against
+        the registry, which raises SiteVisitScheduleError as before.
+        """
+        if not self.loaded:
+            self.load()
+        try:
+            return self._table[cohort]
+        except KeyError:
+            onschedule_model, schedule_name = self.onschedule_model_schedule_name(
+                cohort)
+            _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
+                onschedule_model=onschedule_model, name=schedule_name)
+            return onschedule_model, schedule
+
+    def __contains__(self, cohort):
+        if not self.loaded:
+            self.load()
+        return cohort in self._table
+
+
+cohort_schedule_table = CohortScheduleTable()
@@ -0,0 +1,113 @@
+from django.db.models import (
+    BigIntegerField, BooleanField, DateField, DateTimeField, DecimalField,
+    FloatField, ForeignKey, IntegerField, ManyToManyField, OneToOneField,
+    SmallIntegerField, UUIDField)
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .export_field_plan import get_export_field_plan
+
+
+class ColumnarExporter:
+    """Writes a model's rows to a Parquet file with typed columns, one
+    record batch per chunk of the queryset.
+
+    Dates and datetimes are written as date32 and UTC timestamps, decimals
+    keep their precision and scale and fields with choices are dictionary
+    encoded. Inline models are exported as models in their own right.
+    """
+
+    identifier_columns = ['subject_identifier', 'visit_code']
+
+    def __init__(self, model_exporter):
+        self.model_exporter = model_exporter
+        self.model = model_exporter.model
+        # e.g. requisitions have their own subject_identifier field
+        prepended = self.identifier_columns if self.has_child_visit else []
+        self.fields = [
+            field for field in self.model._meta.get_fields()
+            if (field.concrete or isinstance(field, ManyToManyField))
+            and field.name not in prepended]
+        self.column_types = {
+            field.name: self.arrow_type(field) for field in self.fields}
+
+    @property
+    def has_child_visit(self):
+        return self.model_exporter.has_child_visit
+
+    def arrow_type(self, field):
+        if isinstance(field, (ForeignKey, OneToOneField, UUIDField,
+                              ManyToManyField)):
+            return pa.string()
+        if field.choices:
+            return pa.dictionary(pa.int32(), pa.string())
+        if isinstance(field, DateTimeField):
+            return pa.timestamp('us', tz='UTC')
+        if isinstance(field, DateField):
+            return pa.date32()
+        if isinstance(field, DecimalField):
+            return pa.decimal128(field.max_digits, field.decimal_places)
+        if isinstance(field, (IntegerField, BigIntegerField, SmallIntegerField)):
+            return pa.int64()
+        if isinstance(field, FloatField):
+            return pa.float64()
+        if isinstance(field, BooleanField):
+            return pa.bool_()
+        return pa.string()
+
+    @property
+    def schema(self):
+        columns = []
+        if self.has_child_visit:
+            columns.extend(
+                (name, pa.string()) for name in self.identifier_columns)
+        columns.extend(
+            (field.name, self.arrow_type(field)) for field in self.fields)
+        return pa.schema(columns)
+
+    def field_value(self, obj, field):
+        if isinstance(field, ManyToManyField):
+            return ', '.join(o.name for o in getattr(obj, field.name).all())
+        value = getattr(obj, field.attname)
+        if value is None:
+            return None
+        if isinstance(field, (ForeignKey, OneToOneField, UUIDField)):
+            return str(value)
+        column_type = self.column_types[field.name]
+        if column_type == pa.string() or pa.types.is_dictionary(column_type):
+            return str(value)
+        return value
+
+    def record_batch(self, chunk, schema):
+        columns = {name: [] for name in schema.names}
+        for obj in chunk:
+            if self.has_child_visit:
+                columns['subject_identifier'].append(
+                    obj.child_visit.subject_identifier)
+                columns['visit_code'].append(obj.child_visit.visit_code)
+            for field in self.fields:
+                columns[field.name].append(self.field_value(obj, field))
+
+        arrays = []
+        for schema_field in schema:
+            values = columns[schema_field.name]
+            if pa.types.is_dictionary(schema_field.type):
+                arrays.append(pa.array(
+                    values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=schema_field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def write(self, queryset, where):
+        """Writes the queryset to `where`, a path or binary file object,
+        and returns the number of rows written.
+        """
+        queryset = get_export_field_plan(self.model).apply(queryset)
+        schema = self.schema
+        row_count = 0
+        with pq.ParquetWriter(where, schema, compression='snappy') as writer:
+            for chunk in self.model_exporter.iter_export_chunks(queryset):
+                writer.write_table(
+                    pa.Table.from_batches([self.record_batch(chunk, schema)]))
+                row_count += len(chunk)
+        return row_count
@@ -0,0 +1,114 @@
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .caregiver_identity_index import caregiver_identity_index
+
+PER_PROCESS_CACHE_BACKENDS = [
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache']
+
+
+class ConsentVersionResolver:
+    """Looks up and caches the consent versions stamped on child CRFs,
+    onschedule models and requisitions.
+
+    Caregivers are looked up in the caregiver identity table, which the
+    caregiver receivers keep in step with the consent version forms.
+    Versions are kept in the `settings.FLOURISH_CHILD_CONSENT_VERSION_CACHE` cache
+    for `settings.FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT` seconds,
+    so the CRFs of one visit share a single lookup. Caching is off unless
+    a timeout is set, and the cache must then be shared by all processes,
+    see `consent_version_cache_check`.
+
+    Saving or deleting a child dummy consent or caregiver consent version
+    invalidates the subject's versions once the transaction commits. Each
+    invalidation moves the subject's key to a new generation, so a lookup
+    that read the old version before the commit cannot cache it under
+    the key later lookups use. Missing consents are not cached; callers
+    raise their own errors on None.
+    """
+
+    key_prefix = 'flourish_child:consent_version'
+
+    child_consent_model = 'flourish_child.childdummysubjectconsent'
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT', 0)
+
+    @property
+    def cache(self):
+        return caches[getattr(
+            settings, 'FLOURISH_CHILD_CONSENT_VERSION_CACHE', 'default')]
+
+    def _generation_key(self, key):
+        return f'{self.key_prefix}:{key}:generation'
+
+    def _cached(self, key, lookup):
+        if not self.timeout:
+            return lookup()
+        generation = self.cache.get(self._generation_key(key), 0)
+        key = f'{self.key_prefix}:{key}:{generation}'
+        value = self.cache.get(key)
+        if value is None:
+            value = lookup()
+            if value is not None:
+                self.cache.set(key, value, self.timeout)
+        return value
+
+    def _invalidate(self, key):
+        def invalidate():
+            generation_key = self._generation_key(key)
+            # outlives any value cached under the previous generation
+            self.cache.set(
+                generation_key, self.cache.get(generation_key, 0) + 1,
+                self.timeout * 2)
+        if self.timeout:
+            transaction.on_commit(invalidate)
+
+    def child_consent_version(self, subject_identifier):
+        """Returns the version of the child's latest dummy consent.
+        """
+        child_consent_cls = django_apps.get_model(self.child_consent_model)
+        return self._cached(
+            f'child:{subject_identifier}',
+            lambda: child_consent_cls.objects.filter(
+                subject_identifier=subject_identifier).order_by(
+                    '-consent_datetime').values_list('version', flat=True).first())
+
+    def screening_identifier(self, caregiver_subject_identifier):
+        """Returns the screening identifier of the caregiver's pregnant
+        women or prior participant screening.
+        """
+        return self._cached(
+            f'screening:{caregiver_subject_identifier}',
+            lambda: caregiver_identity_index.screening_identifier(
+                caregiver_subject_identifier))
+
+    def caregiver_consent_version(self, screening_identifier):
+        """Returns the version of the caregiver's consent version form.
+        """
+        return self._cached(
+            f'caregiver:{screening_identifier}',
+            lambda: caregiver_identity_index.consent_version(screening_identifier))
+
+    def invalidate_child(self, subject_identifier):
+        self._invalidate(f'child:{subject_identifier}')
+
+    def invalidate_screening(self, caregiver_subject_identifier):
+        self._invalidate(f'screening:{caregiver_subject_identifier}')
+
+    def invalidate_caregiver(self, screening_identifier):
+        self._invalidate(f'caregiver:{screening_identifier}')
+
+    @property
+    def per_process(self):
+        """Returns True if the cache is not shared between processes.
+        """
+        backend = self.cache.__class__
+        return f'{backend.__module__}.{backend.__name__}' in PER_PROCESS_CACHE_BACKENDS
+
+
+consent_version_resolver = ConsentVersionResolver()
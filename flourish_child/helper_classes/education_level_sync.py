@@ -0,0 +1,97 @@
+from django.apps import apps as django_apps
+from django.db.models import F, OuterRef, Q, Subquery
+from edc_base.utils import get_utcnow
+
+from ..choices import HIGHEST_EDUCATION
+
+# Education level choice key for each key, label and stripped label.
+EDUCATION_LEVEL_KEYS = {}
+for key, label in HIGHEST_EDUCATION:
+    EDUCATION_LEVEL_KEYS.update({key: key, label: key, label.strip(): key})
+
+
+def education_level_key(value):
+    """Returns the HIGHEST_EDUCATION key for a key or label.
+    """
+    return EDUCATION_LEVEL_KEYS[value]
+
+
+class EducationLevelSync:
+    """Copies the socio demographic education level to the academic
+    performance CRF of the same subject and visit, in bulk.
+
+    Mismatched pairs are found in one query, with the socio demographic
+    education level joined in as a subquery, and written back with
+    `bulk_update`. As `bulk_update` skips the pre_save receiver, levels
+    are mapped to their key here; pairs that match once mapped are left
+    alone and levels with no key are kept in `unmapped` instead of
+    being copied.
+    """
+
+    batch_size = 500
+
+    academic_performance_model = 'flourish_child.academicperformance'
+    socio_demographic_model = 'flourish_child.childsociodemographic'
+
+    def __init__(self, subject_identifiers=None):
+        self.subject_identifiers = subject_identifiers
+        self.unmapped = []
+
+    def mismatched(self):
+        """Returns academic performance CRFs, annotated with
+        `socio_education_level`, whose education level differs from the
+        socio demographic CRF of the same visit.
+        """
+        academic_performance_cls = django_apps.get_model(
+            self.academic_performance_model)
+        socio_demographic_cls = django_apps.get_model(self.socio_demographic_model)
+
+        socio_education_level = socio_demographic_cls.objects.filter(
+            child_visit__subject_identifier=OuterRef('child_visit__subject_identifier'),
+            child_visit__visit_code=OuterRef('child_visit__visit_code')).values(
+                'education_level')[:1]
+
+        queryset = academic_performance_cls.objects.annotate(
+            socio_education_level=Subquery(socio_education_level)).filter(
+                ~Q(education_level=F('socio_education_level')),
+                socio_education_level__isnull=False)
+        if self.subject_identifiers is not None:
+            queryset = queryset.filter(
+                child_visit__subject_identifier__in=self.subject_identifiers)
+        return queryset
+
+    def sync(self, dry_run=False):
+        """Updates the mismatched academic performance CRFs and returns
+        how many there were.
+        """
+        academic_performance_cls = django_apps.get_model(
+            self.academic_performance_model)
+        mismatched = []
+        self.unmapped = []
+        for obj in self.mismatched().only('id', 'education_level'):
+            education_level = EDUCATION_LEVEL_KEYS.get(obj.socio_education_level)
+            if education_level is None:
+                self.unmapped.append(obj)
+            elif education_level != obj.education_level:
+                obj.education_level = education_level
+                mismatched.append(obj)
+        if not dry_run:
+            modified = get_utcnow()
+            for obj in mismatched:
+                obj.modified = modified
+            academic_performance_cls.objects.bulk_update(
+                mismatched, ['education_level', 'modified'],
+                batch_size=self.batch_size)
+        return len(mismatched)
+
+
+def sync_loaded_education_levels(loaded):
+    """Syncs the academic performance CRFs of bulk loaded socio
+    demographic CRFs, given as {model_cls: [pk, ...]}.
+    """
+    subject_identifiers = set()
+    for model_cls, pks in loaded.items():
+        subject_identifiers.update(model_cls.objects.filter(
+            pk__in=pks).values_list('child_visit__subject_identifier', flat=True))
+    if subject_identifiers:
+        EducationLevelSync(subject_identifiers).sync()
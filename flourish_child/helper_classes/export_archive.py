@@ -0,0 +1,116 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.apps import apps as django_apps
+from django.db import connections
+from edc_base.utils import get_utcnow
+
+from .export_jobs import write_csv
+
+
+def init_export_worker():
+    """Prepares a worker process. Forked workers inherit a configured
+    Django; spawned ones have to set it up.
+    """
+    if not django_apps.ready:
+        import django
+        django.setup()
+
+
+def export_model_csv(model_label, directory):
+    """Exports every row of a model to a CSV file in `directory` and returns
+    the manifest entry for it.
+    """
+    from ..admin.exportaction_mixin import ModelExporter
+
+    model_cls = django_apps.get_model(model_label)
+    model_exporter = ModelExporter(model_cls)
+    filename = f'{model_cls._meta.label_lower.replace(".", "_")}.csv'
+    path = os.path.join(directory, filename)
+    with open(path, 'wb') as f:
+        row_count = write_csv(
+            model_exporter.export_rows(model_cls.objects.all()), f)
+    return dict(model=model_label, file=filename, rows=row_count,
+                sha256=file_sha256(path))
+
+
+def export_model_csv_in_worker(model_label, directory):
+    """Runs `export_model_csv` in a worker process, which opens its own
+    database connection and closes it when done.
+    """
+    try:
+        return export_model_csv(model_label, directory)
+    finally:
+        connections.close_all()
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class ExportArchive:
+    """Exports several models concurrently, one worker process per model,
+    and packs the CSV files with a manifest of row counts and checksums
+    into a single compressed zip archive.
+
+    Worker processes are only started from the `export_archive` command.
+    django_q workers are daemonic and cannot start processes, so there
+    the export runs in turn; archive jobs instead enqueue one task per
+    model, see `submit_archive_job`.
+    """
+
+    manifest_name = 'manifest.json'
+
+    def __init__(self, model_labels, processes=None):
+        self.model_labels = list(model_labels)
+        self.processes = processes or os.cpu_count() or 1
+
+    def export(self, directory):
+        """Returns the manifest entries for the models exported to
+        `directory`, in the order the models were given.
+        """
+        processes = min(self.processes, len(self.model_labels))
+        if processes <= 1 or multiprocessing.current_process().daemon:
+            return [export_model_csv(model_label, directory)
+                    for model_label in self.model_labels]
+
+        # Workers must not share the parent's open connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=init_export_worker) as executor:
+            return list(executor.map(
+                export_model_csv_in_worker, self.model_labels,
+                [directory] * len(self.model_labels)))
+
+    def write(self, archive):
+        """Writes the archive to `archive`, a path or binary file object,
+        and returns the manifest.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            return self.pack(
+                archive, self.export(directory),
+                lambda entry: open(os.path.join(directory, entry['file']), 'rb'))
+
+    @classmethod
+    def pack(cls, archive, entries, open_entry):
+        """Writes the files of the manifest entries, each opened with
+        `open_entry`, and the manifest to a zip archive and returns the
+        manifest.
+        """
+        manifest = dict(generated=get_utcnow().isoformat(), models=entries)
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for entry in entries:
+                with open_entry(entry) as src, zf.open(entry['file'], 'w') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            zf.writestr(cls.manifest_name, json.dumps(manifest, indent=2))
+        return manifest
@@ -0,0 +1,227 @@
+from contextlib import contextmanager
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.db import connection
+from edc_base.utils import get_utcnow
+from edc_constants.constants import YES
+
+from .export_writers import CsvStreamWriter, XlsxStreamWriter
+from .side_effects import side_effects
+
+
+class QueryCounter:
+    """Counts the queries run on a connection without keeping them, so
+    the count does not add to the memory being measured.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class SyntheticCohort:
+    """Creates enrolled children with visits and CRFs, inlines included,
+    from the mommy recipes so that exports can be timed on a known volume.
+    """
+
+    crf_models = ['flourish_child.childsociodemographic',
+                  'flourish_child.childclinicalmeasurements',
+                  'flourish_child.childimmunizationhistory']
+
+    inline_models = {
+        'flourish_child.childimmunizationhistory': (
+            'flourish_child.vaccinesreceived', 'child_immunization_history', 2)}
+
+    def __init__(self, size=10, visits_per_child=3, crf_models=None):
+        self.size = size
+        self.visits_per_child = visits_per_child
+        self.crf_models = crf_models or self.crf_models
+
+    def create(self):
+        """Creates the cohort, running the child receivers inline so
+        schedules and appointments exist even when the cohort is built
+        inside a transaction that is rolled back.
+        """
+        with side_effects.immediate():
+            for index in range(self.size):
+                self.create_child(index)
+
+    def create_child(self, index):
+        from model_mommy import mommy
+
+        delivdt = get_utcnow() - relativedelta(years=2)
+        study_maternal_identifier = f'BM{index:06d}'
+
+        maternal_dataset_obj = mommy.make_recipe(
+            'flourish_caregiver.maternaldataset',
+            delivdt=delivdt,
+            mom_enrolldate=get_utcnow(),
+            mom_hivstatus='HIV-infected',
+            study_maternal_identifier=study_maternal_identifier,
+            protocol='Tshilo Dikotla')
+
+        child_dataset = mommy.make_recipe(
+            'flourish_child.childdataset',
+            dob=delivdt,
+            infant_hiv_exposed='Exposed',
+            infant_enrolldate=get_utcnow(),
+            study_maternal_identifier=study_maternal_identifier,
+            study_child_identifier=f'BC{index:06d}')
+
+        mommy.make_recipe(
+            'flourish_caregiver.screeningpriorbhpparticipants',
+            screening_identifier=maternal_dataset_obj.screening_identifier)
+
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=maternal_dataset_obj.screening_identifier,
+            breastfeed_intent=YES,
+            biological_caregiver=YES,
+            consent_datetime=get_utcnow(),
+            version='1')
+
+        caregiver_child_consent = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            study_child_identifier=child_dataset.study_child_identifier,
+            child_dob=delivdt.date())
+
+        mommy.make_recipe(
+            'flourish_caregiver.caregiverpreviouslyenrolled',
+            subject_identifier=subject_consent.subject_identifier)
+
+        appointment_cls = django_apps.get_model('flourish_child.appointment')
+        for appointment_pk in appointment_cls.objects.filter(
+                subject_identifier=caregiver_child_consent.subject_identifier,
+                visit_code_sequence=0).order_by(
+                    'timepoint').values_list('pk', flat=True)[:self.visits_per_child]:
+            child_visit = mommy.make_recipe(
+                'flourish_child.childvisit',
+                appointment=appointment_cls.objects.get(pk=appointment_pk),
+                report_datetime=get_utcnow())
+            self.create_crfs(child_visit)
+
+    def create_crfs(self, child_visit):
+        from model_mommy import mommy
+
+        visit_crfs = [crf.model for crf in child_visit.visit.crfs]
+        for model_label in self.crf_models:
+            if model_label not in visit_crfs:
+                continue
+            crf = mommy.make(
+                model_label, child_visit=child_visit,
+                report_datetime=child_visit.report_datetime)
+            if model_label in self.inline_models:
+                inline_label, parent_attr, count = self.inline_models[model_label]
+                mommy.make(inline_label, _quantity=count, **{parent_attr: crf})
+
+
+class ExportBenchmark:
+    """Times the export modes over every row of the given models and
+    reports rows per second, query count and peak allocated memory for
+    each.
+
+    Memory is traced with `tracemalloc` in a second run of each mode, so
+    the tracing does not slow the timed run. The process's maximum
+    resident set size is reported alongside; it is a high-water mark for
+    the whole process, so it only shows a mode that raises it.
+    """
+
+    modes = ['xls', 'csv_stream', 'xlsx_stream', 'parquet', 'wide']
+
+    def __init__(self, model_labels, modes=None):
+        self.model_labels = model_labels
+        self.modes = modes or self.modes
+
+    @contextmanager
+    def measure(self, result):
+        query_counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_counter):
+            yield
+        seconds = time.perf_counter() - start
+        result.update(
+            seconds=round(seconds, 3),
+            rows_per_second=round(result['rows'] / seconds, 1) if seconds else None,
+            queries=query_counter.count)
+
+    @contextmanager
+    def measure_memory(self, result):
+        tracemalloc.start()
+        try:
+            yield
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result.update(peak_alloc_kb=round(peak / 1024), max_rss_kb=self.max_rss_kb)
+
+    @property
+    def max_rss_kb(self):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes elsewhere
+        return round(max_rss / 1024) if sys.platform == 'darwin' else max_rss
+
+    def run(self):
+        from ..admin.exportaction_mixin import ModelExporter
+
+        results = []
+        for model_label in self.model_labels:
+            model_cls = django_apps.get_model(model_label)
+            model_exporter = ModelExporter(model_cls)
+            queryset = model_cls.objects.all()
+            rows = sum(1 for _ in model_exporter.export_rows(queryset)) - 1
+            for mode in self.modes:
+                if mode == 'wide':
+                    continue
+                result = dict(model=model_label, mode=mode, rows=rows)
+                with self.measure(result):
+                    self.export(mode, model_exporter, queryset)
+                with self.measure_memory(result):
+                    self.export(mode, model_exporter, queryset)
+                results.append(result)
+        if 'wide' in self.modes:
+            results.append(self.run_wide())
+        return results
+
+    def export(self, mode, model_exporter, queryset):
+        if mode == 'xls':
+            model_exporter.export_as_csv(None, queryset)
+        elif mode == 'csv_stream':
+            for _ in CsvStreamWriter().stream(model_exporter.export_rows(queryset)):
+                pass
+        elif mode == 'xlsx_stream':
+            XlsxStreamWriter().write(model_exporter.export_rows(queryset)).close()
+        elif mode == 'parquet':
+            from .columnar_export import ColumnarExporter
+            with tempfile.TemporaryFile() as f:
+                ColumnarExporter(model_exporter).write(queryset, f)
+        else:
+            raise ValueError(f'Unknown export mode {mode}.')
+
+    def run_wide(self):
+        from .wide_export import WideExport
+
+        wide_export = WideExport(crf_fields={
+            model_label: WideExport.data_field_names(
+                django_apps.get_model(model_label))
+            for model_label in self.model_labels
+            if model_label in [
+                model._meta.label_lower for model in WideExport.crf_models()]})
+        result = dict(model='flourish_child.childvisit', mode='wide',
+                      rows=wide_export.visit_queryset.count())
+        with self.measure(result):
+            for _ in CsvStreamWriter().stream(wide_export.rows()):
+                pass
+        with self.measure_memory(result):
+            for _ in CsvStreamWriter().stream(wide_export.rows()):
+                pass
+        return result
@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+from django.db.models import ForeignKey, ManyToManyField, ManyToOneRel, OneToOneField
+from django.db.models import OneToOneRel
+
+
+class ExportFieldPlan:
+    """Classifies a model's fields once for the exporters and works out
+    the select_related/prefetch_related that let a whole export run in a
+    fixed number of queries per relation.
+
+    As before, only the last reverse foreign key of a model is expanded
+    into inline rows.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = model._meta.get_fields()
+        self.m2m_fields = [
+            field for field in self.fields if isinstance(field, ManyToManyField)]
+        self.fk_fields = [
+            field for field in self.fields
+            if isinstance(field, (ForeignKey, OneToOneField))]
+        self.inline_relation = None
+        for field in self.fields:
+            if (isinstance(field, ManyToOneRel)
+                    and not isinstance(field, OneToOneRel)):
+                self.inline_relation = field
+        self.has_child_visit = any(
+            field.name == 'child_visit' for field in self.fk_fields)
+
+    @property
+    def inline_accessor(self):
+        if self.inline_relation:
+            return self.inline_relation.get_accessor_name()
+        return None
+
+    @property
+    def select_related(self):
+        return ['child_visit'] if self.has_child_visit else []
+
+    @property
+    def prefetch_related(self):
+        prefetch_related = [field.name for field in self.m2m_fields]
+        if self.inline_accessor:
+            prefetch_related.append(self.inline_accessor)
+        return prefetch_related
+
+    def apply(self, queryset):
+        """Returns the queryset with the plan's related lookups applied.
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def get_export_field_plan(model):
+    return ExportFieldPlan(model)
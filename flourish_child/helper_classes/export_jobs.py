@@ -0,0 +1,183 @@
+import os
+import tempfile
+
+from django.apps import apps as django_apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django_q.tasks import async_task, fetch_group
+from edc_base.utils import get_utcnow
+
+from ..constants import EXPORT_COMPLETE, EXPORT_FAILED, EXPORT_PENDING, EXPORT_RUNNING
+from .export_writers import CsvStreamWriter
+
+export_job_model = 'flourish_child.exportjob'
+
+archive_parts_dir = 'flourish_child/exports/parts'
+
+
+class ExportArchiveError(Exception):
+    pass
+
+
+def submit_export_job(queryset, description=None, user_created=None):
+    """Creates an export job for the queryset and enqueues it on the
+    django_q cluster. The query, not the rows, is sent to the worker.
+    """
+    export_job_cls = django_apps.get_model(export_job_model)
+    model_label = queryset.model._meta.label_lower
+    export_job = export_job_cls.objects.create(
+        description=description or f'Export {queryset.model._meta.verbose_name_plural}',
+        model_labels=model_label,
+        user_created=user_created)
+    export_job.task_id = async_task(
+        'flourish_child.helper_classes.export_jobs.run_export_job',
+        str(export_job.id), model_label, queryset.query,
+        task_name=f'export-{export_job.id}')
+    export_job.save(update_fields=['task_id'])
+    return export_job
+
+
+def submit_archive_job(model_labels, description=None, user_created=None):
+    """Creates an export job for a zip archive of several models and
+    enqueues one django_q task per model, grouped under the job. The
+    last task to finish packs the archive, see `archive_part_done`.
+    """
+    export_job_cls = django_apps.get_model(export_job_model)
+    export_job = export_job_cls.objects.create(
+        description=description or f'Export archive of {len(model_labels)} models',
+        model_labels=','.join(model_labels),
+        user_created=user_created)
+    export_job.task_id = f'export-{export_job.id}'
+    export_job.save(update_fields=['task_id'])
+    for model_label in model_labels:
+        async_task(
+            'flourish_child.helper_classes.export_jobs.run_archive_part',
+            str(export_job.id), model_label,
+            group=export_job.task_id,
+            hook='flourish_child.helper_classes.export_jobs.archive_part_done',
+            task_name=f'{export_job.task_id}-{model_label}')
+    return export_job
+
+
+def run_export_job(export_job_id, model_label, query):
+    """Builds the CSV file for an export job. Called by the worker.
+    """
+    from ..admin.exportaction_mixin import ModelExporter
+
+    model_cls = django_apps.get_model(model_label)
+    queryset = model_cls.objects.all()
+    queryset.query = query
+    exporter = ModelExporter(model_cls)
+
+    def build(export_file):
+        return write_csv(exporter.export_rows(queryset), export_file)
+
+    return run_job(export_job_id, build, f'{exporter.get_export_filename()}.csv')
+
+
+def run_archive_part(export_job_id, model_label):
+    """Exports one model of an archive job to the default storage and
+    returns its manifest entry with the stored path. Called by the worker.
+    """
+    from .export_archive import export_model_csv
+
+    export_job_cls = django_apps.get_model(export_job_model)
+    export_job_cls.objects.filter(
+        id=export_job_id, status=EXPORT_PENDING).update(
+            status=EXPORT_RUNNING, started_datetime=get_utcnow())
+
+    with tempfile.TemporaryDirectory() as directory:
+        entry = export_model_csv(model_label, directory)
+        with open(os.path.join(directory, entry['file']), 'rb') as f:
+            entry['path'] = default_storage.save(
+                f'{archive_parts_dir}/{export_job_id}/{entry["file"]}', File(f))
+    return entry
+
+
+def archive_part_done(task):
+    """Hook run after each part of an archive job. Once every part has
+    finished, packs the stored CSV files into the job's archive, or marks
+    the job failed if any part failed, and removes the parts.
+
+    The job row is locked while the parts are counted so only one hook
+    packs the archive.
+    """
+    from .export_archive import ExportArchive
+
+    export_job_id = task.args[0]
+    export_job_cls = django_apps.get_model(export_job_model)
+    with transaction.atomic():
+        export_job = export_job_cls.objects.select_for_update().get(
+            id=export_job_id)
+        model_labels = export_job.model_labels.split(',')
+        parts = fetch_group(task.group, failures=True) or []
+        if (export_job.status in [EXPORT_COMPLETE, EXPORT_FAILED]
+                or len(parts) < len(model_labels)):
+            return None
+
+        entries = sorted(
+            [dict(part.result) for part in parts if part.success],
+            key=lambda entry: model_labels.index(entry['model']))
+        paths = {entry['file']: entry.pop('path') for entry in entries}
+        errors = [f'{part.args[1]}: {part.result}'
+                  for part in parts if not part.success]
+
+        def build(export_file):
+            if errors:
+                raise ExportArchiveError('\n'.join(errors))
+            manifest = ExportArchive.pack(
+                export_file, entries,
+                lambda entry: default_storage.open(paths[entry['file']], 'rb'))
+            return sum(entry['rows'] for entry in manifest['models'])
+
+        filename = 'flourish_child-%s.zip' % get_utcnow().strftime('%Y-%m-%d')
+        try:
+            return run_job(export_job_id, build, filename)
+        except Exception:
+            # run_job recorded the failure; raising would roll it back
+            return None
+        finally:
+            for path in paths.values():
+                default_storage.delete(path)
+
+
+def run_job(export_job_id, build, filename):
+    """Marks the job as running, calls `build` with a temporary binary
+    file and attaches the file to the job, recording any failure.
+    """
+    export_job_cls = django_apps.get_model(export_job_model)
+    export_job = export_job_cls.objects.get(id=export_job_id)
+    export_job.status = EXPORT_RUNNING
+    export_job.started_datetime = export_job.started_datetime or get_utcnow()
+    export_job.save(update_fields=['status', 'started_datetime'])
+
+    try:
+        with tempfile.TemporaryFile() as export_file:
+            row_count = build(export_file)
+            export_file.seek(0)
+            export_job.document.save(filename, File(export_file), save=False)
+    except Exception as e:
+        export_job.status = EXPORT_FAILED
+        export_job.error_message = str(e)
+        export_job.finished_datetime = get_utcnow()
+        export_job.save(
+            update_fields=['status', 'error_message', 'finished_datetime'])
+        raise
+    export_job.status = EXPORT_COMPLETE
+    export_job.row_count = row_count
+    export_job.finished_datetime = get_utcnow()
+    export_job.save(
+        update_fields=['status', 'row_count', 'finished_datetime', 'document'])
+    return row_count
+
+
+def write_csv(rows, export_file):
+    """Writes rows to a binary file object and returns the number of data
+    rows written, excluding the header.
+    """
+    row_count = -1
+    for line in CsvStreamWriter().stream(rows):
+        export_file.write(line.encode('utf-8'))
+        row_count += 1
+    return max(row_count, 0)
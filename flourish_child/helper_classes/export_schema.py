@@ -0,0 +1,170 @@
+from functools import lru_cache
+import operator
+
+from django.apps import apps as django_apps
+from django.db.models import (
+    DateField, DateTimeField, ForeignKey, ManyToManyField, ManyToOneRel,
+    OneToOneField, UUIDField)
+from django.utils import timezone
+import xlwt
+
+from .export_field_plan import get_export_field_plan
+
+DATETIME_STYLE = xlwt.easyxf(num_format_str='YYYY/MM/DD h:mm:ss')
+DATE_STYLE = xlwt.easyxf(num_format_str='YYYY/MM/DD')
+
+
+def write_value(ws, row_num, col_num, value):
+    ws.write(row_num, col_num, value)
+
+
+def write_str(ws, row_num, col_num, value):
+    ws.write(row_num, col_num, str(value) if value is not None else None)
+
+
+def write_datetime(ws, row_num, col_num, value):
+    if value is not None and timezone.is_aware(value):
+        value = timezone.make_naive(value)
+    ws.write(row_num, col_num, value, DATETIME_STYLE)
+
+
+def write_date(ws, row_num, col_num, value):
+    ws.write(row_num, col_num, value, DATE_STYLE)
+
+
+def xls_writer_for(field):
+    """Returns the xls cell writer for a model field's values, chosen
+    once from the field type so cells are written without dispatching
+    on each value.
+    """
+    if isinstance(field, (ForeignKey, OneToOneField)):
+        return xls_writer_for(field.target_field)
+    if isinstance(field, UUIDField):
+        return write_str
+    if isinstance(field, DateTimeField):
+        return write_datetime
+    if isinstance(field, DateField):
+        return write_date
+    return write_value
+
+
+def m2m_extractor(name):
+    def extract(obj):
+        return ', '.join([o.name for o in getattr(obj, name).all()])
+    return extract
+
+
+def attr_extractor(name):
+    def extract(obj):
+        return getattr(obj, name, '')
+    return extract
+
+
+def empty_extractor(obj):
+    return ''
+
+
+class ExportSchema:
+    """The columns of a model's export worked out once per process: the
+    header, a value extractor per model column and an xls cell writer per
+    column, shared by the header and the row writers so they cannot
+    drift apart.
+    """
+
+    child_visit_identifier_columns = [
+        'subject_identifier', 'new_maternal_study_subject_identifier',
+        'old_study_maternal_identifier', 'previous_study', 'visit_code']
+
+    assent_identifier_columns = ['previous_study']
+
+    inline_exclude = ['_state', 'revision', 'hostname_modified',
+                      'hostname_created', 'user_modified', 'user_created',
+                      'device_created', 'device_modified']
+
+    def __init__(self, model):
+        self.model = model
+        self.plan = get_export_field_plan(model)
+        self.has_child_visit = self.plan.has_child_visit
+        assent_cls = django_apps.get_model('flourish_child.childassent')
+        self.is_assent_model = issubclass(model, assent_cls)
+
+        if self.has_child_visit:
+            self.identifier_columns = list(self.child_visit_identifier_columns)
+        elif self.is_assent_model:
+            self.identifier_columns = list(self.assent_identifier_columns)
+        else:
+            self.identifier_columns = []
+
+        self.field_columns = [field.name for field in self.plan.fields]
+        self.extractors = [self.extractor_for(field) for field in self.plan.fields]
+
+        inline_fields = []
+        if self.plan.inline_relation:
+            inline_fields = [
+                field for field in
+                self.plan.inline_relation.related_model._meta.concrete_fields
+                if field.attname not in self.inline_exclude]
+        self.inline_columns = [field.attname for field in inline_fields]
+        self.inline_getters = [
+            operator.attrgetter(name) for name in self.inline_columns]
+
+        self.xls_writers = (
+            [write_value for name in self.identifier_columns]
+            + [xls_writer_for(field) for field in self.plan.fields]
+            + [xls_writer_for(field) for field in inline_fields])
+
+    def extractor_for(self, field):
+        if isinstance(field, ManyToManyField):
+            return m2m_extractor(field.name)
+        if isinstance(field, (ForeignKey, OneToOneField)):
+            return operator.attrgetter(field.attname)
+        if isinstance(field, ManyToOneRel):
+            return empty_extractor
+        return attr_extractor(field.name)
+
+    @property
+    def field_names(self):
+        return self.identifier_columns + self.field_columns
+
+    @property
+    def header(self):
+        return self.field_names + self.inline_columns
+
+    def identifier_data(self, obj, identifier_map):
+        if self.has_child_visit:
+            subject_identifier = obj.child_visit.subject_identifier
+            identifiers = identifier_map.get(subject_identifier[:-3])
+            return [subject_identifier,
+                    subject_identifier[:-3],
+                    identifiers.study_maternal_identifier,
+                    identifiers.previous_study,
+                    obj.child_visit.visit_code]
+        if self.is_assent_model:
+            identifiers = identifier_map.get(obj.subject_identifier[:-3])
+            return [identifiers.previous_study]
+        return []
+
+    def row_data(self, obj, identifier_map):
+        """Returns the values for a single object and its inline objects,
+        if any, to be expanded into one row each.
+        """
+        data = self.identifier_data(obj, identifier_map)
+        data.extend([extract(obj) for extract in self.extractors])
+        inline_objs = []
+        if self.plan.inline_accessor:
+            inline_objs = list(getattr(obj, self.plan.inline_accessor).all())
+        return data, inline_objs
+
+    def rows(self, obj, identifier_map):
+        """Yields the exported rows for a single object.
+        """
+        data, inline_objs = self.row_data(obj, identifier_map)
+        if not inline_objs:
+            yield data
+        for inline_obj in inline_objs:
+            yield data + [get(inline_obj) for get in self.inline_getters]
+
+
+@lru_cache(maxsize=None)
+def get_export_schema(model):
+    return ExportSchema(model)
@@ -0,0 +1,77 @@
+import csv
+import datetime
+import tempfile
+import uuid
+
+from django.utils import timezone
+from openpyxl import Workbook
+
+
+class Echo:
+    """An object that implements just the write method of the file-like
+    interface, used by csv.writer to hand back each encoded row.
+    """
+
+    def write(self, value):
+        return value
+
+
+class CsvStreamWriter:
+    """Yields CSV encoded rows one at a time for a StreamingHttpResponse.
+    """
+
+    datetime_format = '%Y/%m/%d %H:%M:%S'
+    date_format = '%Y/%m/%d'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def format_value(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, datetime.datetime):
+            if timezone.is_aware(value):
+                value = timezone.make_naive(value)
+            return value.strftime(self.datetime_format)
+        if isinstance(value, datetime.date):
+            return value.strftime(self.date_format)
+        return value
+
+    def write_row(self, data):
+        return self.writer.writerow(
+            [self.format_value(value) for value in data])
+
+    def stream(self, rows):
+        for data in rows:
+            yield self.write_row(data)
+
+
+class XlsxStreamWriter:
+    """Writes rows to a write-only openpyxl workbook backed by a temporary
+    file, so only the row being written is held in memory.
+    """
+
+    def __init__(self, sheet_name='export'):
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet(title=sheet_name)
+
+    def format_value(self, value):
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+            return timezone.make_naive(value)
+        return value
+
+    def write(self, rows):
+        """Returns an open temporary file positioned at the start of the
+        saved workbook. The file is removed once closed.
+        """
+        for data in rows:
+            self.worksheet.append(
+                [self.format_value(value) for value in data])
+        export_file = tempfile.TemporaryFile()
+        self.workbook.save(export_file)
+        export_file.seek(0)
+        return export_file
@@ -0,0 +1,70 @@
+from django.apps import apps as django_apps
+from edc_base.utils import get_utcnow
+
+export_watermark_model = 'flourish_child.exportwatermark'
+
+
+class IncrementalExport:
+    """Selects the rows of a model created or changed since a consumer's
+    last export, and the rows deleted since then from the model's
+    simple_history table.
+
+    The upper bound is fixed when the export starts so rows saved while it
+    runs are picked up by the next one. Call `commit` once the export has
+    been written to move the watermark forward.
+    """
+
+    def __init__(self, model_cls, consumer, until=None):
+        self.model_cls = model_cls
+        self.consumer = consumer
+        self.until = until or get_utcnow()
+        self.model_label = model_cls._meta.label_lower
+
+    @property
+    def export_watermark_cls(self):
+        return django_apps.get_model(export_watermark_model)
+
+    @property
+    def watermark(self):
+        """Returns the last exported `modified` datetime or None if this
+        consumer has not exported the model before.
+        """
+        try:
+            export_watermark = self.export_watermark_cls.objects.get(
+                model_label=self.model_label, consumer=self.consumer)
+        except self.export_watermark_cls.DoesNotExist:
+            return None
+        return export_watermark.watermark
+
+    @property
+    def history_model_cls(self):
+        history = getattr(self.model_cls, 'history', None)
+        return getattr(history, 'model', None)
+
+    def changed(self):
+        queryset = self.model_cls.objects.filter(modified__lte=self.until)
+        watermark = self.watermark
+        if watermark:
+            queryset = queryset.filter(modified__gt=watermark)
+        return queryset
+
+    def deleted(self):
+        """Returns (id, history_date) pairs for rows deleted since the
+        watermark, or an empty list if the model has no history table.
+        """
+        history_model_cls = self.history_model_cls
+        watermark = self.watermark
+        if not history_model_cls or not watermark:
+            return []
+        return history_model_cls.objects.filter(
+            history_type='-',
+            history_date__gt=watermark,
+            history_date__lte=self.until).order_by(
+                'history_date').values_list('id', 'history_date')
+
+    def commit(self, row_count=0, deleted_count=0):
+        self.export_watermark_cls.objects.update_or_create(
+            model_label=self.model_label, consumer=self.consumer,
+            defaults=dict(watermark=self.until,
+                          row_count=row_count,
+                          deleted_count=deleted_count))
@@ -0,0 +1,80 @@
+import re
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+from django.db import connection
+
+QueryPlan = namedtuple('QueryPlan', ['name', 'plan', 'full_scan'])
+
+
+class QueryPlanCheck:
+    """Runs EXPLAIN on the lookups the child signals, model saves and
+    admin repeat most often and flags plans that scan a whole table.
+    """
+
+    # Patterns of a full table scan in EXPLAIN output, by database vendor.
+    full_scan_patterns = {
+        'postgresql': re.compile(r'Seq Scan'),
+        'mysql': re.compile(r'\bALL\b'),
+        'sqlite': re.compile(r'^.*\bSCAN\b(?!.*\bINDEX\b).*$', re.MULTILINE),
+    }
+
+    def __init__(self, subject_identifier=None):
+        self._subject_identifier = subject_identifier
+
+    @property
+    def subject_identifier(self):
+        """Returns a child subject identifier to fill the lookups with,
+        taken from the data when none was given.
+        """
+        if not self._subject_identifier:
+            child_consent_cls = django_apps.get_model(
+                'flourish_child.childdummysubjectconsent')
+            self._subject_identifier = child_consent_cls.objects.values_list(
+                'subject_identifier', flat=True).first() or 'B000-000000000-0-10'
+        return self._subject_identifier
+
+    def hot_queries(self):
+        """Returns (name, queryset) for each lookup to check.
+        """
+        subject_identifier = self.subject_identifier
+        app_config = django_apps.get_app_config('flourish_child')
+        model = app_config.get_model
+
+        queries = [
+            ('childdummysubjectconsent by subject, latest',
+             model('childdummysubjectconsent').objects.filter(
+                 subject_identifier=subject_identifier).order_by('-consent_datetime')),
+            ('childoffschedule by subject',
+             model('childoffschedule').objects.filter(
+                 subject_identifier=subject_identifier)),
+            ('appointment previous timepoint',
+             model('appointment').objects.filter(
+                 subject_identifier=subject_identifier, timepoint__lt=10,
+                 schedule_name__startswith='child_a',
+                 visit_code_sequence=0).order_by('timepoint')),
+            ('academicperformance by visit subject and code',
+             model('academicperformance').objects.filter(
+                 child_visit__subject_identifier=subject_identifier,
+                 child_visit__visit_code='2000')),
+            ('caregiveridentity by caregiver',
+             model('caregiveridentity').objects.filter(
+                 caregiver_subject_identifier=subject_identifier[:16])),
+        ]
+        for model_cls in app_config.get_models():
+            if model_cls._meta.model_name.startswith('onschedule'):
+                queries.append((
+                    f'{model_cls._meta.model_name} by subject',
+                    model_cls.objects.filter(subject_identifier=subject_identifier)))
+        return queries
+
+    def check(self):
+        """Returns a QueryPlan for each hot query.
+        """
+        pattern = self.full_scan_patterns.get(connection.vendor)
+        plans = []
+        for name, queryset in self.hot_queries():
+            plan = queryset.explain()
+            plans.append(QueryPlan(
+                name, plan, bool(pattern and pattern.search(plan))))
+        return plans
@@ -0,0 +1,161 @@
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Avg, Count, Max, Sum
+from django.dispatch import receiver
+from edc_base.utils import get_utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiverInstrumentation:
+    """Records the wall time, query count and exception of each call of
+    the child signal receivers when
+    `settings.FLOURISH_CHILD_INSTRUMENT_RECEIVERS` is True.
+
+    Timings are buffered in memory and written in bulk after the saving
+    transaction commits, when a request or django_q task finishes and
+    when the process exits, so management commands keep their timings.
+    Times and query counts include any receivers triggered by the
+    receiver's own saves.
+    """
+
+    flush_size = 100
+
+    summary_hours = 24
+
+    sample_size = 1000
+
+    receiver_timing_model = 'flourish_child.receivertiming'
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'FLOURISH_CHILD_INSTRUMENT_RECEIVERS', False)
+
+    def wrap(self, dispatch_uid, func):
+        """Returns the receiver timed under `dispatch_uid`.
+        """
+        @wraps(func)
+        def _timed(sender, *args, **kwargs):
+            if not self.enabled:
+                return func(sender, *args, **kwargs)
+            query_count = [0]
+
+            def count_queries(execute, sql, params, many, context):
+                query_count[0] += 1
+                return execute(sql, params, many, context)
+
+            exception = None
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(count_queries):
+                    return func(sender, *args, **kwargs)
+            except Exception as e:
+                exception = f'{e.__class__.__name__}: {e}'[:250]
+                raise
+            finally:
+                self.record(
+                    dispatch_uid, sender,
+                    (time.perf_counter() - start) * 1000,
+                    query_count[0], exception)
+        return _timed
+
+    def record(self, dispatch_uid, sender, duration, query_count, exception=None):
+        receiver_timing_cls = django_apps.get_model(self.receiver_timing_model)
+        with self._lock:
+            self._buffer.append(receiver_timing_cls(
+                dispatch_uid=dispatch_uid,
+                sender=getattr(getattr(sender, '_meta', None), 'label_lower', str(sender)),
+                duration=duration,
+                query_count=query_count,
+                exception=exception))
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            transaction.on_commit(self.flush)
+
+    def flush(self, **kwargs):
+        """Writes the buffered timings. Connected to `request_finished`,
+        django_q's `post_execute` and run at exit.
+        """
+        with self._lock:
+            timings, self._buffer = self._buffer, []
+        if not timings:
+            return
+        receiver_timing_cls = django_apps.get_model(self.receiver_timing_model)
+        try:
+            receiver_timing_cls.objects.bulk_create(timings)
+        except DatabaseError:
+            logger.exception(f'Failed to write {len(timings)} receiver timings.')
+
+    @staticmethod
+    def percentile(ordered, percent):
+        """Returns the nearest-rank percentile of an ordered list.
+        """
+        if not ordered:
+            return None
+        index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def summary(self, queryset, since=None):
+        """Returns call counts, error counts, mean and max wall time and
+        query counts per receiver for the timings recorded since `since`,
+        by default the last `summary_hours` hours, slowest p90 first.
+
+        Counts, means and maxima are aggregated in the database. The
+        percentiles are taken from each receiver's `sample_size` most
+        recent timings.
+        """
+        since = since or get_utcnow() - timedelta(hours=self.summary_hours)
+        queryset = queryset.filter(created__gte=since)
+
+        rows = []
+        for row in queryset.order_by().values('dispatch_uid').annotate(
+                calls=Count('id'),
+                errors=Count('exception'),
+                mean=Avg('duration'),
+                max=Max('duration'),
+                queries=Sum('query_count'),
+                queries_max=Max('query_count')):
+            sample = queryset.filter(dispatch_uid=row['dispatch_uid']).order_by(
+                '-created').values_list('duration', 'query_count')[:self.sample_size]
+            durations = sorted(duration for duration, _ in sample)
+            query_counts = sorted(query_count for _, query_count in sample)
+            row.update(
+                p50=self.percentile(durations, 50),
+                p90=self.percentile(durations, 90),
+                p99=self.percentile(durations, 99),
+                queries_mean=row['queries'] / row['calls'],
+                queries_p50=self.percentile(query_counts, 50))
+            rows.append(row)
+        return sorted(rows, key=lambda row: row['p90'], reverse=True)
+
+
+receiver_instrumentation = ReceiverInstrumentation()
+
+
+def instrumented_receiver(signal, **kwargs):
+    """Same as `django.dispatch.receiver`, timing the receiver under its
+    `dispatch_uid`.
+
+    The timed receiver is connected with `weak=False` and the undecorated
+    function is returned, so decorators can be stacked to connect one
+    function to several signals.
+    """
+    kwargs['weak'] = False
+
+    def _decorator(func):
+        timed = receiver_instrumentation.wrap(kwargs['dispatch_uid'], func)
+        receiver(signal, **kwargs)(timed)
+        return func
+    return _decorator
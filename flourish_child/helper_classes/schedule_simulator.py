@@ -0,0 +1,163 @@
+from collections import namedtuple
+
+from django.apps import apps as django_apps
+from edc_visit_schedule.site_visit_schedules import SiteVisitScheduleError
+
+from .cohort_schedule_table import cohort_schedule_table
+
+SubjectSnapshot = namedtuple(
+    'SubjectSnapshot',
+    ['subject_identifier', 'cohort', 'consent_datetime', 'prev_enrolled_datetime',
+     'deliveries', 'visits', 'has_child_birth'])
+SubjectSnapshot.__new__.__defaults__ = (None, (), None, False)
+
+Delivery = namedtuple(
+    'Delivery', ['delivery_datetime', 'created', 'live_infants_to_register'])
+
+Visit = namedtuple('Visit', ['visit_code', 'schedule_name', 'created'])
+
+Placement = namedtuple(
+    'Placement',
+    ['cohort', 'onschedule_model', 'schedule_name', 'base_appt_datetime',
+     'appointments', 'trigger'])
+
+Simulation = namedtuple('Simulation', ['subject_identifier', 'placements', 'errors'])
+
+
+class ScheduleSimulator:
+    """Works out, in memory, the schedules the child signals would put a
+    subject on and the appointment timepoints they would create.
+
+    Applies the rules of the consent, enrolment visit and birth
+    receivers to a `SubjectSnapshot`. Schedules are resolved from the
+    cohort schedule table and the visit schedule registry, so nothing is
+    read from or written to the database. Appointment datetimes are the
+    schedule timepoints, before any facility availability adjustment.
+
+    When a snapshot has no visits (`visits=None`), the enrolment visit is
+    assumed to be created at its appointment timepoint.
+    """
+
+    def simulate(self, snapshot):
+        placements, errors = [], []
+
+        def place(cohort, base_appt_datetime, trigger):
+            try:
+                onschedule_model, schedule = cohort_schedule_table.get(cohort)
+            except SiteVisitScheduleError as e:
+                errors.append(f'{trigger}: {e}')
+                return None
+            placement = Placement(
+                cohort, onschedule_model, schedule.name, base_appt_datetime,
+                self.appointments(schedule, base_appt_datetime), trigger)
+            placements.append(placement)
+            return placement
+
+        # child_consent_on_post_save / put_cohort_onschedule
+        if snapshot.prev_enrolled_datetime and snapshot.cohort:
+            place(cohort_schedule_table.enrolment_cohort(snapshot.cohort),
+                  snapshot.prev_enrolled_datetime, 'consent')
+        for delivery in snapshot.deliveries:
+            if delivery.delivery_datetime == snapshot.consent_datetime:
+                place(f'{snapshot.cohort}_birth', delivery.created, 'consent')
+
+        # child_visit_on_post_save
+        visits = snapshot.visits
+        if visits is None:
+            visits = [
+                Visit(visit_code, placement.schedule_name, appt_datetime)
+                for placement in list(placements)
+                for visit_code, appt_datetime in placement.appointments
+                if visit_code in cohort_schedule_table.enrolment_visit_codes]
+        for visit in visits:
+            if visit.visit_code in cohort_schedule_table.enrolment_visit_codes:
+                place(cohort_schedule_table.quarterly_cohort(visit.schedule_name),
+                      visit.created.replace(microsecond=0), f'visit {visit.visit_code}')
+
+        # child_birth_on_post_save
+        if snapshot.has_child_birth:
+            if len(snapshot.deliveries) > 1:
+                errors.append('birth: more than one maternal delivery.')
+            elif (snapshot.deliveries
+                    and snapshot.deliveries[0].live_infants_to_register == 1):
+                place('child_cohort_a_birth',
+                      snapshot.deliveries[0].created.replace(microsecond=0), 'birth')
+
+        return Simulation(snapshot.subject_identifier, placements, errors)
+
+    @staticmethod
+    def appointments(schedule, base_appt_datetime):
+        """Returns (visit_code, timepoint datetime) for each visit of the
+        schedule. Unlike `timepoint_dates`, leaves the visits unchanged.
+        """
+        if not base_appt_datetime:
+            return []
+        return [(visit.code, base_appt_datetime + visit.rbase)
+                for visit in schedule.visits.values()]
+
+
+class SubjectSnapshots:
+    """Reads the consent, caregiver and visit data the simulator needs
+    for many subjects in a fixed number of queries.
+    """
+
+    batch_size = 900
+
+    child_consent_model = 'flourish_child.childdummysubjectconsent'
+    child_visit_model = 'flourish_child.childvisit'
+    child_birth_model = 'flourish_child.childbirth'
+    caregiver_prev_enrolled_model = 'flourish_caregiver.caregiverpreviouslyenrolled'
+    maternal_delivery_model = 'flourish_caregiver.maternaldelivery'
+
+    def __init__(self, subject_identifiers=None, simulate_visits=False):
+        self.subject_identifiers = subject_identifiers
+        self.simulate_visits = simulate_visits
+
+    def _batches(self, values):
+        values = sorted(values)
+        for index in range(0, len(values), self.batch_size):
+            yield values[index:index + self.batch_size]
+
+    def _filter(self, model, lookup, values, *fields):
+        model_cls = django_apps.get_model(model)
+        for batch in self._batches(values):
+            yield from model_cls.objects.filter(
+                **{f'{lookup}__in': batch}).values_list(*fields)
+
+    def __iter__(self):
+        consent_cls = django_apps.get_model(self.child_consent_model)
+        consents = consent_cls.objects.order_by('consent_datetime')
+        if self.subject_identifiers is not None:
+            consents = consents.filter(subject_identifier__in=self.subject_identifiers)
+        latest = {}
+        for subject_identifier, cohort, consent_datetime in consents.values_list(
+                'subject_identifier', 'cohort', 'consent_datetime'):
+            latest[subject_identifier] = (cohort, consent_datetime)
+
+        caregivers = set(subject_identifier[:-3] for subject_identifier in latest)
+        prev_enrolled = dict(self._filter(
+            self.caregiver_prev_enrolled_model, 'subject_identifier', caregivers,
+            'subject_identifier', 'created'))
+        deliveries = {}
+        for caregiver, *delivery in self._filter(
+                self.maternal_delivery_model, 'subject_identifier', caregivers,
+                'subject_identifier', 'delivery_datetime', 'created',
+                'live_infants_to_register'):
+            deliveries.setdefault(caregiver, []).append(Delivery(*delivery))
+        births = set(subject_identifier for subject_identifier, in self._filter(
+            self.child_birth_model, 'subject_identifier', latest, 'subject_identifier'))
+        visits = {}
+        if not self.simulate_visits:
+            for subject_identifier, *visit in self._filter(
+                    self.child_visit_model, 'subject_identifier', latest,
+                    'subject_identifier', 'visit_code', 'schedule_name', 'created'):
+                visits.setdefault(subject_identifier, []).append(Visit(*visit))
+
+        for subject_identifier, (cohort, consent_datetime) in sorted(latest.items()):
+            caregiver = subject_identifier[:-3]
+            yield SubjectSnapshot(
+                subject_identifier, cohort, consent_datetime,
+                prev_enrolled.get(caregiver),
+                deliveries.get(caregiver, []),
+                None if self.simulate_visits else visits.get(subject_identifier, []),
+                subject_identifier in births)
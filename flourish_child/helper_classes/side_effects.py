@@ -0,0 +1,361 @@
+import json
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from django_q.tasks import async_task
+
+from .receiver_instrumentation import receiver_instrumentation
+
+logger = logging.getLogger(__name__)
+
+IMMEDIATE = 'immediate'
+ON_COMMIT = 'on_commit'
+DJANGO_Q = 'django_q'
+
+side_effect_failure_model = 'flourish_child.sideeffectfailure'
+
+
+class SideEffectQueue:
+    """Runs the work of post_save receivers either inline, after the
+    saving transaction commits, or on the django_q cluster.
+
+    The mode is read from `settings.FLOURISH_CHILD_SIDE_EFFECTS`, e.g.
+    {'mode': 'on_commit', 'retries': 3}. The default mode, 'immediate',
+    runs the receiver inline as before.
+
+    Deferred work is keyed on the receiver's dispatch_uid, the subject
+    identifier and the instance pk. Saving the same instance several
+    times in one transaction runs the receiver once, with `created` set
+    if any of the saves created it. The queued call is held by the
+    transaction's on_commit callbacks and only weakly by the queue's own
+    lookup, so nothing runs, and nothing is kept, if the transaction rolls
+    back. Each attempt runs in its own atomic block, so a failed attempt
+    leaves no partial enrollment behind. Failed attempts are retried
+    straight away, or as new tasks on the django_q cluster, never by
+    sleeping in the committing request. A call that still fails after
+    its retries is recorded as a SideEffectFailure to be replayed.
+    """
+
+    default_retries = 3
+
+    def __init__(self):
+        self.receivers = {}
+        self.reconcilers = {}
+        self._local = threading.local()
+
+    @property
+    def options(self):
+        return getattr(settings, 'FLOURISH_CHILD_SIDE_EFFECTS', {})
+
+    @property
+    def mode(self):
+        return getattr(self._local, 'mode', None) or self.options.get('mode', IMMEDIATE)
+
+    @property
+    def retries(self):
+        return self.options.get('retries', self.default_retries)
+
+    @staticmethod
+    def key(dispatch_uid, instance):
+        subject_identifier = getattr(instance, 'subject_identifier', None)
+        return f'{dispatch_uid}:{subject_identifier}:{instance.pk}'
+
+    def register(self, dispatch_uid, func, reconcile=None):
+        self.receivers[dispatch_uid] = func
+        if reconcile:
+            self.reconcilers[dispatch_uid] = reconcile
+
+    @contextmanager
+    def suppressed(self):
+        """Skips the queued receivers inside the block, e.g. for data
+        fixes that must not touch schedules or action items.
+        """
+        suppressing = getattr(self._local, 'suppressing', False)
+        self._local.suppressing = True
+        try:
+            yield
+        finally:
+            self._local.suppressing = suppressing
+
+    @contextmanager
+    def immediate(self):
+        """Runs the queued receivers inline inside the block, whatever the
+        configured mode, e.g. to build data in a transaction that is
+        rolled back.
+        """
+        mode = getattr(self._local, 'mode', None)
+        self._local.mode = IMMEDIATE
+        try:
+            yield
+        finally:
+            self._local.mode = mode
+
+    @contextmanager
+    def bulk_load(self):
+        """Collects the receiver calls made inside the block, e.g. by
+        `loaddata` or a sync import, and runs them once the block exits.
+
+        Raw saves of receivers registered with a `reconcile` function are
+        handed to that function in one call, as {model_cls: [pk, ...]}.
+        Other calls are replayed once per instance, with `created` set if
+        any save of the instance created it.
+
+        Yields a list that is filled with (key, exception) for each call
+        that still failed after its retries. A failed call does not stop
+        the others.
+        """
+        failures = []
+        if getattr(self._local, 'loaded', None) is not None:
+            yield failures
+            return
+        self._local.loaded = {}
+        try:
+            yield failures
+            loaded = self._local.loaded
+        finally:
+            self._local.loaded = None
+        failures.extend(self.reconcile(loaded))
+
+    def reconcile(self, loaded):
+        """Runs the collected calls and returns (key, exception) for
+        each one that failed.
+        """
+        failures = []
+        reconciled = {}
+        for key, (dispatch_uid, sender, instance, kwargs) in loaded.items():
+            reconcile = self.reconcilers.get(dispatch_uid)
+            if reconcile and kwargs.get('raw'):
+                reconciled.setdefault(reconcile, {}).setdefault(
+                    sender, set()).add(instance.pk)
+                continue
+            try:
+                self.run(dispatch_uid, sender, instance, **kwargs)
+            except Exception as e:
+                failures.append((self.key(dispatch_uid, instance), e))
+        for reconcile, pks in reconciled.items():
+            try:
+                with transaction.atomic():
+                    reconcile(pks)
+            except Exception as e:
+                logger.exception(f'Reconciling {reconcile.__name__} failed.')
+                failures.append((reconcile.__name__, e))
+        return failures
+
+    def enqueue(self, dispatch_uid, sender, instance, **kwargs):
+        """Runs or queues the receiver registered for `dispatch_uid`.
+        """
+        kwargs.pop('signal', None)
+        if getattr(self._local, 'suppressing', False):
+            return None
+        loaded = getattr(self._local, 'loaded', None)
+        if loaded is not None:
+            key = (dispatch_uid, sender._meta.label_lower, instance.pk)
+            if key in loaded:
+                kwargs = merge_signal_kwargs(loaded[key][3], kwargs)
+            loaded[key] = (dispatch_uid, sender, instance, kwargs)
+            return None
+
+        func = self.receivers[dispatch_uid]
+        if self.mode == IMMEDIATE:
+            return func(sender, instance, **kwargs)
+
+        key = self.key(dispatch_uid, instance)
+        queued = self.queued(key)
+        if queued:
+            queued.merge(instance, kwargs)
+        else:
+            queued = QueuedSideEffect(
+                self, key, dispatch_uid, sender, instance, kwargs)
+            self._queued[key] = queued
+            transaction.on_commit(queued)
+        return None
+
+    @property
+    def _queued(self):
+        """Returns this thread's queued calls by key. The values are weak
+        references, dropped when a commit runs the call or a rollback
+        discards it.
+        """
+        if getattr(self._local, 'queued', None) is None:
+            self._local.queued = weakref.WeakValueDictionary()
+        return self._local.queued
+
+    def queued(self, key):
+        """Returns the call queued for `key` in the current transaction,
+        if any.
+        """
+        queued = self._queued.get(key)
+        if queued is None or queued.dispatched:
+            return None
+        return queued
+
+    def dispatch(self, queued):
+        if self.mode == DJANGO_Q:
+            async_task(
+                'flourish_child.helper_classes.side_effects.run_side_effect',
+                queued.dispatch_uid, queued.instance._meta.label_lower,
+                queued.instance.pk, queued.kwargs, task_name=queued.key)
+        else:
+            try:
+                self.run(queued.dispatch_uid, queued.sender, queued.instance,
+                         **queued.kwargs)
+            except Exception as e:
+                self.record_failure(
+                    queued.dispatch_uid, queued.instance, queued.kwargs, e)
+
+    def run(self, dispatch_uid, sender, instance, attempts=None, **kwargs):
+        """Runs the receiver, retrying failed attempts straight away.
+        """
+        func = self.receivers[dispatch_uid]
+        key = self.key(dispatch_uid, instance)
+        attempts = self.retries if attempts is None else attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    return func(sender, instance, **kwargs)
+            except Exception:
+                if attempt < attempts:
+                    logger.warning(
+                        f'Side effect {key} failed on attempt {attempt}, retrying.')
+                    continue
+                logger.exception(
+                    f'Side effect {key} failed after {attempt} attempts.')
+                raise
+
+    def record_failure(self, dispatch_uid, instance, kwargs, exception):
+        """Keeps a call that failed after its retries so that it can be
+        replayed, see `replay`.
+        """
+        failure_cls = django_apps.get_model(side_effect_failure_model)
+        try:
+            failure_cls.objects.create(
+                dispatch_uid=dispatch_uid,
+                model_label=instance._meta.label_lower,
+                object_id=str(instance.pk),
+                subject_identifier=getattr(instance, 'subject_identifier', None),
+                signal_kwargs=dump_signal_kwargs(kwargs),
+                exception=f'{exception.__class__.__name__}: {exception}'[:250])
+        except Exception:
+            logger.exception(
+                f'Recording side effect {self.key(dispatch_uid, instance)} '
+                'failure failed.')
+
+    def replay(self, failure):
+        """Runs a recorded failure again and deletes it once it succeeds.
+        """
+        model_cls = django_apps.get_model(failure.model_label)
+        instance = model_cls.objects.get(pk=failure.object_id)
+        self.run(failure.dispatch_uid, model_cls, instance,
+                 **load_signal_kwargs(failure.signal_kwargs))
+        failure.delete()
+
+
+def merge_signal_kwargs(kwargs, later):
+    """Returns the post_save kwargs of two saves of one instance: those
+    of the later save, with `created` set if either save created it and
+    the update fields of both.
+    """
+    merged = dict(later)
+    merged['created'] = bool(kwargs.get('created') or later.get('created'))
+    update_fields = kwargs.get('update_fields')
+    later_update_fields = later.get('update_fields')
+    if update_fields is None or later_update_fields is None:
+        merged['update_fields'] = None
+    else:
+        merged['update_fields'] = frozenset(update_fields) | frozenset(
+            later_update_fields)
+    return merged
+
+
+def dump_signal_kwargs(kwargs):
+    """Returns the post_save kwargs as JSON, e.g. to record a failure.
+    """
+    kwargs = dict(kwargs)
+    if kwargs.get('update_fields') is not None:
+        kwargs['update_fields'] = sorted(kwargs['update_fields'])
+    return json.dumps(kwargs)
+
+
+def load_signal_kwargs(value):
+    kwargs = json.loads(value)
+    if kwargs.get('update_fields') is not None:
+        kwargs['update_fields'] = frozenset(kwargs['update_fields'])
+    return kwargs
+
+
+class QueuedSideEffect:
+    """A receiver call waiting for its transaction to commit, registered
+    as the transaction's on_commit callback.
+    """
+
+    def __init__(self, queue, key, dispatch_uid, sender, instance, kwargs):
+        self.queue = queue
+        self.key = key
+        self.dispatch_uid = dispatch_uid
+        self.sender = sender
+        self.instance = instance
+        self.kwargs = kwargs
+        self.dispatched = False
+
+    def merge(self, instance, kwargs):
+        self.instance = instance
+        self.kwargs = merge_signal_kwargs(self.kwargs, kwargs)
+
+    def __call__(self):
+        # saves made by the receiver itself are queued afresh
+        self.dispatched = True
+        self.queue.dispatch(self)
+
+
+side_effects = SideEffectQueue()
+
+
+def run_side_effect(dispatch_uid, model_label, pk, kwargs, attempt=1):
+    """Runs a queued receiver on a django_q worker against the committed
+    instance. A failed attempt is queued again as a new task until the
+    configured number of retries is used up.
+    """
+    model_cls = django_apps.get_model(model_label)
+    instance = model_cls.objects.get(pk=pk)
+    last_attempt = attempt >= side_effects.retries
+    try:
+        side_effects.run(dispatch_uid, model_cls, instance, attempts=1, **kwargs)
+    except Exception:
+        if last_attempt:
+            raise
+        async_task(
+            'flourish_child.helper_classes.side_effects.run_side_effect',
+            dispatch_uid, model_label, pk, kwargs, attempt + 1,
+            task_name=f'{side_effects.key(dispatch_uid, instance)}:{attempt + 1}')
+
+
+def deferred_receiver(signal, **kwargs):
+    """Same as `django.dispatch.receiver` but routes the call through
+    the side effect queue. Requires a `dispatch_uid`.
+
+    `reconcile` is an optional function that applies the effects of many
+    raw saves at once, see `SideEffectQueue.bulk_load`.
+    """
+    dispatch_uid = kwargs['dispatch_uid']
+    reconcile = kwargs.pop('reconcile', None)
+
+    def _decorator(func):
+        side_effects.register(
+            dispatch_uid, receiver_instrumentation.wrap(dispatch_uid, func),
+            reconcile=reconcile)
+
+        @wraps(func)
+        def _enqueue(sender, instance, **signal_kwargs):
+            return side_effects.enqueue(
+                dispatch_uid, sender, instance, **signal_kwargs)
+
+        receiver(signal, **kwargs)(_enqueue)
+        return _enqueue
+    return _decorator
@@ -0,0 +1,87 @@
+from django.apps import apps as django_apps
+from django.db.models import ManyToManyField
+
+child_visit_model = 'flourish_child.childvisit'
+
+
+class WideExport:
+    """Builds one row per ChildVisit with selected fields of every attached
+    CRF as columns prefixed with the CRF's model name.
+
+    Each CRF model is read once with `values()` and kept in a dictionary
+    keyed on child_visit_id, so joining the CRFs to the visits is a hash
+    join in memory rather than a lookup per visit.
+    """
+
+    visit_fields = ['subject_identifier', 'visit_code', 'visit_code_sequence',
+                    'schedule_name', 'report_datetime']
+
+    def __init__(self, crf_fields=None, visit_queryset=None):
+        """`crf_fields` maps a CRF model label to the field names to export.
+        All CRF models and their data fields are used if it is not given.
+        """
+        self.visit_queryset = visit_queryset
+        if self.visit_queryset is None:
+            self.visit_queryset = django_apps.get_model(
+                child_visit_model).objects.all()
+        self.crf_fields = crf_fields or {
+            model._meta.label_lower: self.data_field_names(model)
+            for model in self.crf_models()}
+
+    @staticmethod
+    def crf_models():
+        from ..models.child_crf_model_mixin import ChildCrfModelMixin
+        return [model for model in django_apps.get_app_config(
+                'flourish_child').get_models()
+                if issubclass(model, ChildCrfModelMixin)]
+
+    @staticmethod
+    def data_field_names(model):
+        """Returns the concrete fields a CRF adds to ChildCrfModelMixin.
+        """
+        from ..models.child_crf_model_mixin import ChildCrfModelMixin
+        base_field_names = [
+            field.name for field in ChildCrfModelMixin._meta.fields]
+        return [field.name for field in model._meta.concrete_fields
+                if field.name not in base_field_names
+                and not isinstance(field, ManyToManyField)]
+
+    def column_name(self, model_label, field_name):
+        return '%s__%s' % (model_label.split('.')[1], field_name)
+
+    @property
+    def header(self):
+        header = list(self.visit_fields)
+        for model_label, field_names in self.crf_fields.items():
+            header.extend(
+                self.column_name(model_label, field_name)
+                for field_name in field_names)
+        return header
+
+    def crf_values(self, model_label, field_names):
+        """Returns a dictionary of child_visit_id to the CRF's values for
+        every CRF attached to the selected visits.
+        """
+        model_cls = django_apps.get_model(model_label)
+        crf_rows = model_cls.objects.filter(
+            child_visit__in=self.visit_queryset.values('id')).values_list(
+                'child_visit_id', *field_names)
+        return {crf_row[0]: crf_row[1:] for crf_row in crf_rows.iterator()}
+
+    def rows(self):
+        """Yields the header followed by one row per visit.
+        """
+        yield self.header
+
+        joined = [
+            (self.crf_values(model_label, field_names), [None] * len(field_names))
+            for model_label, field_names in self.crf_fields.items()]
+
+        visits = self.visit_queryset.order_by(
+            'subject_identifier', 'report_datetime').values_list(
+                'id', *self.visit_fields)
+        for visit in visits.iterator():
+            row = list(visit[1:])
+            for crf_values, empty in joined:
+                row.extend(crf_values.get(visit[0], empty))
+            yield row
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import caregiver_identity_index
+
+
+class Command(BaseCommand):
+
+    help = ('Build or refresh the caregiver identity table from the caregiver '
+            'screening and consent version forms.')
+
+    def handle(self, *args, **options):
+        created, updated = caregiver_identity_index.backfill()
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} caregiver identities created, {updated} updated.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import child_identifier_allocator
+
+
+class Command(BaseCommand):
+
+    help = ('Set each caregiver\'s child identifier counter to the highest '
+            'child identifier already in use.')
+
+    def handle(self, *args, **options):
+        created, updated = child_identifier_allocator.backfill()
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} child identifier sequences created, {updated} updated.'))
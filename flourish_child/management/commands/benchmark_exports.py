@@ -0,0 +1,79 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from edc_base.utils import get_utcnow
+import pkg_resources
+
+from ...helper_classes.export_benchmark import ExportBenchmark, SyntheticCohort
+
+
+class RollbackCohort(Exception):
+    pass
+
+
+class Command(BaseCommand):
+
+    help = ('Generate a synthetic cohort and time each export mode on it. '
+            'Run against a disposable database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cohort-size', type=int, default=10,
+            help='Number of children to enrol.')
+        parser.add_argument(
+            '--visits', type=int, default=3,
+            help='Number of visits, with CRFs, per child.')
+        parser.add_argument(
+            '--mode', action='append', default=[], dest='modes',
+            choices=ExportBenchmark.modes,
+            help='Export mode to time. Repeat for more; all modes by default.')
+        parser.add_argument(
+            '--output', default='export_benchmarks.json',
+            help='JSON file the run is appended to.')
+        parser.add_argument(
+            '--keep', action='store_true', default=False,
+            help='Keep the synthetic cohort instead of rolling it back.')
+
+    def handle(self, *args, **options):
+        cohort = SyntheticCohort(
+            size=options.get('cohort_size'), visits_per_child=options.get('visits'))
+        run = dict(
+            version=self.version,
+            datetime=get_utcnow().isoformat(),
+            cohort_size=cohort.size,
+            visits_per_child=cohort.visits_per_child)
+
+        try:
+            with transaction.atomic():
+                cohort.create()
+                run['results'] = ExportBenchmark(
+                    cohort.crf_models, modes=options.get('modes')).run()
+                if not options.get('keep'):
+                    raise RollbackCohort()
+        except RollbackCohort:
+            pass
+
+        for result in run['results']:
+            self.stdout.write(
+                '{model} {mode}: {rows} rows, {rows_per_second} rows/s, '
+                '{queries} queries, peak allocated {peak_alloc_kb} KB, '
+                'max RSS {max_rss_kb} KB'.format(**result))
+
+        history = []
+        if os.path.exists(options.get('output')):
+            with open(options.get('output')) as f:
+                history = json.load(f)
+        history.append(run)
+        with open(options.get('output'), 'w') as f:
+            json.dump(history, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Results appended to {options.get("output")}'))
+
+    @property
+    def version(self):
+        try:
+            return pkg_resources.get_distribution('flourish-child').version
+        except pkg_resources.DistributionNotFound:
+            return None
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes.query_plan_check import QueryPlanCheck
+
+
+class Command(BaseCommand):
+
+    help = ('Run EXPLAIN on the hot flourish_child lookups and flag any that '
+            'scan a whole table.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--subject-identifier',
+            help='Child subject identifier to fill the lookups with.')
+        parser.add_argument(
+            '--fail', action='store_true', default=False,
+            help='Exit with an error if any lookup scans a whole table.')
+
+    def handle(self, *args, **options):
+        plans = QueryPlanCheck(options.get('subject_identifier')).check()
+        full_scans = [plan for plan in plans if plan.full_scan]
+
+        for plan in plans:
+            if plan.full_scan:
+                self.stdout.write(self.style.WARNING(f'FULL SCAN  {plan.name}'))
+            else:
+                self.stdout.write(f'ok         {plan.name}')
+            if plan.full_scan or options.get('verbosity') > 1:
+                for line in plan.plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        if full_scans and options.get('fail'):
+            raise CommandError(f'{len(full_scans)} lookups scan a whole table.')
+        self.stdout.write(
+            f'{len(plans)} lookups checked, {len(full_scans)} full scans.')
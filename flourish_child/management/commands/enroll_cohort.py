@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from edc_visit_schedule.site_visit_schedules import SiteVisitScheduleError
+
+from ...helper_classes import BulkEnrollment
+
+
+class Command(BaseCommand):
+
+    help = ('Put many consented children on a cohort\'s schedules, creating '
+            'onschedule rows, appointments and metadata in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Child subject identifiers to enroll.')
+        parser.add_argument(
+            '--cohort', required=True,
+            help='Cohort to enroll into, e.g. cohort_a or cohort_b_sec.')
+        parser.add_argument(
+            '--file',
+            help='File with one child subject identifier per line.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of subjects enrolled per transaction.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Report the schedules subjects would be put on without '
+                 'writing anything.')
+
+    def handle(self, *args, **options):
+        subject_identifiers = list(options.get('subject_identifiers'))
+        if options.get('file'):
+            with open(options.get('file')) as f:
+                subject_identifiers.extend(line.strip() for line in f if line.strip())
+        if not subject_identifiers:
+            raise CommandError('No subject identifiers given.')
+
+        bulk_enrollment = BulkEnrollment(
+            options.get('cohort'), subject_identifiers,
+            batch_size=options.get('batch_size'))
+
+        try:
+            schedule_names = bulk_enrollment.schedule_names()
+        except SiteVisitScheduleError as e:
+            raise CommandError(e)
+
+        for cohort, schedule_name in schedule_names.items():
+            count = len([enrollment for enrollment in bulk_enrollment.enrollments
+                         if enrollment.cohort == cohort])
+            self.stdout.write(f'{cohort} ({schedule_name}): {count} subjects')
+        if bulk_enrollment.skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{len(bulk_enrollment.skipped)} subjects have no consent, '
+                f'previous enrollment or delivery to enroll from: '
+                f'{", ".join(bulk_enrollment.skipped)}'))
+
+        if options.get('dry_run'):
+            return
+
+        enrolled = bulk_enrollment.run()
+        for subject_identifier, error in bulk_enrollment.failed.items():
+            self.stderr.write(f'{subject_identifier}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{enrolled} subjects enrolled in {bulk_enrollment.elapsed:.1f}s '
+            f'({bulk_enrollment.throughput:.1f} subjects/s), '
+            f'{len(bulk_enrollment.failed)} failed.'))
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes import ExportArchive
+
+
+class Command(BaseCommand):
+
+    help = ('Export flourish_child models concurrently, one process per '
+            'model, into a zip archive with a manifest.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Path of the zip archive to write.')
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels to export; all flourish_child models by default.')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Number of worker processes, defaults to the number of cores.')
+
+    def handle(self, *args, **options):
+        model_labels = options.get('models') or [
+            model._meta.label_lower
+            for model in django_apps.get_app_config('flourish_child').get_models()]
+        for model_label in model_labels:
+            try:
+                django_apps.get_model(model_label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+
+        start = time.perf_counter()
+        manifest = ExportArchive(
+            model_labels, processes=options.get('processes')).write(
+                options.get('output'))
+        for entry in manifest['models']:
+            self.stdout.write(f'{entry["model"]}: {entry["rows"]} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(manifest["models"])} models written to {options.get("output")} '
+            f'in {time.perf_counter() - start:.1f}s'))
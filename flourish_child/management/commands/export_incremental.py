@@ -0,0 +1,76 @@
+import csv
+import os
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...admin.exportaction_mixin import ModelExporter
+from ...helper_classes import IncrementalExport
+from ...helper_classes.export_jobs import write_csv
+
+
+class Command(BaseCommand):
+
+    help = ('Export rows created, changed or deleted since the consumer\'s '
+            'last export of each model.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+',
+            help='Model labels to export, e.g. flourish_child.childvisit.')
+        parser.add_argument(
+            '--consumer', required=True,
+            help='Name the watermarks are kept under.')
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='Directory the delta files are written to.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Report the delta sizes without writing or moving watermarks.')
+
+    def handle(self, *args, **options):
+        output_dir = options.get('output_dir')
+        consumer = options.get('consumer')
+        dry_run = options.get('dry_run')
+        os.makedirs(output_dir, exist_ok=True)
+
+        for model_label in options.get('models'):
+            try:
+                model_cls = django_apps.get_model(model_label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+
+            incremental_export = IncrementalExport(model_cls, consumer)
+            changed = incremental_export.changed()
+            deleted = list(incremental_export.deleted())
+
+            if dry_run:
+                self.stdout.write(
+                    f'{model_label}: {changed.count()} changed, '
+                    f'{len(deleted)} deleted since '
+                    f'{incremental_export.watermark or "the first export"}')
+                continue
+
+            model_exporter = ModelExporter(model_cls)
+            filename = '%s-%s' % (
+                model_exporter.get_export_filename(),
+                incremental_export.until.strftime('%H%M%S'))
+
+            with open(os.path.join(output_dir, f'{filename}-changes.csv'), 'wb') as f:
+                row_count = write_csv(model_exporter.export_rows(changed), f)
+
+            with open(os.path.join(output_dir, f'{filename}-deletions.csv'), 'w',
+                      newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['id', 'deleted_datetime'])
+                for pk, history_date in deleted:
+                    writer.writerow(
+                        [str(pk), timezone.make_naive(history_date).strftime(
+                            '%Y/%m/%d %H:%M:%S')])
+
+            incremental_export.commit(
+                row_count=row_count, deleted_count=len(deleted))
+            self.stdout.write(self.style.SUCCESS(
+                f'{model_label}: {row_count} changed and {len(deleted)} deleted '
+                f'rows exported up to {incremental_export.until}'))
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...admin.exportaction_mixin import ModelExporter
+from ...helper_classes.columnar_export import ColumnarExporter
+from ...models.child_crf_model_mixin import ChildCrfModelMixin
+
+
+class Command(BaseCommand):
+
+    help = 'Export flourish_child CRFs to Parquet files with typed columns.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help='Model labels to export, e.g. flourish_child.childvisit.')
+        parser.add_argument(
+            '--all-crfs', action='store_true', default=False,
+            help='Export every flourish_child CRF.')
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='Directory the Parquet files are written to.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=ModelExporter.export_chunk_size,
+            help='Number of rows read and written per chunk.')
+
+    def handle(self, *args, **options):
+        model_labels = options.get('models')
+        if options.get('all_crfs'):
+            model_labels = [
+                model._meta.label_lower
+                for model in django_apps.get_app_config('flourish_child').get_models()
+                if issubclass(model, ChildCrfModelMixin)]
+        if not model_labels:
+            raise CommandError('Specify at least one model or --all-crfs.')
+
+        output_dir = options.get('output_dir')
+        os.makedirs(output_dir, exist_ok=True)
+
+        for model_label in model_labels:
+            try:
+                model_cls = django_apps.get_model(model_label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+            model_exporter = ModelExporter(model_cls)
+            model_exporter.export_chunk_size = options.get('chunk_size')
+            path = os.path.join(
+                output_dir, f'{model_exporter.get_export_filename()}.parquet')
+            start = time.perf_counter()
+            row_count = ColumnarExporter(model_exporter).write(
+                model_cls.objects.all(), path)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model_label}: {row_count} rows written to {path} in '
+                f'{time.perf_counter() - start:.1f}s'))
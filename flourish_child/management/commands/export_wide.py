@@ -0,0 +1,57 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes import WideExport
+from ...helper_classes.export_jobs import write_csv
+
+
+class Command(BaseCommand):
+
+    help = ('Export one row per child visit with the fields of every '
+            'attached CRF as prefixed columns.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Path of the CSV file to write.')
+        parser.add_argument(
+            '--crf', action='append', default=[], dest='crfs',
+            help=('CRF to include, optionally with fields, e.g. '
+                  'flourish_child.childclinicalmeasurements:child_weight_kg,'
+                  'child_height. Repeat for more CRFs; all CRFs by default.'))
+        parser.add_argument(
+            '--subject-identifier', action='append', default=[],
+            dest='subject_identifiers',
+            help='Limit to these subjects. Repeat for more.')
+        parser.add_argument(
+            '--visit-code', action='append', default=[], dest='visit_codes',
+            help='Limit to these visit codes. Repeat for more.')
+
+    def handle(self, *args, **options):
+        crf_fields = {}
+        for crf in options.get('crfs'):
+            model_label, _, field_names = crf.partition(':')
+            try:
+                model_cls = django_apps.get_model(model_label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+            crf_fields[model_cls._meta.label_lower] = (
+                field_names.split(',') if field_names
+                else WideExport.data_field_names(model_cls))
+
+        visit_queryset = django_apps.get_model(
+            'flourish_child.childvisit').objects.all()
+        if options.get('subject_identifiers'):
+            visit_queryset = visit_queryset.filter(
+                subject_identifier__in=options.get('subject_identifiers'))
+        if options.get('visit_codes'):
+            visit_queryset = visit_queryset.filter(
+                visit_code__in=options.get('visit_codes'))
+
+        wide_export = WideExport(
+            crf_fields=crf_fields, visit_queryset=visit_queryset)
+        with open(options.get('output'), 'wb') as f:
+            row_count = write_csv(wide_export.rows(), f)
+        self.stdout.write(self.style.SUCCESS(
+            f'{row_count} visits with {len(wide_export.crf_fields)} CRFs '
+            f'written to {options.get("output")}'))
@@ -0,0 +1,32 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes import side_effects
+
+
+class Command(BaseCommand):
+
+    help = ('Load fixtures with the child post_save receivers collected and '
+            'run once, in bulk, after the load.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixture_labels', nargs='+',
+            help='Fixture labels passed on to loaddata.')
+        parser.add_argument(
+            '--database', default='default',
+            help='Database to load the fixtures into.')
+
+    def handle(self, *args, **options):
+        with side_effects.bulk_load() as failures:
+            call_command(
+                'loaddata', *options.get('fixture_labels'),
+                database=options.get('database'),
+                verbosity=options.get('verbosity'))
+        for key, exception in failures:
+            self.stderr.write(f'{key}: {exception.__class__.__name__}: {exception}')
+        if failures:
+            raise CommandError(
+                f'Fixtures loaded but {len(failures)} child side effects failed.')
+        self.stdout.write(self.style.SUCCESS(
+            'Fixtures loaded and child side effects reconciled.'))
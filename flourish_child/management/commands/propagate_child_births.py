@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import caregiver_consent_propagation
+from ...models import ChildBirth
+
+
+class Command(BaseCommand):
+
+    help = ('Copy child birth names, gender and date of birth to the '
+            'caregiver child consents, updating only changed fields.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Child subject identifiers to update. Defaults to all births.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Report the number of consents that differ without updating them.')
+
+    def handle(self, *args, **options):
+        child_births = ChildBirth.objects.all()
+        if options.get('subject_identifiers'):
+            child_births = child_births.filter(
+                subject_identifier__in=options.get('subject_identifiers'))
+        dry_run = options.get('dry_run')
+        count = caregiver_consent_propagation.propagate_births(
+            child_births, dry_run=dry_run)
+        if dry_run:
+            self.stdout.write(f'{count} caregiver child consents differ.')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{count} caregiver child consents updated.'))
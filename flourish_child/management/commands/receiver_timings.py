@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from edc_base.utils import get_utcnow
+
+from ...helper_classes import receiver_instrumentation
+from ...models import ReceiverTiming
+
+
+class Command(BaseCommand):
+
+    help = ('Show wall time and query count percentiles per child signal '
+            'receiver from the recorded receiver timings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=receiver_instrumentation.summary_hours,
+            help='Only include timings recorded in the last HOURS hours.')
+        parser.add_argument(
+            '--receiver',
+            help='Only include timings of this dispatch_uid.')
+        parser.add_argument(
+            '--clear', action='store_true', default=False,
+            help='Delete the selected timings after reporting them.')
+
+    def handle(self, *args, **options):
+        since = get_utcnow() - timedelta(hours=options.get('hours'))
+        queryset = ReceiverTiming.objects.filter(created__gte=since)
+        if options.get('receiver'):
+            queryset = queryset.filter(dispatch_uid=options.get('receiver'))
+
+        summary = receiver_instrumentation.summary(queryset, since=since)
+        if not summary:
+            self.stdout.write('No receiver timings recorded.')
+        else:
+            self.stdout.write(
+                f'{"receiver":<40} {"calls":>7} {"errors":>6} {"mean ms":>9} '
+                f'{"p50 ms":>9} {"p90 ms":>9} {"p99 ms":>9} {"max ms":>9} '
+                f'{"q mean":>6} {"q p50":>6} {"q max":>6}')
+            for row in summary:
+                self.stdout.write(
+                    f'{row["dispatch_uid"]:<40} {row["calls"]:>7} {row["errors"]:>6} '
+                    f'{row["mean"]:>9.1f} {row["p50"]:>9.1f} {row["p90"]:>9.1f} '
+                    f'{row["p99"]:>9.1f} {row["max"]:>9.1f} {row["queries_mean"]:>6.1f} '
+                    f'{row["queries_p50"]:>6} {row["queries_max"]:>6}')
+
+        if options.get('clear'):
+            deleted, _ = queryset.delete()
+            self.stdout.write(self.style.SUCCESS(f'{deleted} timings deleted.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import ActionItemReconciliation
+
+
+class Command(BaseCommand):
+
+    help = ('Create, re-open and, with --delete, delete child death report '
+            'and off study action items to match the visit, test and '
+            'consent data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Child subject identifiers to reconcile. Defaults to all.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Report the changes without applying them.')
+        parser.add_argument(
+            '--delete', action='store_true', default=False,
+            help=('Also delete NEW or OPEN action items that are no longer '
+                  'triggered. Items opened by hand are deleted too.'))
+
+    def handle(self, *args, **options):
+        reconciliation = ActionItemReconciliation(
+            options.get('subject_identifiers'), delete=options.get('delete'))
+        diffs = reconciliation.reconcile(dry_run=options.get('dry_run'))
+
+        for action_name, (to_create, to_reopen, to_delete) in diffs.items():
+            self.stdout.write(
+                f'{action_name}: {len(to_create)} to create, '
+                f'{len(to_reopen)} to re-open, {len(to_delete)} to delete')
+            if options.get('verbosity') > 1:
+                for label, subject_identifiers in [('create', to_create),
+                                                   ('re-open', to_reopen),
+                                                   ('delete', to_delete)]:
+                    for subject_identifier in sorted(subject_identifiers):
+                        self.stdout.write(f'  {label} {subject_identifier}')
+
+        if not options.get('dry_run'):
+            self.stdout.write(self.style.SUCCESS('Action items reconciled.'))
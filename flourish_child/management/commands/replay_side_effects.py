@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helper_classes import side_effects
+from ...models import SideEffectFailure
+
+
+class Command(BaseCommand):
+
+    help = ('Replay child side effects that failed after their retries, '
+            'deleting each one that now succeeds.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Limit to these subjects. Defaults to all.')
+        parser.add_argument(
+            '--dispatch-uid', action='append', default=[], dest='dispatch_uids',
+            help='Limit to these receivers. Repeat for more.')
+
+    def handle(self, *args, **options):
+        failures = SideEffectFailure.objects.order_by('created')
+        if options.get('subject_identifiers'):
+            failures = failures.filter(
+                subject_identifier__in=options.get('subject_identifiers'))
+        if options.get('dispatch_uids'):
+            failures = failures.filter(dispatch_uid__in=options.get('dispatch_uids'))
+
+        failed = 0
+        for failure in failures:
+            try:
+                side_effects.replay(failure)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{failure}: {e.__class__.__name__}: {e}')
+        if failed:
+            raise CommandError(f'{failed} side effects failed again.')
+        self.stdout.write(self.style.SUCCESS('Side effects replayed.'))
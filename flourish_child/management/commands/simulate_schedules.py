@@ -0,0 +1,61 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import ScheduleSimulator, SubjectSnapshots
+
+
+class Command(BaseCommand):
+
+    help = ('Work out, without writing anything, the schedules and appointment '
+            'timepoints the child signals would create for consented children.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Child subject identifiers to simulate. Defaults to all.')
+        parser.add_argument(
+            '--simulate-visits', action='store_true', default=False,
+            help='Assume enrolment visits happen on their appointment timepoint '
+                 'instead of using the captured visits.')
+        parser.add_argument(
+            '--output',
+            help='CSV file to write the appointments to. Defaults to stdout.')
+
+    def handle(self, *args, **options):
+        snapshots = SubjectSnapshots(
+            options.get('subject_identifiers') or None,
+            simulate_visits=options.get('simulate_visits'))
+        simulator = ScheduleSimulator()
+
+        output = open(options.get('output'), 'w', newline='') if options.get(
+            'output') else sys.stdout
+        writer = csv.writer(output)
+        writer.writerow(['subject_identifier', 'trigger', 'cohort', 'schedule_name',
+                         'base_appt_datetime', 'visit_code', 'timepoint_datetime'])
+
+        start = time.monotonic()
+        subjects = errors = 0
+        try:
+            for snapshot in snapshots:
+                simulation = simulator.simulate(snapshot)
+                subjects += 1
+                for placement in simulation.placements:
+                    for visit_code, timepoint_datetime in placement.appointments:
+                        writer.writerow([
+                            simulation.subject_identifier, placement.trigger,
+                            placement.cohort, placement.schedule_name,
+                            placement.base_appt_datetime.isoformat(), visit_code,
+                            timepoint_datetime.isoformat()])
+                for error in simulation.errors:
+                    errors += 1
+                    self.stderr.write(f'{simulation.subject_identifier}: {error}')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(
+            f'{subjects} subjects simulated in {time.monotonic() - start:.1f}s, '
+            f'{errors} errors.')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from ...helper_classes import EducationLevelSync
+
+
+class Command(BaseCommand):
+
+    help = ('Copy the socio demographic education level to academic '
+            'performance CRFs of the same visit where they differ.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'subject_identifiers', nargs='*',
+            help='Child subject identifiers to sync. Defaults to all.')
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Report the number of mismatched CRFs without updating them.')
+
+    def handle(self, *args, **options):
+        education_level_sync = EducationLevelSync(
+            options.get('subject_identifiers') or None)
+        dry_run = options.get('dry_run')
+        count = education_level_sync.sync(dry_run=dry_run)
+        for obj in education_level_sync.unmapped:
+            self.stderr.write(
+                f'{obj.child_visit}: no education level for '
+                f'{obj.socio_education_level!r}, left unchanged.')
+        if dry_run:
+            self.stdout.write(f'{count} academic performance CRFs out of sync.')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{count} academic performance CRFs updated.'))
@@ -31,6 +31,12 @@ from .child_socio_demographic import ChildSocioDemographic
 from .child_tanner_staging import ChildTannerStaging
 from .child_visit import ChildVisit
 from .child_working_status import ChildWorkingStatus
+from .export_job import ExportJob
+from .export_watermark import ExportWatermark
+from .receiver_timing import ReceiverTiming
+from .side_effect_failure import SideEffectFailure
+from .caregiver_identity import CaregiverIdentity
+from .child_identifier_sequence import ChildIdentifierSequence
 from .infant_arv_exposure import InfantArvExposure
 from .infant_congenital_anomalies import InfantCardioDisorder, \
     InfantFacialDefect
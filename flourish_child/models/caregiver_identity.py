@@ -0,0 +1,32 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class CaregiverIdentity(BaseUuidModel):
+    """ The screening identifier and consent version of a caregiver,
+    kept in step with the caregiver screening and consent version forms.
+    """
+
+    caregiver_subject_identifier = models.CharField(
+        verbose_name='Caregiver subject identifier',
+        max_length=50,
+        unique=True)
+
+    screening_identifier = models.CharField(
+        verbose_name='Screening identifier',
+        max_length=50,
+        db_index=True)
+
+    consent_version = models.CharField(
+        verbose_name='Consent version',
+        max_length=10,
+        null=True,
+        blank=True)
+
+    def __str__(self):
+        return f'{self.caregiver_subject_identifier} {self.screening_identifier}'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Caregiver Identity'
+        verbose_name_plural = 'Caregiver Identities'
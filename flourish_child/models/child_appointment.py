@@ -36,4 +36,9 @@ class Appointment(AppointmentModelMixin, SiteModelMixin, BaseUuidModel):
     natural_key.dependencies = ['sites.Site']
 
     class Meta(AppointmentModelMixin.Meta):
-        pass
+        indexes = AppointmentModelMixin.Meta.indexes + [
+            models.Index(
+                fields=['subject_identifier', 'visit_code_sequence',
+                        'schedule_name', 'timepoint'],
+                name='child_appt_subj_seq_sched_idx'),
+        ]
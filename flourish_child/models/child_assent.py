@@ -20,6 +20,7 @@ from edc_search.model_mixins import SearchSlugManager
 
 from ..action_items import CHILDASSENT_ACTION
 from ..choices import IDENTITY_TYPE
+from ..helper_classes import child_identifier_allocator
 from .eligibility import AssentEligibility
 from .model_mixins import SearchSlugModelMixin
 
@@ -184,14 +185,8 @@ class ChildAssent(SiteModelMixin, NonUniqueSubjectIdentifierFieldMixin,
             raise ValidationError(
                 'Please complete the adult participation consent first.')
         else:
-            child_dummy_consent_cls = django_apps.get_model(
-                'flourish_child.childdummysubjectconsent')
-
-            children_count = 1 + child_dummy_consent_cls.objects.filter(
-                subject_identifier__icontains=consent.subject_identifier).exclude(
-                    identity=self.identity).count()
-            child_identifier_postfix = '-' + str(children_count * 10)
-            return consent.subject_identifier + child_identifier_postfix
+            return child_identifier_allocator.subject_identifier(
+                consent.subject_identifier, identity=self.identity)
 
     class Meta:
         app_label = 'flourish_child'
@@ -1,5 +1,4 @@
 from edc_visit_schedule.model_mixins import SubjectScheduleCrfModelMixin
-from django.apps import apps as django_apps
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models.deletion import PROTECT
@@ -12,6 +11,7 @@ from edc_reference.model_mixins import ReferenceModelMixin
 from edc_visit_tracking.model_mixins import CrfModelMixin as BaseCrfModelMixin
 from edc_visit_tracking.model_mixins import PreviousVisitModelMixin
 
+from ..helper_classes import consent_version_resolver
 from .child_visit import ChildVisit
 
 
@@ -41,16 +41,12 @@ class ChildCrfModelMixin(
         super().save(*args, **kwargs)
 
     def get_consent_version(self):
-        subject_consent_cls = django_apps.get_model(
-            'flourish_child.childdummysubjectconsent')
-        subject_consent_objs = subject_consent_cls.objects.filter(
-            subject_identifier=self.child_visit.subject_identifier).order_by(
-                '-consent_datetime')
-        if subject_consent_objs:
-            return subject_consent_objs.first().version
-        else:
+        version = consent_version_resolver.child_consent_version(
+            self.child_visit.subject_identifier)
+        if version is None:
             raise ValidationError(
                 'Missing Child Dummy Consent form. Cannot proceed.')
+        return version
 
     class Meta:
         abstract = True
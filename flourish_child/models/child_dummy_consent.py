@@ -74,3 +74,8 @@ class ChildDummySubjectConsent(
         verbose_name = 'Child Consent'
         unique_together = (
             ('subject_identifier', 'version'))
+        indexes = ConsentModelMixin.Meta.indexes + [
+            models.Index(
+                fields=['subject_identifier', 'consent_datetime'],
+                name='child_consent_subject_dt_idx'),
+        ]
@@ -0,0 +1,24 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class ChildIdentifierSequence(BaseUuidModel):
+    """ The last child number handed out under a caregiver, e.g. 2 once
+    the caregiver's -10 and -20 child identifiers are allocated.
+    """
+
+    caregiver_subject_identifier = models.CharField(
+        verbose_name='Caregiver subject identifier',
+        max_length=50,
+        unique=True)
+
+    last_sequence = models.IntegerField(
+        verbose_name='Last child number',
+        default=0)
+
+    def __str__(self):
+        return f'{self.caregiver_subject_identifier} {self.last_sequence}'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Child Identifier Sequence'
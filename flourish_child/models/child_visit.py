@@ -111,3 +111,8 @@ class ChildVisit(
         app_label = 'flourish_child'
         verbose_name = "Child Visit"
         verbose_name_plural = "Child Visit"
+        indexes = VisitModelMixin.Meta.indexes + [
+            models.Index(
+                fields=['subject_identifier', 'visit_code'],
+                name='child_visit_subject_code_idx'),
+        ]
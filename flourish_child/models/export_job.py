@@ -0,0 +1,61 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+from ..choices import EXPORT_JOB_STATUS
+from ..constants import EXPORT_PENDING
+
+
+class ExportJob(BaseUuidModel):
+    """ A background export submitted from the admin and built by a
+    django_q worker.
+    """
+
+    description = models.CharField(
+        verbose_name='Description',
+        max_length=150)
+
+    model_labels = models.TextField(
+        verbose_name='Exported models',
+        help_text='Comma separated model labels.')
+
+    status = models.CharField(
+        verbose_name='Status',
+        max_length=15,
+        choices=EXPORT_JOB_STATUS,
+        default=EXPORT_PENDING)
+
+    task_id = models.CharField(
+        max_length=50,
+        null=True,
+        editable=False)
+
+    row_count = models.IntegerField(
+        verbose_name='Rows exported',
+        null=True,
+        editable=False)
+
+    started_datetime = models.DateTimeField(
+        null=True,
+        editable=False)
+
+    finished_datetime = models.DateTimeField(
+        null=True,
+        editable=False)
+
+    error_message = models.TextField(
+        null=True,
+        editable=False)
+
+    document = models.FileField(
+        upload_to='flourish_child/exports/',
+        null=True,
+        editable=False)
+
+    def __str__(self):
+        return f'{self.description} ({self.status})'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ('-created', )
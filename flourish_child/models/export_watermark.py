@@ -0,0 +1,35 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class ExportWatermark(BaseUuidModel):
+    """ The `modified` datetime up to which a consumer has exported a model.
+    """
+
+    model_label = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    consumer = models.CharField(
+        verbose_name='Consumer',
+        max_length=50,
+        help_text='Name of the pipeline or team pulling the export.')
+
+    watermark = models.DateTimeField(
+        verbose_name='Exported up to')
+
+    row_count = models.IntegerField(
+        verbose_name='Rows in last export',
+        default=0)
+
+    deleted_count = models.IntegerField(
+        verbose_name='Deletions in last export',
+        default=0)
+
+    def __str__(self):
+        return f'{self.model_label} {self.consumer} {self.watermark}'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Export Watermark'
+        unique_together = ('model_label', 'consumer')
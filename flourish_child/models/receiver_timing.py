@@ -0,0 +1,36 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class ReceiverTiming(BaseUuidModel):
+    """ One timed call of an instrumented child signal receiver.
+    """
+
+    dispatch_uid = models.CharField(
+        verbose_name='Receiver',
+        max_length=100,
+        db_index=True)
+
+    sender = models.CharField(
+        verbose_name='Sender',
+        max_length=100)
+
+    duration = models.FloatField(
+        verbose_name='Wall time (ms)')
+
+    query_count = models.IntegerField(
+        verbose_name='Queries')
+
+    exception = models.CharField(
+        verbose_name='Exception',
+        max_length=250,
+        null=True,
+        blank=True)
+
+    def __str__(self):
+        return f'{self.dispatch_uid} {self.duration:.1f}ms'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Receiver Timing'
+        indexes = [models.Index(fields=['dispatch_uid', 'created'])]
@@ -0,0 +1,41 @@
+from django.db import models
+from edc_base.model_mixins import BaseUuidModel
+
+
+class SideEffectFailure(BaseUuidModel):
+    """ A deferred child receiver call that still failed after its retries.
+    """
+
+    dispatch_uid = models.CharField(
+        verbose_name='Receiver',
+        max_length=100,
+        db_index=True)
+
+    model_label = models.CharField(
+        verbose_name='Model',
+        max_length=100)
+
+    object_id = models.CharField(
+        verbose_name='Object id',
+        max_length=50)
+
+    subject_identifier = models.CharField(
+        verbose_name='Subject identifier',
+        max_length=50,
+        null=True,
+        blank=True)
+
+    signal_kwargs = models.TextField(
+        verbose_name='Signal arguments',
+        help_text='The post_save arguments as JSON.')
+
+    exception = models.CharField(
+        verbose_name='Exception',
+        max_length=250)
+
+    def __str__(self):
+        return f'{self.dispatch_uid} {self.subject_identifier}'
+
+    class Meta:
+        app_label = 'flourish_child'
+        verbose_name = 'Side Effect Failure'
@@ -3,18 +3,23 @@ from flourish_child.models.child_birth import ChildBirth
 from django.apps import apps as django_apps
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save, pre_save
 from edc_action_item.site_action_items import site_action_items
 from edc_base.utils import age, get_utcnow
 from edc_constants.constants import OPEN, NEW, POS
+from edc_visit_schedule.constants import ON_SCHEDULE
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 from flourish_prn.action_items import CHILDOFF_STUDY_ACTION, CHILD_DEATH_REPORT_ACTION
 from flourish_prn.models import ChildOffStudy
 
 from flourish_prn.models.child_death_report import ChildDeathReport
 
-from ..choices import HIGHEST_EDUCATION
+from ..helper_classes import cohort_schedule_table, deferred_receiver
+from ..helper_classes import caregiver_consent_propagation, instrumented_receiver
+from ..helper_classes import caregiver_identity_index, consent_version_resolver
+from ..helper_classes.action_item_reconciliation import reconcile_loaded_action_items
+from ..helper_classes.education_level_sync import education_level_key
+from ..helper_classes.education_level_sync import sync_loaded_education_levels
 from ..models import ChildOffSchedule, AcademicPerformance, ChildSocioDemographic
 from .child_assent import ChildAssent
 from .child_continued_consent import ChildContinuedConsent
@@ -29,16 +34,15 @@ class CaregiverConsentError(Exception):
 
 
 
-@receiver(pre_save, sender=AcademicPerformance, 
-dispatch_uid='academic_performance_pre_save')
+@instrumented_receiver(pre_save, sender=AcademicPerformance,
+                       dispatch_uid='academic_performance_pre_save')
 def academic_performance_pre_save(sender, instance, **kwargs):
-    highest_education_dictionary = dict(HIGHEST_EDUCATION)
-    highest_education_swapped = {value: key for key, value in highest_education_dictionary.items()}
-    instance.education_level = highest_education_swapped[instance.education_level]
+    instance.education_level = education_level_key(instance.education_level)
 
 
-@receiver(post_save, weak=False, sender=ChildSocioDemographic,
-          dispatch_uid='child_socio_demographic_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildSocioDemographic,
+                   dispatch_uid='child_socio_demographic_post_save',
+                   reconcile=sync_loaded_education_levels)
 def child_socio_demographic_post_save(sender, instance, raw, created, **kwargs):
 
     subject_identifier = instance.child_visit.subject_identifier
@@ -59,8 +63,8 @@ def child_socio_demographic_post_save(sender, instance, raw, created, **kwargs):
             academic_perfomance.save()
 
 
-@receiver(post_save, weak=False, sender=ChildAssent,
-          dispatch_uid='child_assent_on_post_save')
+@instrumented_receiver(post_save, weak=False, sender=ChildAssent,
+                       dispatch_uid='child_assent_on_post_save')
 def child_assent_on_post_save(sender, instance, raw, created, **kwargs):
     """Put subject on schedule after consenting.
     """
@@ -101,13 +105,12 @@ def child_assent_on_post_save(sender, instance, raw, created, **kwargs):
                         else:
                             dummy_consent_obj.save()
 
-                        caregiver_child_consent_obj.subject_identifier = instance.subject_identifier
-                        caregiver_child_consent_obj.save(
-                            update_fields=['subject_identifier', 'modified', 'user_modified'])
+                        caregiver_consent_propagation.propagate_assent(
+                            instance, caregiver_child_consent_obj)
 
 
-@receiver(post_save, weak=False, sender=ChildDummySubjectConsent,
-          dispatch_uid='child_consent_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildDummySubjectConsent,
+                   dispatch_uid='child_consent_on_post_save')
 def child_consent_on_post_save(sender, instance, raw, created, **kwargs):
     """Put subject on cohort a schedule after consenting.
     """
@@ -136,8 +139,9 @@ def child_consent_on_post_save(sender, instance, raw, created, **kwargs):
                             base_appt_datetime=maternal_delivery_obj.created)
 
 
-@receiver(post_save, weak=False, sender=ChildVisit,
-          dispatch_uid='child_visit_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildVisit,
+                   dispatch_uid='child_visit_on_post_save',
+                   reconcile=reconcile_loaded_action_items)
 def child_visit_on_post_save(sender, instance, raw, created, **kwargs):
     """
     - Put subject on quarterly schedule at enrollment visit.
@@ -148,26 +152,18 @@ def child_visit_on_post_save(sender, instance, raw, created, **kwargs):
                         instance.subject_identifier,
                         repeat=True)
 
-    if not raw and created and instance.visit_code in ['2000', '2000D']:
+    if (not raw and created
+            and instance.visit_code in cohort_schedule_table.enrolment_visit_codes):
 
-        if 'sec' in instance.schedule_name:
-
-            cohort_list = instance.schedule_name.split('_')
-
-            cohort = '_'.join(['cohort', cohort_list[1], 'sec_qt'])
-
-        else:
-            cohort_list = instance.schedule_name.split('_')
-
-            cohort = '_'.join(['cohort', cohort_list[1], 'quarterly'])
+        cohort = cohort_schedule_table.quarterly_cohort(instance.schedule_name)
 
         put_on_schedule(cohort, instance=instance,
                         subject_identifier=instance.subject_identifier,
                         base_appt_datetime=instance.created.replace(microsecond=0))
 
 
-@receiver(post_save, weak=False, sender=ChildBirth,
-          dispatch_uid='child_visit_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildBirth,
+                   dispatch_uid='child_birth_on_post_save')
 def child_birth_on_post_save(sender, instance, raw, created, **kwargs):
     """
     - Put subject on birth schedule.
@@ -188,24 +184,12 @@ def child_birth_on_post_save(sender, instance, raw, created, **kwargs):
                     subject_identifier=instance.subject_identifier,
                     base_appt_datetime=maternal_delivery_obj.created.replace(microsecond=0))
 
-        caregiver_child_consent_cls = django_apps.get_model(
-            'flourish_caregiver.caregiverchildconsent')
-
-        try:
-            caregiver_child_consent_obj = caregiver_child_consent_cls.objects.get(
-                subject_identifier=instance.subject_identifier)
-        except caregiver_child_consent_cls.DoesNotExist:
-            raise
-        else:
-            caregiver_child_consent_obj.first_name = instance.first_name
-            caregiver_child_consent_obj.last_name = caregiver_child_consent_obj.subject_consent.last_name
-            caregiver_child_consent_obj.gender = instance.gender
-            caregiver_child_consent_obj.child_dob = instance.dob
-            caregiver_child_consent_obj.save()
+        caregiver_consent_propagation.propagate_birth(instance)
 
 
-@receiver(post_save, weak=False, sender=ChildHIVRapidTestCounseling,
-          dispatch_uid='child_rapid_test_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildHIVRapidTestCounseling,
+                   dispatch_uid='child_rapid_test_on_post_save',
+                   reconcile=reconcile_loaded_action_items)
 def child_rapid_test_on_post_save(sender, instance, raw, created, **kwargs):
     """Take the participant offstudy if HIV result is positive.
     """
@@ -215,8 +199,9 @@ def child_rapid_test_on_post_save(sender, instance, raw, created, **kwargs):
                         repeat=True)
 
 
-@receiver(post_save, weak=False, sender=ChildPregTesting,
-          dispatch_uid='child_preg_testing_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildPregTesting,
+                   dispatch_uid='child_preg_testing_on_post_save',
+                   reconcile=reconcile_loaded_action_items)
 def child_preg_testing_on_post_save(sender, instance, raw, created, **kwargs):
     """Take the participant offstudy if pregnancy test result is positive.
     """
@@ -226,8 +211,9 @@ def child_preg_testing_on_post_save(sender, instance, raw, created, **kwargs):
                         repeat=True)
 
 
-@receiver(post_save, weak=False, sender=ChildContinuedConsent,
-          dispatch_uid='child_continued_consent_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildContinuedConsent,
+                   dispatch_uid='child_continued_consent_on_post_save',
+                   reconcile=reconcile_loaded_action_items)
 def child_continued_consent_on_post_save(sender, instance, raw, created, **kwargs):
     """Take the participant offstudy if child ineligible on continued consent.
     """
@@ -241,14 +227,11 @@ def put_cohort_onschedule(cohort, instance, base_appt_datetime=None):
 
     if cohort:
         instance.registration_update_or_create()
-        if 'sec' in cohort or 'pool' in cohort:
-            put_on_schedule(cohort, instance=instance,
-                            base_appt_datetime=base_appt_datetime)
-        else:
-            put_on_schedule(cohort + '_enrol', instance=instance,
-                            base_appt_datetime=base_appt_datetime)
-            # put_on_schedule(cohort + '_quart', instance=instance,
-                            # base_appt_datetime=base_appt_datetime)
+        put_on_schedule(cohort_schedule_table.enrolment_cohort(cohort),
+                        instance=instance,
+                        base_appt_datetime=base_appt_datetime)
+        # put_on_schedule(cohort + '_quart', instance=instance,
+                        # base_appt_datetime=base_appt_datetime)
         # put_on_schedule(cohort + '_fu', instance=instance,
                         # base_appt_datetime=django_apps.get_app_config(
                             # 'edc_protocol').study_open_datetime)
@@ -260,26 +243,8 @@ def put_on_schedule(cohort, instance=None, subject_identifier=None,
     if instance:
         subject_identifier = subject_identifier or instance.subject_identifier
 
-        cohort_label_lower = ''.join(cohort.split('_'))
-
-        if 'enrol' in cohort:
-            cohort_label_lower = cohort_label_lower.replace('enrol', 'enrollment')
-        elif 'sec' in cohort:
-            cohort_label_lower = cohort_label_lower.replace('qt', 'quart')
-
-        if 'birth' in cohort:
-            onschedule_model = 'flourish_child.onschedule' + cohort_label_lower
-            schedule_name = cohort.replace('cohort_', '') + '_schedule1'
-        else:
-            onschedule_model = 'flourish_child.onschedulechild' + cohort_label_lower
-
-            schedule_name = cohort.replace('cohort', 'child') + '_schedule1'
-
-        if 'quarterly' in cohort:
-            schedule_name = schedule_name.replace('quarterly', 'quart')
-
-        _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
-            onschedule_model=onschedule_model, name=schedule_name)
+        _, schedule = cohort_schedule_table.get(cohort)
+        schedule_name = schedule.name
 
         schedule.put_on_schedule(
             subject_identifier=subject_identifier,
@@ -326,23 +291,35 @@ def trigger_action_item(obj, field, response, model_cls,
             action_item.delete()
 
 
-@receiver(post_save, weak=False, sender=ChildOffSchedule,
-          dispatch_uid='child_off_schedule_on_post_save')
+@deferred_receiver(post_save, weak=False, sender=ChildOffSchedule,
+                   dispatch_uid='child_off_schedule_on_post_save')
 def child_take_off_study(sender, instance, raw, created, **kwargs):
-    for visit_schedule in site_visit_schedules.visit_schedules.values():
-            for schedule in visit_schedule.schedules.values():
-                onschedule_model_obj = get_child_onschedule_model_obj(
-                    schedule, instance.subject_identifier)
-                if onschedule_model_obj:
-                    _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
-                        onschedule_model=onschedule_model_obj._meta.label_lower,
-                        name=onschedule_model_obj.schedule_name)
-                    schedule.take_off_schedule(subject_identifier=instance.subject_identifier)
-
-                    # remove care giver from child schedules also
-                    # caregiver_subject_identifier = instance.subject_identifier[:-3]
-                    # onschedule_model_obj = get_caregiver_onschedule_model_obj(schedule,caregiver_subject_identifier)
-                    # schedule.take_off_schedule(subject_identifier=caregiver_subject_identifier)
+    for onschedule_model, schedule_name in get_child_onschedules(
+            instance.subject_identifier):
+        _, schedule = site_visit_schedules.get_by_onschedule_model_schedule_name(
+            onschedule_model=onschedule_model, name=schedule_name)
+        schedule.take_off_schedule(subject_identifier=instance.subject_identifier)
+
+        # remove care giver from child schedules also
+        # caregiver_subject_identifier = instance.subject_identifier[:-3]
+        # onschedule_model_obj = get_caregiver_onschedule_model_obj(schedule,caregiver_subject_identifier)
+        # schedule.take_off_schedule(subject_identifier=caregiver_subject_identifier)
+
+
+def get_child_onschedules(subject_identifier):
+    """Returns (onschedule_model, schedule_name) for each schedule the
+    subject is currently on.
+
+    Reads the subject schedule history, which the schedules update on
+    every put on / take off, in one query on the indexed subject
+    identifier instead of querying each onschedule model in turn.
+    """
+    history_model_cls = django_apps.get_model(
+        'edc_visit_schedule.subjectschedulehistory')
+    return list(history_model_cls.objects.filter(
+        subject_identifier=subject_identifier,
+        schedule_status=ON_SCHEDULE).values_list(
+            'onschedule_model', 'schedule_name'))
 
 
 def get_caregiver_onschedule_model_obj(schedule, subject_identifier):
@@ -359,3 +336,56 @@ def get_child_onschedule_model_obj(schedule, subject_identifier):
                 subject_identifier=subject_identifier)
         except ObjectDoesNotExist:
             return None
+
+
+@instrumented_receiver(post_save, sender=ChildDummySubjectConsent,
+                       dispatch_uid='child_consent_version_on_post_save')
+@instrumented_receiver(post_delete, sender=ChildDummySubjectConsent,
+                       dispatch_uid='child_consent_version_on_post_delete')
+def child_consent_version_invalidate(sender, instance, **kwargs):
+    """Drop the cached consent version when a child consent changes.
+    """
+    consent_version_resolver.invalidate_child(instance.subject_identifier)
+
+
+@instrumented_receiver(post_save, sender='flourish_caregiver.flourishconsentversion',
+                       dispatch_uid='caregiver_consent_version_on_post_save')
+@instrumented_receiver(post_delete, sender='flourish_caregiver.flourishconsentversion',
+                       dispatch_uid='caregiver_consent_version_on_post_delete')
+def caregiver_consent_version_invalidate(sender, instance, **kwargs):
+    """Drop the cached caregiver consent version when it changes.
+    """
+    consent_version_resolver.invalidate_caregiver(instance.screening_identifier)
+
+
+@instrumented_receiver(post_save, sender='flourish_caregiver.flourishconsentversion',
+                       dispatch_uid='caregiver_identity_consent_version_on_post_save')
+def caregiver_identity_consent_version_on_post_save(sender, instance, **kwargs):
+    """Keep the consent version in the caregiver identity table.
+    """
+    caregiver_identity_index.update_consent_version(
+        instance.screening_identifier, instance.version)
+
+
+@instrumented_receiver(post_delete, sender='flourish_caregiver.flourishconsentversion',
+                       dispatch_uid='caregiver_identity_consent_version_on_post_delete')
+def caregiver_identity_consent_version_on_post_delete(sender, instance, **kwargs):
+    """Replace a deleted consent version in the caregiver identity table.
+    """
+    caregiver_identity_index.refresh_consent_version(instance.screening_identifier)
+
+
+@instrumented_receiver(post_save, sender='flourish_caregiver.screeningpregwomen',
+                       dispatch_uid='caregiver_identity_preg_screening_on_post_save')
+@instrumented_receiver(post_save, sender='flourish_caregiver.screeningpriorbhpparticipants',
+                       dispatch_uid='caregiver_identity_prior_screening_on_post_save')
+def caregiver_identity_screening_on_post_save(sender, instance, **kwargs):
+    """Add or update the caregiver identity once the screened caregiver
+    has a subject identifier.
+    """
+    if instance.subject_identifier:
+        caregiver_subject_identifier = (
+            caregiver_identity_index.caregiver_subject_identifier(
+                instance.subject_identifier))
+        caregiver_identity_index.refresh(caregiver_subject_identifier)
+        consent_version_resolver.invalidate_screening(caregiver_subject_identifier)
@@ -157,6 +157,30 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Background exports are built by django_q workers using the ORM broker.
+Q_CLUSTER = {
+    'name': 'flourish_child',
+    'workers': 4,
+    'timeout': 3600,
+    'retry': 3700,
+    'orm': 'default',
+}
+
+FLOURISH_CHILD_SIDE_EFFECTS = {
+    'mode': 'immediate',
+    'retries': 3,
+}
+
+FLOURISH_CHILD_INSTRUMENT_RECEIVERS = False
+
+# Consent versions are only cached in a cache shared by all processes,
+# e.g. FLOURISH_CHILD_CONSENT_VERSION_CACHE = 'default' with a redis CACHES.
+FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT = 0
+
 DASHBOARD_URL_NAMES = {}
 
 if 'test' in sys.argv:
@@ -172,3 +196,4 @@ if 'test' in sys.argv:
     MIGRATION_MODULES = DisableMigrations()
     PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
     DEFAULT_FILE_STORAGE = 'inmemorystorage.InMemoryStorage'
+    Q_CLUSTER['sync'] = True
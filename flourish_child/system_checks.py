@@ -0,0 +1,31 @@
+from django.core.checks import Error, Warning
+
+from .helper_classes import cohort_schedule_table, consent_version_resolver
+
+
+def cohort_schedule_check(app_configs, **kwargs):
+    """Checks that every cohort key with an onschedule model resolves to
+    a registered schedule.
+    """
+    cohort_schedule_table.load()
+    return [
+        Warning(
+            f'Cohort {cohort} does not resolve to a schedule. Got {error}',
+            id='flourish_child.W001')
+        for cohort, error in cohort_schedule_table.errors.items()]
+
+
+def consent_version_cache_check(app_configs, **kwargs):
+    """Checks that consent versions are only cached in a cache shared by
+    all processes, so an invalidation reaches every worker.
+    """
+    if consent_version_resolver.timeout and consent_version_resolver.per_process:
+        return [
+            Error(
+                'Consent versions are cached in a per-process cache, so other '
+                'processes keep stale versions after a re-consent.',
+                hint=('Set FLOURISH_CHILD_CONSENT_VERSION_CACHE to a shared cache, '
+                      'e.g. redis or memcached, or set '
+                      'FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT = 0.'),
+                id='flourish_child.E001')]
+    return []
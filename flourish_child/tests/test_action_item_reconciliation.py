@@ -0,0 +1,163 @@
+from django.test import TestCase, tag
+from edc_action_item.site_action_items import site_action_items
+from edc_constants.constants import CLOSED, NEW, OPEN
+from flourish_prn.action_items import CHILDOFF_STUDY_ACTION
+from model_mommy import mommy
+
+from ..helper_classes import ActionItemReconciliation, side_effects
+from ..helper_classes.action_item_reconciliation import ActionItemRule
+
+
+class RuleReconciliation(ActionItemReconciliation):
+
+    def __init__(self, rules, **kwargs):
+        super().__init__(**kwargs)
+        self._rules = rules
+
+    @property
+    def rules(self):
+        return self._rules
+
+
+class Reconciliation(ActionItemReconciliation):
+    """Wants the given subjects, with a child dummy consent standing in
+    for the completed PRN form.
+    """
+
+    evaluated = set()
+
+    wanted = set()
+
+    @property
+    def rules(self):
+        return {CHILDOFF_STUDY_ACTION: [ActionItemRule(
+            'flourish_child.childdummysubjectconsent', 'cohort', 'cohort_a',
+            'subject_identifier', 'flourish_child.childdummysubjectconsent',
+            repeat=True)]}
+
+    def evaluate(self, action_name):
+        return self.evaluated, self.wanted
+
+
+@tag('reconcile')
+class TestActionItemReconciliation(TestCase):
+
+    def setUp(self):
+        self.action_cls = site_action_items.get(CHILDOFF_STUDY_ACTION)
+        self.action_item_model_cls = self.action_cls.action_item_model_cls()
+        Reconciliation.evaluated = {'B142-040990001-6-10', 'B142-040990002-6-10'}
+        Reconciliation.wanted = {'B142-040990001-6-10'}
+
+    def action_items(self, subject_identifier):
+        return self.action_item_model_cls.objects.filter(
+            subject_identifier=subject_identifier,
+            action_type__name=CHILDOFF_STUDY_ACTION)
+
+    def test_creates_wanted(self):
+        Reconciliation().reconcile()
+        self.assertEqual(self.action_items('B142-040990001-6-10').count(), 1)
+        self.assertEqual(self.action_items('B142-040990002-6-10').count(), 0)
+
+    def close(self, subject_identifier):
+        self.action_cls(subject_identifier=subject_identifier)
+        self.action_items(subject_identifier).update(status=CLOSED)
+
+    def complete_prn(self, subject_identifier):
+        with side_effects.suppressed():
+            mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier=subject_identifier, cohort='cohort_a')
+
+    def test_closed_with_completed_prn_stays_closed(self):
+        self.close('B142-040990001-6-10')
+        self.complete_prn('B142-040990001-6-10')
+        _, to_reopen, _ = Reconciliation().diff(CHILDOFF_STUDY_ACTION)
+        self.assertEqual(to_reopen, set())
+
+        Reconciliation().reconcile()
+        self.assertEqual(
+            self.action_items('B142-040990001-6-10').get().status, CLOSED)
+
+    def test_reopens_closed_without_completed_prn(self):
+        self.close('B142-040990001-6-10')
+        Reconciliation().reconcile()
+        self.assertEqual(
+            self.action_items('B142-040990001-6-10').get().status, OPEN)
+
+    def test_reopen_completed_reopens_as_receivers_do(self):
+        self.close('B142-040990001-6-10')
+        self.complete_prn('B142-040990001-6-10')
+        Reconciliation(reopen_completed=True).reconcile()
+        self.assertEqual(
+            self.action_items('B142-040990001-6-10').get().status, OPEN)
+
+    def test_new_item_not_opened(self):
+        self.action_cls(subject_identifier='B142-040990001-6-10')
+        self.action_items('B142-040990001-6-10').update(status=NEW)
+        Reconciliation().reconcile()
+        self.assertEqual(
+            self.action_items('B142-040990001-6-10').get().status, NEW)
+
+    def test_closed_item_kept_closed_beside_open_one(self):
+        self.close('B142-040990001-6-10')
+        action_item = self.action_items('B142-040990001-6-10').get()
+        action_item.id = None
+        action_item.action_identifier = None
+        action_item.status = OPEN
+        action_item.save()
+
+        _, to_reopen, _ = Reconciliation().diff(CHILDOFF_STUDY_ACTION)
+        self.assertEqual(to_reopen, set())
+        self.assertCountEqual(
+            self.action_items('B142-040990001-6-10').values_list('status', flat=True),
+            [CLOSED, OPEN])
+
+    def test_delete_is_opt_in(self):
+        self.action_cls(subject_identifier='B142-040990002-6-10')
+        Reconciliation().reconcile()
+        self.assertEqual(self.action_items('B142-040990002-6-10').count(), 1)
+
+        Reconciliation(delete=True).reconcile()
+        self.assertEqual(self.action_items('B142-040990002-6-10').count(), 0)
+
+    def test_next_action_items_not_deleted(self):
+        self.action_cls(subject_identifier='B142-040990001-6-10')
+        self.action_cls(subject_identifier='B142-040990002-6-10')
+        self.action_items('B142-040990002-6-10').update(
+            status=NEW,
+            parent_action_item=self.action_items('B142-040990001-6-10').get())
+        _, _, to_delete = Reconciliation(delete=True).diff(CHILDOFF_STUDY_ACTION)
+        self.assertEqual(to_delete, set())
+
+
+@tag('reconcile')
+class TestActionItemRules(TestCase):
+
+    def setUp(self):
+        with side_effects.suppressed():
+            mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier='B142-040990001-6-10', cohort='cohort_a')
+
+    def reconciliation(self, repeat):
+        """Returns a reconciliation whose PRN form is the triggering
+        model itself, so the PRN is always completed.
+        """
+        rule = ActionItemRule(
+            'flourish_child.childdummysubjectconsent', 'cohort', 'cohort_a',
+            'subject_identifier', 'flourish_child.childdummysubjectconsent',
+            repeat=repeat)
+        return RuleReconciliation({CHILDOFF_STUDY_ACTION: [rule]})
+
+    def test_repeat_wanted_after_prn_completed(self):
+        _, wanted = self.reconciliation(repeat=True).evaluate(CHILDOFF_STUDY_ACTION)
+        self.assertEqual(wanted, {'B142-040990001-6-10'})
+
+    def test_not_repeated_after_prn_completed(self):
+        _, wanted = self.reconciliation(repeat=False).evaluate(CHILDOFF_STUDY_ACTION)
+        self.assertEqual(wanted, set())
+
+    def test_child_rules_repeat(self):
+        for rules in ActionItemReconciliation().rules.values():
+            for rule in rules:
+                self.assertTrue(rule.repeat)
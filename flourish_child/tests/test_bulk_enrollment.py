@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+
+from ..helper_classes import BulkEnrollment, side_effects
+from ..helper_classes.export_benchmark import SyntheticCohort
+from ..models import Appointment, ChildDummySubjectConsent
+
+
+@tag('bulk_enrollment')
+class TestBulkEnrollment(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        # consented, but not yet put on any schedule
+        with side_effects.suppressed():
+            SyntheticCohort(size=3, visits_per_child=0).create()
+        self.consents = list(ChildDummySubjectConsent.objects.order_by(
+            'subject_identifier'))
+        self.subject_identifiers = [
+            consent.subject_identifier for consent in self.consents]
+        self.cohort = self.consents[0].cohort
+
+    def appointments(self):
+        return sorted(Appointment.objects.filter(
+            subject_identifier__in=self.subject_identifiers).values_list(
+                'subject_identifier', 'schedule_name', 'visit_code',
+                'visit_code_sequence', 'timepoint', 'appt_datetime'))
+
+    def test_cohort_not_on_schedule(self):
+        self.assertEqual(len(self.consents), 3)
+        self.assertTrue(self.cohort)
+        self.assertEqual(self.appointments(), [])
+
+    def test_appointments_match_per_subject_enrollment(self):
+        with transaction.atomic():
+            bulk_enrollment = BulkEnrollment(
+                self.cohort, self.subject_identifiers, batch_size=2)
+            self.assertEqual(bulk_enrollment.run(), 3)
+            self.assertEqual(bulk_enrollment.failed, {})
+            bulk_appointments = self.appointments()
+            transaction.set_rollback(True)
+        self.assertEqual(self.appointments(), [])
+
+        # the child consent post_save receiver, one subject at a time
+        with side_effects.immediate():
+            for consent in self.consents:
+                consent.save()
+        self.assertTrue(bulk_appointments)
+        self.assertEqual(bulk_appointments, self.appointments())
+
+    def test_subject_without_consent_skipped(self):
+        bulk_enrollment = BulkEnrollment(
+            self.cohort, self.subject_identifiers + ['B142-040999999-6-10'])
+        bulk_enrollment.run()
+        self.assertEqual(bulk_enrollment.skipped, ['B142-040999999-6-10'])
+        self.assertEqual(bulk_enrollment.enrolled, 3)
+
+    def test_plan_in_fixed_number_of_queries(self):
+        # consents, previous enrollments and deliveries
+        with self.assertNumQueries(3):
+            BulkEnrollment(self.cohort, self.subject_identifiers).enrollments
+
+    def test_enroll_cohort_dry_run_writes_nothing(self):
+        out = StringIO()
+        call_command('enroll_cohort', *self.subject_identifiers,
+                     '--cohort', self.cohort, '--dry-run', stdout=out)
+        self.assertIn('3 subjects', out.getvalue())
+        self.assertEqual(self.appointments(), [])
+
+    def test_enroll_cohort(self):
+        call_command('enroll_cohort', *self.subject_identifiers,
+                     '--cohort', self.cohort, stdout=StringIO())
+        self.assertEqual(
+            {appointment[0] for appointment in self.appointments()},
+            set(self.subject_identifiers))
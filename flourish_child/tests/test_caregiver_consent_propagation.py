@@ -0,0 +1,115 @@
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_constants.constants import YES
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..helper_classes import caregiver_consent_propagation, side_effects
+from ..models import ChildBirth
+
+
+@tag('propagation')
+class TestCaregiverConsentPropagation(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        self.caregiver_child_consent_cls = django_apps.get_model(
+            'flourish_caregiver.caregiverchildconsent')
+        self.births = [
+            self.make_birth('OLEBILE', 'Female', days=1),
+            self.make_birth('KAGISO', 'Male', days=2)]
+
+    def make_birth(self, first_name, gender, days):
+        """Returns the birth of a child consented before birth, saved
+        without the child receivers so the consent is left blank.
+        """
+        screening_preg = mommy.make_recipe('flourish_caregiver.screeningpregwomen')
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=screening_preg.screening_identifier,
+            breastfeed_intent=YES,
+            consent_datetime=get_utcnow(),
+            version='2')
+        caregiver_child_consent = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            gender=None,
+            first_name=None,
+            last_name=None,
+            identity=None,
+            confirm_identity=None,
+            study_child_identifier=None,
+            child_dob=None,
+            version='2')
+        with side_effects.suppressed():
+            return mommy.make_recipe(
+                'flourish_child.childbirth',
+                subject_identifier=caregiver_child_consent.subject_identifier,
+                first_name=first_name,
+                gender=gender,
+                dob=(get_utcnow() - relativedelta(days=days)).date())
+
+    def consent(self, child_birth):
+        return self.caregiver_child_consent_cls.objects.select_related(
+            'subject_consent').get(subject_identifier=child_birth.subject_identifier)
+
+    def test_consents_left_blank(self):
+        for child_birth in self.births:
+            self.assertIsNone(self.consent(child_birth).first_name)
+
+    def test_births_propagated(self):
+        self.assertEqual(caregiver_consent_propagation.propagate_births(), 2)
+        for child_birth in self.births:
+            consent = self.consent(child_birth)
+            self.assertEqual(consent.first_name, child_birth.first_name)
+            self.assertEqual(consent.last_name, consent.subject_consent.last_name)
+            self.assertEqual(consent.gender, child_birth.gender)
+            self.assertEqual(consent.child_dob, child_birth.dob)
+
+    def test_same_as_propagating_each_birth(self):
+        caregiver_consent_propagation.propagate_births()
+        bulk = {child_birth.subject_identifier: self.consent(child_birth)
+                for child_birth in self.births}
+        for child_birth in self.births:
+            self.assertEqual(
+                caregiver_consent_propagation.propagate_birth(child_birth), [])
+            consent = self.consent(child_birth)
+            for field_name in ['first_name', 'last_name', 'gender', 'child_dob']:
+                self.assertEqual(
+                    getattr(consent, field_name),
+                    getattr(bulk[child_birth.subject_identifier], field_name))
+
+    def test_second_run_changes_nothing(self):
+        caregiver_consent_propagation.propagate_births()
+        modified = {child_birth.subject_identifier: self.consent(child_birth).modified
+                    for child_birth in self.births}
+
+        self.assertEqual(caregiver_consent_propagation.propagate_births(), 0)
+        for child_birth in self.births:
+            self.assertEqual(
+                self.consent(child_birth).modified,
+                modified[child_birth.subject_identifier])
+
+    def test_only_changed_birth_updated_again(self):
+        caregiver_consent_propagation.propagate_births()
+        ChildBirth.objects.filter(pk=self.births[0].pk).update(first_name='NEO')
+        self.assertEqual(caregiver_consent_propagation.propagate_births(), 1)
+        self.assertEqual(self.consent(self.births[0]).first_name, 'NEO')
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(
+            caregiver_consent_propagation.propagate_births(dry_run=True), 2)
+        self.assertIsNone(self.consent(self.births[0]).first_name)
+
+    def test_propagate_child_births_command(self):
+        out = StringIO()
+        call_command('propagate_child_births', stdout=out)
+        self.assertIn('2 caregiver child consents updated', out.getvalue())
+        out = StringIO()
+        call_command('propagate_child_births', stdout=out)
+        self.assertIn('0 caregiver child consents updated', out.getvalue())
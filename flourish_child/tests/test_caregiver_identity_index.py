@@ -0,0 +1,83 @@
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from model_mommy import mommy
+
+from ..helper_classes import caregiver_identity_index
+from ..models import CaregiverIdentity
+
+
+@tag('caregiver_identity')
+class TestCaregiverIdentityIndex(TestCase):
+
+    caregiver_subject_identifier = 'B142-040990001-6'
+
+    def setUp(self):
+        self.screening = mommy.make_recipe(
+            'flourish_caregiver.screeningpriorbhpparticipants',
+            subject_identifier=self.caregiver_subject_identifier)
+        self.screening_identifier = self.screening.screening_identifier
+
+    def make_consent_version(self, version):
+        return mommy.make(
+            'flourish_caregiver.flourishconsentversion',
+            screening_identifier=self.screening_identifier,
+            version=version)
+
+    def test_screening_adds_identity(self):
+        caregiver_identity = CaregiverIdentity.objects.get(
+            caregiver_subject_identifier=self.caregiver_subject_identifier)
+        self.assertEqual(
+            caregiver_identity.screening_identifier, self.screening_identifier)
+        self.assertIsNone(caregiver_identity.consent_version)
+
+    def test_consent_version_kept_in_step(self):
+        consent_version = self.make_consent_version('1')
+        self.assertEqual(
+            caregiver_identity_index.consent_version(self.screening_identifier), '1')
+
+        consent_version.version = '2'
+        consent_version.save()
+        self.assertEqual(
+            caregiver_identity_index.consent_version(self.screening_identifier), '2')
+
+    def test_consent_version_cleared_on_delete(self):
+        self.make_consent_version('1').delete()
+        self.assertIsNone(
+            caregiver_identity_index.consent_version(self.screening_identifier))
+
+    def test_point_lookups_one_query(self):
+        self.make_consent_version('1')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                caregiver_identity_index.screening_identifier(
+                    self.caregiver_subject_identifier),
+                self.screening_identifier)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                caregiver_identity_index.consent_version(self.screening_identifier),
+                '1')
+
+    def test_missing_identity_added_from_screening(self):
+        CaregiverIdentity.objects.all().delete()
+        self.assertEqual(
+            caregiver_identity_index.screening_identifier(
+                self.caregiver_subject_identifier),
+            self.screening_identifier)
+        self.assertTrue(CaregiverIdentity.objects.filter(
+            caregiver_subject_identifier=self.caregiver_subject_identifier).exists())
+
+    def test_unscreened_caregiver(self):
+        self.assertIsNone(
+            caregiver_identity_index.screening_identifier('B142-040990002-6'))
+
+    def test_backfill(self):
+        self.make_consent_version('1')
+        CaregiverIdentity.objects.all().delete()
+        self.assertEqual(caregiver_identity_index.backfill(), (1, 0))
+        self.assertEqual(
+            caregiver_identity_index.consent_version(self.screening_identifier), '1')
+
+        consent_version_cls = django_apps.get_model(
+            'flourish_caregiver.flourishconsentversion')
+        consent_version_cls.objects.update(version='2')
+        self.assertEqual(caregiver_identity_index.backfill(), (0, 1))
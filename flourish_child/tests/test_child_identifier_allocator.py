@@ -0,0 +1,66 @@
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from model_mommy import mommy
+
+from ..helper_classes import ChildIdentifierAllocator, side_effects
+from ..models import ChildIdentifierSequence
+
+
+@tag('child_identifier')
+class TestChildIdentifierAllocator(TestCase):
+
+    caregiver_subject_identifier = 'B142-040990001-6'
+
+    def setUp(self):
+        self.allocator = ChildIdentifierAllocator()
+
+    def make_consent(self, suffix, identity):
+        with side_effects.suppressed():
+            return mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier=f'{self.caregiver_subject_identifier}-{suffix}',
+                identity=identity,
+                consent_datetime=get_utcnow())
+
+    def test_twins(self):
+        self.assertEqual(
+            self.allocator.allocate(self.caregiver_subject_identifier, count=2),
+            [f'{self.caregiver_subject_identifier}-10',
+             f'{self.caregiver_subject_identifier}-20'])
+
+    def test_triplets_one_at_a_time(self):
+        self.assertEqual(
+            [self.allocator.allocate(self.caregiver_subject_identifier)[0]
+             for _ in range(3)],
+            [f'{self.caregiver_subject_identifier}-10',
+             f'{self.caregiver_subject_identifier}-20',
+             f'{self.caregiver_subject_identifier}-30'])
+        self.assertEqual(ChildIdentifierSequence.objects.get(
+            caregiver_subject_identifier=self.caregiver_subject_identifier
+        ).last_sequence, 3)
+
+    def test_existing_identity_reused(self):
+        self.make_consent('10', '123425678')
+        self.assertEqual(
+            self.allocator.subject_identifier(
+                self.caregiver_subject_identifier, identity='123425678'),
+            f'{self.caregiver_subject_identifier}-10')
+        self.assertEqual(
+            self.allocator.subject_identifier(
+                self.caregiver_subject_identifier, identity='123425679'),
+            f'{self.caregiver_subject_identifier}-20')
+
+    def test_row_inserted_outside_allocator(self):
+        self.allocator.allocate(self.caregiver_subject_identifier)
+        self.make_consent('20', '123425678')
+        self.make_consent('30', '123425679')
+        self.assertEqual(
+            self.allocator.allocate(self.caregiver_subject_identifier),
+            [f'{self.caregiver_subject_identifier}-40'])
+
+    def test_backfill(self):
+        self.make_consent('20', '123425678')
+        self.assertEqual(self.allocator.backfill(), (1, 0))
+        self.assertEqual(ChildIdentifierSequence.objects.get(
+            caregiver_subject_identifier=self.caregiver_subject_identifier
+        ).last_sequence, 2)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_visit_schedule.constants import OFF_SCHEDULE, ON_SCHEDULE
+from edc_visit_schedule.models import SubjectScheduleHistory
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from model_mommy import mommy
+
+from ..models.signals import get_child_onschedules
+
+
+@tag('take_off_study')
+class TestChildTakeOffStudy(TestCase):
+
+    subject_identifier = 'B142-040990001-6-10'
+
+    def setUp(self):
+        self.make_history(
+            'flourish_child.onschedulechildcohortaenrollment',
+            'child_a_enrol_schedule1', OFF_SCHEDULE)
+        self.make_history(
+            'flourish_child.onschedulechildcohortaquarterly',
+            'child_a_quart_schedule1', ON_SCHEDULE)
+        self.make_history(
+            'flourish_child.onschedulechildcohortaquarterly',
+            'child_a_quart_schedule1', ON_SCHEDULE,
+            subject_identifier='B142-040990002-6-10')
+
+    def make_history(self, onschedule_model, schedule_name, schedule_status,
+                     subject_identifier=None):
+        return mommy.make(
+            SubjectScheduleHistory,
+            subject_identifier=subject_identifier or self.subject_identifier,
+            visit_schedule_name='child_visit_schedule_a',
+            schedule_name=schedule_name,
+            onschedule_model=onschedule_model,
+            offschedule_model='flourish_child.childoffschedule',
+            onschedule_datetime=get_utcnow(),
+            schedule_status=schedule_status)
+
+    def test_get_child_onschedules_skips_taken_off(self):
+        self.assertEqual(
+            get_child_onschedules(self.subject_identifier),
+            [('flourish_child.onschedulechildcohortaquarterly',
+              'child_a_quart_schedule1')])
+
+    def test_get_child_onschedules_one_query(self):
+        with self.assertNumQueries(1):
+            get_child_onschedules(self.subject_identifier)
+
+    def test_takes_off_remaining_schedule_only(self):
+        schedule = mock.Mock()
+        with mock.patch.object(
+                site_visit_schedules, 'get_by_onschedule_model_schedule_name',
+                return_value=(None, schedule)) as get_schedule:
+            mommy.make(
+                'flourish_child.childoffschedule',
+                subject_identifier=self.subject_identifier,
+                schedule_name='child_a_quart_schedule1')
+
+        get_schedule.assert_called_once_with(
+            onschedule_model='flourish_child.onschedulechildcohortaquarterly',
+            name='child_a_quart_schedule1')
+        schedule.take_off_schedule.assert_called_once_with(
+            subject_identifier=self.subject_identifier)
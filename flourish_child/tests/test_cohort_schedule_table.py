@@ -0,0 +1,40 @@
+from django.test import TestCase, tag
+
+from ..helper_classes import CohortScheduleTable
+
+
+@tag('cst')
+class TestCohortScheduleTable(TestCase):
+
+    def setUp(self):
+        self.table = CohortScheduleTable()
+        self.table.load()
+
+    def test_naming_rules(self):
+        self.assertEqual(
+            self.table.onschedule_model_schedule_name('cohort_a_enrol'),
+            ('flourish_child.onschedulechildcohortaenrollment',
+             'child_a_enrol_schedule1'))
+        self.assertEqual(
+            self.table.onschedule_model_schedule_name('cohort_b_quarterly'),
+            ('flourish_child.onschedulechildcohortbquarterly',
+             'child_b_quart_schedule1'))
+        self.assertEqual(
+            self.table.onschedule_model_schedule_name('cohort_c_sec_qt'),
+            ('flourish_child.onschedulechildcohortcsecquart',
+             'child_c_sec_qt_schedule1'))
+        self.assertEqual(
+            self.table.onschedule_model_schedule_name('child_cohort_a_birth'),
+            ('flourish_child.onschedulechildcohortabirth',
+             'child_a_birth_schedule1'))
+
+    def test_entries_resolve(self):
+        self.assertEqual(self.table.errors, {})
+        for cohort in ['cohort_a_enrol', 'cohort_b_quarterly', 'cohort_c_sec',
+                       'cohort_a_sec_qt']:
+            self.assertIn(cohort, self.table)
+            onschedule_model, schedule = self.table.get(cohort)
+            self.assertEqual(schedule.onschedule_model, onschedule_model)
+
+    def test_unknown_cohort_key_skipped(self):
+        self.assertNotIn('cohort_d_enrol', self.table)
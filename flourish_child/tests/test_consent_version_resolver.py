@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import transaction
+from django.test import TestCase, override_settings, tag
+from edc_base.utils import get_utcnow
+from model_mommy import mommy
+
+from ..helper_classes import consent_version_resolver, side_effects
+from ..system_checks import consent_version_cache_check
+
+
+@tag('consent_version')
+@override_settings(FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT=300)
+class TestConsentVersionResolver(TestCase):
+
+    subject_identifier = 'B142-040990001-6-10'
+
+    def setUp(self):
+        consent_version_resolver.cache.clear()
+        with side_effects.suppressed():
+            self.consent = mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier=self.subject_identifier,
+                consent_datetime=get_utcnow(),
+                version='1')
+
+    def test_cached(self):
+        self.assertEqual(
+            consent_version_resolver.child_consent_version(self.subject_identifier), '1')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                consent_version_resolver.child_consent_version(
+                    self.subject_identifier), '1')
+
+    def test_invalidated_on_commit(self):
+        consent_version_resolver.child_consent_version(self.subject_identifier)
+        with self.captureOnCommitCallbacks(execute=True):
+            with side_effects.suppressed():
+                self.consent.version = '2'
+                self.consent.save()
+            # not invalidated until the save commits
+            self.assertEqual(
+                consent_version_resolver.child_consent_version(
+                    self.subject_identifier), '1')
+        self.assertEqual(
+            consent_version_resolver.child_consent_version(self.subject_identifier), '2')
+
+    def test_value_cached_before_commit_not_used_after(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with side_effects.suppressed():
+                self.consent.version = '2'
+                self.consent.save()
+            # a lookup racing the commit caches under the old generation
+            consent_version_resolver.cache.set(
+                f'{consent_version_resolver.key_prefix}:child:'
+                f'{self.subject_identifier}:0', '1')
+        self.assertEqual(
+            consent_version_resolver.child_consent_version(self.subject_identifier), '2')
+
+    def test_invalidated_on_delete(self):
+        consent_version_resolver.child_consent_version(self.subject_identifier)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.consent.delete()
+        self.assertIsNone(
+            consent_version_resolver.child_consent_version(self.subject_identifier))
+
+    def test_rollback_does_not_invalidate(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic(), side_effects.suppressed():
+                    self.consent.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+
+
+@tag('consent_version')
+class TestConsentVersionCacheCheck(TestCase):
+
+    @override_settings(FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT=0)
+    def test_no_caching_passes(self):
+        self.assertEqual(consent_version_cache_check(None), [])
+
+    def test_caching_off_by_default(self):
+        with self.settings():
+            del settings.FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT
+            self.assertEqual(consent_version_resolver.timeout, 0)
+            self.assertEqual(consent_version_cache_check(None), [])
+
+    @override_settings(FLOURISH_CHILD_CONSENT_VERSION_CACHE_TIMEOUT=300)
+    def test_per_process_cache_fails(self):
+        if not consent_version_resolver.per_process:
+            self.skipTest('the test cache is shared between processes')
+        self.assertEqual(
+            [error.id for error in consent_version_cache_check(None)],
+            ['flourish_child.E001'])
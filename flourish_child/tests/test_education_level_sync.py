@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..helper_classes import EducationLevelSync, side_effects
+from ..helper_classes.education_level_sync import EDUCATION_LEVEL_KEYS
+from ..helper_classes.export_benchmark import SyntheticCohort
+from ..models import AcademicPerformance, ChildSocioDemographic
+
+
+@tag('education_level')
+class TestEducationLevelSync(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(
+            size=3, visits_per_child=1,
+            crf_models=['flourish_child.childsociodemographic']).create()
+        socio_demographics = list(
+            ChildSocioDemographic.objects.select_related('child_visit').order_by(
+                'child_visit__subject_identifier'))
+        self.mismatched, self.matching, self.unmapped = [
+            self.make_pair(socio_demographic, socio_level, academic_level)
+            for socio_demographic, (socio_level, academic_level) in zip(
+                socio_demographics,
+                [('standard_2', 'standard_1'),
+                 ('Standard 3', 'standard_3'),
+                 ('Std Three', 'standard_1')])]
+
+    def make_pair(self, socio_demographic, socio_level, academic_level):
+        """Returns the academic performance CRF of the socio demographic
+        CRF's visit, with the levels written past the receivers.
+        """
+        with side_effects.suppressed():
+            academic_performance = mommy.make(
+                'flourish_child.academicperformance',
+                child_visit=socio_demographic.child_visit,
+                report_datetime=socio_demographic.report_datetime,
+                education_level=academic_level)
+        ChildSocioDemographic.objects.filter(pk=socio_demographic.pk).update(
+            education_level=socio_level)
+        return academic_performance
+
+    def education_level(self, academic_performance):
+        return AcademicPerformance.objects.get(
+            pk=academic_performance.pk).education_level
+
+    def test_label_and_unmapped_value(self):
+        self.assertEqual(EDUCATION_LEVEL_KEYS['Standard 3'], 'standard_3')
+        self.assertNotIn('Std Three', EDUCATION_LEVEL_KEYS)
+
+    def test_mismatched_updated(self):
+        self.assertEqual(EducationLevelSync().sync(), 1)
+        self.assertEqual(self.education_level(self.mismatched), 'standard_2')
+
+    def test_matching_once_mapped_left_alone(self):
+        modified = AcademicPerformance.objects.get(pk=self.matching.pk).modified
+        EducationLevelSync().sync()
+        academic_performance = AcademicPerformance.objects.get(pk=self.matching.pk)
+        self.assertEqual(academic_performance.education_level, 'standard_3')
+        self.assertEqual(academic_performance.modified, modified)
+
+    def test_unmapped_not_copied(self):
+        education_level_sync = EducationLevelSync()
+        education_level_sync.sync()
+        self.assertEqual(self.education_level(self.unmapped), 'standard_1')
+        self.assertEqual(
+            [obj.pk for obj in education_level_sync.unmapped], [self.unmapped.pk])
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(EducationLevelSync().sync(dry_run=True), 1)
+        self.assertEqual(self.education_level(self.mismatched), 'standard_1')
+
+    def test_limited_to_subjects(self):
+        subject_identifier = self.matching.child_visit.subject_identifier
+        self.assertEqual(EducationLevelSync([subject_identifier]).sync(), 0)
+        self.assertEqual(self.education_level(self.mismatched), 'standard_1')
+
+    def test_sync_education_levels_command(self):
+        out, err = StringIO(), StringIO()
+        call_command('sync_education_levels', stdout=out, stderr=err)
+        self.assertIn('1 academic performance CRFs updated', out.getvalue())
+        self.assertIn("'Std Three'", err.getvalue())
+        self.assertEqual(self.education_level(self.mismatched), 'standard_2')
@@ -0,0 +1,82 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_constants.constants import YES
+from model_mommy import mommy
+
+from ..helper_classes import CaregiverIdentifierMap
+
+
+@tag('export')
+class TestCaregiverIdentifierMap(TestCase):
+
+    def setUp(self):
+        self.subject_identifiers = []
+        for index in range(3):
+            maternal_dataset_obj = mommy.make_recipe(
+                'flourish_caregiver.maternaldataset',
+                delivdt=get_utcnow() - relativedelta(years=2),
+                mom_enrolldate=get_utcnow(),
+                mom_hivstatus='HIV-infected',
+                study_maternal_identifier=f'1234{index}',
+                protocol='Tshilo Dikotla')
+
+            subject_consent = mommy.make_recipe(
+                'flourish_caregiver.subjectconsent',
+                screening_identifier=maternal_dataset_obj.screening_identifier,
+                breastfeed_intent=YES,
+                biological_caregiver=YES,
+                consent_datetime=get_utcnow(),
+                version='1')
+            self.subject_identifiers.append(subject_consent.subject_identifier)
+
+    def test_resolves_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            identifier_map = CaregiverIdentifierMap(self.subject_identifiers)
+
+        for index, subject_identifier in enumerate(self.subject_identifiers):
+            identifiers = identifier_map.get(subject_identifier)
+            self.assertEqual(identifiers.previous_study, 'Tshilo Dikotla')
+            self.assertEqual(
+                identifiers.study_maternal_identifier, f'1234{index}')
+
+    def test_unknown_caregiver(self):
+        identifier_map = CaregiverIdentifierMap(['B142-000-000-0000'])
+        identifiers = identifier_map.get('B142-000-000-0000')
+        self.assertIsNone(identifiers.screening_identifier)
+        self.assertIsNone(identifiers.previous_study)
+
+    def test_resolved_identifiers_not_queried_again(self):
+        identifier_map = CaregiverIdentifierMap(self.subject_identifiers)
+        with self.assertNumQueries(0):
+            identifier_map.resolve(self.subject_identifiers)
+
+
+@tag('export')
+class TestColumnarExporter(TestCase):
+
+    def setUp(self):
+        from ..admin_site import flourish_child_admin
+        from ..helper_classes.columnar_export import ColumnarExporter
+        from ..models import ChildRequisition, ChildVisit
+
+        self.model_cls = ChildRequisition
+        self.exporter = ColumnarExporter(flourish_child_admin._registry[ChildRequisition])
+        self.child_visit = ChildVisit(
+            subject_identifier='B142-040990001-6-10', visit_code='2000')
+
+    def test_requisition_identifier_columns_not_duplicated(self):
+        names = self.exporter.schema.names
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(names[:2], ['subject_identifier', 'visit_code'])
+
+    def test_requisition_record_batch(self):
+        requisition = self.model_cls(
+            child_visit=self.child_visit,
+            subject_identifier=self.child_visit.subject_identifier,
+            item_count=1)
+        schema = self.exporter.schema
+        batch = self.exporter.record_batch([requisition, requisition], schema)
+        self.assertEqual(batch.num_rows, 2)
+        self.assertEqual(
+            batch.column(0).to_pylist(), ['B142-040990001-6-10'] * 2)
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, tag
+from django_q.models import Task
+from edc_base.utils import get_utcnow
+from model_mommy import mommy
+
+from ..constants import EXPORT_COMPLETE, EXPORT_FAILED
+from ..helper_classes import ExportArchive, side_effects, submit_archive_job
+from ..helper_classes import export_archive
+from ..helper_classes.export_jobs import archive_parts_dir
+
+
+@tag('export_archive')
+class TestExportArchive(TestCase):
+
+    model_labels = ['flourish_child.childdummysubjectconsent',
+                    'flourish_child.exportwatermark']
+
+    def setUp(self):
+        with side_effects.suppressed():
+            for index in range(2):
+                mommy.make_recipe(
+                    'flourish_child.childdummysubjectconsent',
+                    subject_identifier=f'B142-040990{index:03d}-6-10',
+                    consent_datetime=get_utcnow(),
+                    version='1')
+
+    def read_archive(self, archive):
+        with zipfile.ZipFile(archive) as zf:
+            manifest = json.loads(zf.read(ExportArchive.manifest_name))
+            files = {name: zf.read(name) for name in zf.namelist()}
+        return manifest, files
+
+    def test_archive_job_fans_out_one_task_per_model(self):
+        export_job = submit_archive_job(self.model_labels)
+
+        parts = Task.objects.filter(group=export_job.task_id)
+        self.assertCountEqual(
+            [part.args[1] for part in parts], self.model_labels)
+        self.assertTrue(all(part.success for part in parts))
+
+        export_job.refresh_from_db()
+        self.assertEqual(export_job.status, EXPORT_COMPLETE)
+        self.assertEqual(export_job.row_count, 2)
+        with export_job.document.open('rb') as f:
+            manifest, files = self.read_archive(f)
+        self.assertEqual(
+            [entry['model'] for entry in manifest['models']], self.model_labels)
+        for entry in manifest['models']:
+            self.assertNotIn('path', entry)
+            self.assertIn(entry['file'], files)
+        self.assertEqual(manifest['models'][0]['rows'], 2)
+
+    def test_archive_job_removes_parts(self):
+        export_job = submit_archive_job(self.model_labels)
+        parts_dir = f'{archive_parts_dir}/{export_job.id}'
+        if default_storage.exists(parts_dir):
+            self.assertEqual(default_storage.listdir(parts_dir)[1], [])
+
+    def test_failed_part_fails_job(self):
+        export_model_csv = export_archive.export_model_csv
+
+        def fail_watermarks(model_label, directory):
+            if model_label == 'flourish_child.exportwatermark':
+                raise OSError('disk full')
+            return export_model_csv(model_label, directory)
+
+        with mock.patch.object(export_archive, 'export_model_csv', fail_watermarks):
+            export_job = submit_archive_job(self.model_labels)
+
+        export_job.refresh_from_db()
+        self.assertEqual(export_job.status, EXPORT_FAILED)
+        self.assertIn('flourish_child.exportwatermark', export_job.error_message)
+        self.assertFalse(export_job.document)
+
+    def test_command_path_uses_worker_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.object(export_archive, 'ProcessPoolExecutor') as executor:
+            executor.return_value.__enter__.return_value.map.return_value = []
+            ExportArchive(self.model_labels, processes=2).export(directory)
+        executor.assert_called_once()
+
+    def test_daemon_process_exports_in_turn(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.object(
+                export_archive.multiprocessing, 'current_process') as current_process, \
+                mock.patch.object(export_archive, 'ProcessPoolExecutor') as executor:
+            current_process.return_value.daemon = True
+            entries = ExportArchive(self.model_labels, processes=2).export(directory)
+        executor.assert_not_called()
+        self.assertEqual(
+            [entry['model'] for entry in entries], self.model_labels)
+        self.assertCountEqual(
+            os.listdir(directory), [entry['file'] for entry in entries])
@@ -0,0 +1,260 @@
+import csv
+import datetime
+import io
+import uuid
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.db.models import ForeignKey, ManyToManyField, ManyToOneRel, OneToOneField
+from django.test import TestCase, tag
+from django.utils import timezone
+from edc_facility.import_holidays import import_holidays
+from openpyxl import load_workbook
+import xlwt
+
+from ..admin.exportaction_mixin import ModelExporter
+from ..constants import EXPORT_COMPLETE
+from ..helper_classes import CsvStreamWriter, XlsxStreamWriter, submit_export_job
+from ..helper_classes.export_benchmark import SyntheticCohort
+
+
+class CellRecorder:
+    """Stands in for an xlwt worksheet, keeping each written cell's value
+    and number format.
+    """
+
+    def __init__(self):
+        self.cells = {}
+
+    def write(self, row_num, col_num, label='', style=None):
+        self.cells[(row_num, col_num)] = (
+            label, getattr(style, 'num_format_str', None))
+
+    def rows(self):
+        rows = {}
+        for (row_num, col_num), cell in sorted(self.cells.items()):
+            rows.setdefault(row_num, []).append(cell)
+        return [rows[row_num] for row_num in sorted(rows)]
+
+
+class CellRecorderWorkbook:
+
+    def __init__(self, *args, **kwargs):
+        self.worksheet = CellRecorder()
+
+    def add_sheet(self, name):
+        return self.worksheet
+
+    def save(self, response):
+        CellRecorderWorkbook.saved = self.worksheet
+
+
+class BaselineExporter:
+    """The export before the schema, identifier map and streaming
+    rewrites, kept to check the rewritten exports cell by cell.
+    """
+
+    inline_exclude = ['_state', 'revision', 'hostname_modified', 'hostname_created',
+                      'user_modified', 'user_created', 'device_created',
+                      'device_modified']
+
+    def __init__(self, model):
+        self.model = model
+
+    def rows(self, queryset):
+        """Returns the header and data rows as raw values.
+        """
+        fields = self.model._meta.get_fields()
+        field_names = [field.name for field in fields]
+        if queryset and self.is_assent(queryset[0]):
+            field_names.insert(0, 'previous_study')
+        if queryset and getattr(queryset[0], 'child_visit', None):
+            field_names[0:0] = [
+                'subject_identifier', 'new_maternal_study_subject_identifier',
+                'old_study_maternal_identifier', 'previous_study', 'visit_code']
+
+        header, rows = list(field_names), []
+        for obj_count, obj in enumerate(queryset):
+            data = []
+            if getattr(obj, 'child_visit', None):
+                subject_identifier = obj.child_visit.subject_identifier
+                dataset = self.dataset(subject_identifier[:-3])
+                data.extend([
+                    subject_identifier, subject_identifier[:-3],
+                    getattr(dataset, 'study_maternal_identifier', None),
+                    getattr(dataset, 'protocol', None),
+                    obj.child_visit.visit_code])
+            elif self.is_assent(obj):
+                dataset = self.dataset(obj.subject_identifier[:-3])
+                data.append(getattr(dataset, 'protocol', None))
+
+            inline_objs = []
+            for field in fields:
+                if isinstance(field, ManyToManyField):
+                    data.append(', '.join(
+                        [o.name for o in getattr(obj, field.name).all()]))
+                    continue
+                if isinstance(field, (ForeignKey, OneToOneField)):
+                    data.append(getattr(obj, field.name).id)
+                    continue
+                if isinstance(field, ManyToOneRel):
+                    inline_objs = getattr(obj, f'{field.name}_set').all()
+                data.append(getattr(obj, field.name, ''))
+
+            if inline_objs:
+                inline_fields = [
+                    name for name in inline_objs[0].__dict__
+                    if name not in self.inline_exclude]
+                if obj_count == 0:
+                    header.extend(inline_fields)
+                for inline_obj in inline_objs:
+                    rows.append(data + [getattr(inline_obj, name, '')
+                                        for name in inline_fields])
+            else:
+                rows.append(data)
+        return header, rows
+
+    def cells(self, queryset):
+        """Returns the rows as the baseline wrote them to the xls sheet.
+        """
+        header, rows = self.rows(queryset)
+        font_style = xlwt.XFStyle()
+        font_style.num_format_str = 'YYYY/MM/DD h:mm:ss'
+        return ([(name, font_style.num_format_str) for name in header],
+                [[self.cell(value) for value in data] for data in rows])
+
+    @staticmethod
+    def cell(value):
+        if isinstance(value, uuid.UUID):
+            return (str(value), None)
+        if isinstance(value, datetime.datetime):
+            if value.tzinfo is not None and value.tzinfo.utcoffset(value) is not None:
+                value = timezone.make_naive(value)
+            return (value, 'YYYY/MM/DD h:mm:ss')
+        if isinstance(value, datetime.date):
+            return (value, 'YYYY/MM/DD')
+        return (value, None)
+
+    def dataset(self, caregiver_subject_identifier):
+        consent_cls = django_apps.get_model('flourish_caregiver.subjectconsent')
+        dataset_cls = django_apps.get_model('flourish_caregiver.maternaldataset')
+        consent = consent_cls.objects.filter(
+            subject_identifier=caregiver_subject_identifier).last()
+        if consent:
+            return dataset_cls.objects.filter(
+                screening_identifier=consent.screening_identifier).first()
+        return None
+
+    @staticmethod
+    def is_assent(obj):
+        return isinstance(obj, django_apps.get_model('flourish_child.childassent'))
+
+
+@tag('export')
+class TestExportLayout(TestCase):
+    """Exports a small synthetic cohort with each rewritten exporter and
+    compares it with the baseline layout.
+    """
+
+    model_labels = SyntheticCohort.crf_models + [
+        'flourish_child.childdummysubjectconsent']
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(size=2, visits_per_child=2).create()
+
+    def exports(self):
+        for model_label in self.model_labels:
+            model_cls = django_apps.get_model(model_label)
+            exporter = ModelExporter(model_cls)
+            # pages through the rows a few at a time
+            exporter.export_chunk_size = 2
+            queryset = model_cls.objects.order_by('pk')
+            self.assertTrue(queryset.exists(), model_label)
+            yield model_label, exporter, queryset
+
+    @staticmethod
+    def normalize_cell(cell):
+        """Drops the number format of empty cells, which the schema
+        writers style by column and the baseline left unstyled.
+        """
+        value, num_format_str = cell
+        return (value, None if value is None else num_format_str)
+
+    def test_xls_cells_match_baseline(self):
+        for model_label, exporter, queryset in self.exports():
+            with self.subTest(model_label=model_label):
+                header, rows = BaselineExporter(exporter.model).cells(queryset)
+                with mock.patch.object(xlwt, 'Workbook', CellRecorderWorkbook):
+                    exporter.export_as_csv(None, queryset)
+                exported = CellRecorderWorkbook.saved.rows()
+                self.assertEqual(exported[0], header)
+                self.assertCountEqual(
+                    [tuple(self.normalize_cell(cell) for cell in data)
+                     for data in exported[1:]],
+                    [tuple(self.normalize_cell(cell) for cell in data)
+                     for data in rows])
+
+    def test_export_rows_match_baseline(self):
+        for model_label, exporter, queryset in self.exports():
+            with self.subTest(model_label=model_label):
+                header, rows = BaselineExporter(exporter.model).rows(queryset)
+                exported = list(exporter.export_rows(queryset))
+                self.assertEqual(exported[0], header)
+                self.assertCountEqual(
+                    [tuple(data) for data in exported[1:]],
+                    [tuple(data) for data in rows])
+
+    def csv_rows(self, rows):
+        writer = CsvStreamWriter()
+        return [[str(writer.format_value(value)) for value in data]
+                for data in rows]
+
+    def test_streamed_csv_matches_baseline(self):
+        for model_label, exporter, queryset in self.exports():
+            with self.subTest(model_label=model_label):
+                header, rows = BaselineExporter(exporter.model).rows(queryset)
+                content = ''.join(
+                    CsvStreamWriter().stream(exporter.export_rows(queryset)))
+                exported = list(csv.reader(io.StringIO(content)))
+                self.assertEqual(exported[0], header)
+                self.assertCountEqual(exported[1:], self.csv_rows(rows))
+
+    def test_streamed_xlsx_matches_baseline(self):
+        writer = XlsxStreamWriter()
+
+        def xlsx_value(value):
+            value = writer.format_value(value)
+            if isinstance(value, datetime.date) and not isinstance(
+                    value, datetime.datetime):
+                return datetime.datetime.combine(value, datetime.time())
+            if isinstance(value, datetime.datetime):
+                return value.replace(microsecond=round(value.microsecond, -3) % 10 ** 6)
+            return value
+
+        for model_label, exporter, queryset in self.exports():
+            with self.subTest(model_label=model_label):
+                header, rows = BaselineExporter(exporter.model).rows(queryset)
+                export_file = XlsxStreamWriter().write(
+                    exporter.export_rows(queryset))
+                worksheet = load_workbook(export_file).active
+                exported = [list(data) for data in worksheet.iter_rows(values_only=True)]
+                export_file.close()
+                self.assertEqual(exported[0], header)
+                self.assertCountEqual(
+                    [tuple(xlsx_value(value) for value in data)
+                     for data in exported[1:]],
+                    [tuple(xlsx_value(value) for value in data) for data in rows])
+
+    def test_export_job_matches_baseline(self):
+        for model_label, exporter, queryset in self.exports():
+            with self.subTest(model_label=model_label):
+                header, rows = BaselineExporter(exporter.model).rows(queryset)
+                export_job = submit_export_job(queryset)
+                export_job.refresh_from_db()
+                self.assertEqual(export_job.status, EXPORT_COMPLETE)
+                self.assertEqual(export_job.row_count, len(rows))
+                with export_job.document.open('rb') as f:
+                    exported = list(csv.reader(io.StringIO(f.read().decode('utf-8'))))
+                self.assertEqual(exported[0], header)
+                self.assertCountEqual(exported[1:], self.csv_rows(rows))
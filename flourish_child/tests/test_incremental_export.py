@@ -0,0 +1,145 @@
+import os
+from io import StringIO
+import shutil
+import tempfile
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+from model_mommy import mommy
+
+from ..helper_classes import IncrementalExport, side_effects
+from ..models import ChildDummySubjectConsent, ExportWatermark
+
+
+@tag('incremental_export')
+class TestIncrementalExport(TestCase):
+
+    consumer = 'warehouse'
+
+    def setUp(self):
+        self.started = get_utcnow() - relativedelta(days=2)
+        with side_effects.suppressed():
+            self.consents = [
+                mommy.make_recipe(
+                    'flourish_child.childdummysubjectconsent',
+                    subject_identifier=f'B142-040990{index:03d}-6-10',
+                    consent_datetime=get_utcnow(),
+                    version='1') for index in range(3)]
+        ChildDummySubjectConsent.objects.update(modified=self.started)
+
+    def export(self, until=None):
+        return IncrementalExport(
+            ChildDummySubjectConsent, self.consumer, until=until)
+
+    def test_first_export_takes_all_rows(self):
+        incremental_export = self.export()
+        self.assertIsNone(incremental_export.watermark)
+        self.assertEqual(incremental_export.changed().count(), 3)
+        self.assertEqual(list(incremental_export.deleted()), [])
+
+    def test_watermark_advances(self):
+        until = self.started + relativedelta(days=1)
+        self.export(until=until).commit(row_count=3)
+        self.assertEqual(self.export().watermark, until)
+
+        later = until + relativedelta(hours=1)
+        self.export(until=later).commit()
+        self.assertEqual(self.export().watermark, later)
+        self.assertEqual(
+            ExportWatermark.objects.filter(consumer=self.consumer).count(), 1)
+
+    def test_modified_since_last_export_picked_up(self):
+        watermark = self.started + relativedelta(days=1)
+        self.export(until=watermark).commit(row_count=3)
+        ChildDummySubjectConsent.objects.filter(pk=self.consents[1].pk).update(
+            modified=watermark + relativedelta(hours=1))
+
+        self.assertEqual(
+            list(self.export().changed().values_list('pk', flat=True)),
+            [self.consents[1].pk])
+
+    def test_rows_saved_after_until_left_for_next_export(self):
+        until = self.started + relativedelta(days=1)
+        ChildDummySubjectConsent.objects.filter(pk=self.consents[0].pk).update(
+            modified=until + relativedelta(hours=1))
+        self.assertEqual(self.export(until=until).changed().count(), 2)
+
+    def test_deleted_since_last_export(self):
+        self.export(until=get_utcnow()).commit(row_count=3)
+        with side_effects.suppressed():
+            self.consents[2].delete()
+
+        deleted = list(self.export().deleted())
+        self.assertEqual([pk for pk, _ in deleted], [self.consents[2].pk])
+
+    def test_other_consumer_watermark_independent(self):
+        self.export(until=get_utcnow()).commit(row_count=3)
+        self.assertEqual(
+            IncrementalExport(ChildDummySubjectConsent, 'reports').changed().count(), 3)
+
+
+@tag('incremental_export')
+class TestExportIncrementalCommand(TestCase):
+
+    consumer = 'warehouse'
+    model_label = 'flourish_child.childdummysubjectconsent'
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        with side_effects.suppressed():
+            self.consent = mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier='B142-040990001-6-10',
+                consent_datetime=get_utcnow(),
+                version='1')
+
+    def export_incremental(self, *args):
+        call_command(
+            'export_incremental', self.model_label, '--consumer', self.consumer,
+            '--output-dir', self.output_dir, *args, stdout=StringIO())
+
+    def watermark(self):
+        return ExportWatermark.objects.filter(
+            model_label=self.model_label, consumer=self.consumer).first()
+
+    def test_export_moves_watermark(self):
+        self.export_incremental()
+        watermark = self.watermark()
+        self.assertEqual(watermark.row_count, 1)
+        self.assertGreaterEqual(watermark.watermark, self.consent.modified)
+        self.assertEqual(
+            len([name for name in os.listdir(self.output_dir)
+                 if name.endswith('-changes.csv')]), 1)
+
+    def test_second_export_only_takes_changes(self):
+        self.export_incremental()
+        first = self.watermark().watermark
+        self.export_incremental()
+        self.assertEqual(self.watermark().row_count, 0)
+        self.assertGreaterEqual(self.watermark().watermark, first)
+
+    def test_dry_run_keeps_watermark(self):
+        self.export_incremental('--dry-run')
+        self.assertIsNone(self.watermark())
+
+    def test_failed_export_keeps_watermark(self):
+        self.export_incremental()
+        watermark = self.watermark().watermark
+        with mock.patch(
+                'flourish_child.management.commands.export_incremental.write_csv',
+                side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.export_incremental()
+        self.assertEqual(self.watermark().watermark, watermark)
+        self.assertEqual(self.watermark().row_count, 1)
+
+    def test_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command('export_incremental', 'flourish_child.unknown',
+                         '--consumer', self.consumer,
+                         '--output-dir', self.output_dir)
@@ -0,0 +1,171 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.test import RequestFactory, TestCase, tag
+from edc_base.utils import get_utcnow
+from edc_facility.import_holidays import import_holidays
+from model_mommy import mommy
+
+from ..admin_site import flourish_child_admin
+from ..helper_classes import side_effects
+from ..helper_classes.export_benchmark import SyntheticCohort
+from ..models import AcademicPerformance, Appointment, ChildSocioDemographic
+
+
+def walk_back_previous_instance(model_admin, appointment):
+    """The previous instance lookup as it was before it became a single
+    query: steps back one scheduled appointment at a time until one has
+    an instance of the model.
+    """
+    obj = None
+    while appointment:
+        options = {
+            '{}__appointment'.format(model_admin.model.visit_model_attr()):
+            model_admin.get_previous_appt_instance(appointment)}
+        try:
+            obj = model_admin.model.objects.get(**options)
+        except ObjectDoesNotExist:
+            pass
+        else:
+            break
+        appointment = model_admin.get_previous_appt_instance(appointment)
+    return obj
+
+
+@tag('admin_previous_instance')
+class TestPreviousInstance(TestCase):
+
+    crf_model = 'flourish_child.childsociodemographic'
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(size=1, visits_per_child=1, crf_models=[self.crf_model]).create()
+        self.subject_identifier = Appointment.objects.values_list(
+            'subject_identifier', flat=True).first()
+        self.model_admin = flourish_child_admin._registry[ChildSocioDemographic]
+
+        # the enrolment visit put the child on the quarterly schedule
+        enrolment = self.appointments()[0]
+        self.first, self.missing, self.current = [
+            appointment for appointment in self.appointments()
+            if appointment.timepoint > enrolment.timepoint
+            and appointment.schedule_name[:7] == enrolment.schedule_name[:7]
+            and self.crf_model in [crf.model for crf in appointment.visit.crfs]][:3]
+        self.first_crf = self.capture(self.first)
+        # a visit without the CRF between the first and the current
+        self.capture(self.missing, crf=False)
+        self.unscheduled = self.make_unscheduled(self.missing)
+        self.unscheduled_crf = self.capture(self.unscheduled)
+
+    def appointments(self):
+        return list(Appointment.objects.filter(
+            subject_identifier=self.subject_identifier,
+            visit_code_sequence=0).order_by('timepoint'))
+
+    def capture(self, appointment, crf=True):
+        with side_effects.suppressed():
+            child_visit = mommy.make_recipe(
+                'flourish_child.childvisit',
+                appointment=appointment,
+                report_datetime=get_utcnow())
+            if crf:
+                return mommy.make(
+                    self.crf_model, child_visit=child_visit,
+                    report_datetime=child_visit.report_datetime)
+        return None
+
+    def make_unscheduled(self, appointment):
+        """Returns an unscheduled appointment at the timepoint of
+        `appointment`, written without the appointment save rules.
+        """
+        unscheduled = Appointment(
+            subject_identifier=appointment.subject_identifier,
+            visit_schedule_name=appointment.visit_schedule_name,
+            schedule_name=appointment.schedule_name,
+            visit_code=appointment.visit_code,
+            visit_code_sequence=1,
+            timepoint=appointment.timepoint,
+            timepoint_datetime=appointment.timepoint_datetime,
+            appt_datetime=appointment.appt_datetime,
+            facility_name=appointment.facility_name,
+            site=appointment.site)
+        Appointment.objects.bulk_create([unscheduled])
+        return Appointment.objects.get(
+            subject_identifier=appointment.subject_identifier,
+            schedule_name=appointment.schedule_name,
+            visit_code=appointment.visit_code,
+            visit_code_sequence=1)
+
+    def test_skips_missing_crf_and_unscheduled_visit(self):
+        self.assertEqual(
+            self.model_admin.previous_instance(self.current), self.first_crf)
+
+    def test_matches_walk_back(self):
+        for appointment in self.appointments() + [self.unscheduled]:
+            self.assertEqual(
+                self.model_admin.previous_instance(appointment),
+                walk_back_previous_instance(self.model_admin, appointment),
+                appointment)
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            self.model_admin.previous_instance(self.current)
+
+
+@tag('admin_previous_instance')
+class TestPreviousInstancePerRequest(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(
+            size=1, visits_per_child=1,
+            crf_models=['flourish_child.childsociodemographic']).create()
+        self.appointment = Appointment.objects.filter(
+            visit_code_sequence=0).order_by('timepoint').first()
+        self.user = User.objects.create_superuser('reviewer', 'r@example.com', 'pass')
+
+    def request(self):
+        request = RequestFactory().get(
+            '/', {'appointment': str(self.appointment.pk)})
+        request.user = self.user
+        return request
+
+    def test_get_key_looks_up_once(self):
+        model_admin = flourish_child_admin._registry[ChildSocioDemographic]
+        request = self.request()
+        # the appointment, then the previous instance
+        with self.assertNumQueries(2):
+            model_admin.get_key(request)
+        with self.assertNumQueries(0):
+            model_admin.get_key(request)
+            model_admin.get_previous_instance(request)
+            model_admin.get_instance(request)
+
+    def test_get_key_and_get_form_share_lookup(self):
+        model_admin = flourish_child_admin._registry[ChildSocioDemographic]
+        request = self.request()
+        with mock.patch.object(
+                model_admin, 'previous_instance',
+                wraps=model_admin.previous_instance) as previous_instance:
+            model_admin.get_key(request)
+            form = model_admin.get_form(request)
+        previous_instance.assert_called_once_with(self.appointment)
+        self.assertEqual(
+            form.previous_instance, model_admin.get_previous_instance(request))
+
+    def test_get_keys_and_get_form_share_lookup(self):
+        model_admin = flourish_child_admin._registry[AcademicPerformance]
+        request = self.request()
+        with mock.patch.object(
+                model_admin, 'previous_instance',
+                wraps=model_admin.previous_instance) as previous_instance:
+            model_admin.get_keys(request)
+            model_admin.get_form(request)
+        previous_instance.assert_called_once_with(self.appointment)
+
+    def test_new_request_looks_up_again(self):
+        model_admin = flourish_child_admin._registry[ChildSocioDemographic]
+        model_admin.get_previous_instance(self.request())
+        with self.assertNumQueries(2):
+            model_admin.get_previous_instance(self.request())
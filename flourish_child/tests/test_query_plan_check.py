@@ -0,0 +1,134 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, tag
+from edc_appointment.model_mixins import AppointmentModelMixin
+from edc_base.utils import get_utcnow
+from edc_consent.model_mixins import ConsentModelMixin
+from edc_visit_tracking.model_mixins import VisitModelMixin
+from model_mommy import mommy
+
+from ..helper_classes import side_effects
+from ..helper_classes.query_plan_check import QueryPlan, QueryPlanCheck
+from ..models import Appointment, ChildDummySubjectConsent, ChildVisit
+
+
+@tag('query_plans')
+class TestQueryPlanCheck(TestCase):
+
+    subject_identifier = 'B142-040990001-6-10'
+
+    def setUp(self):
+        with side_effects.suppressed():
+            mommy.make_recipe(
+                'flourish_child.childdummysubjectconsent',
+                subject_identifier=self.subject_identifier,
+                consent_datetime=get_utcnow(),
+                version='1')
+
+    def index_names(self, model_cls):
+        return [index.name for index in model_cls._meta.indexes]
+
+    def test_inherited_indexes_kept(self):
+        for model_cls, parent_indexes, index_name in [
+                (ChildVisit, VisitModelMixin.Meta.indexes,
+                 'child_visit_subject_code_idx'),
+                (ChildDummySubjectConsent, ConsentModelMixin.Meta.indexes,
+                 'child_consent_subject_dt_idx'),
+                (Appointment, AppointmentModelMixin.Meta.indexes,
+                 'child_appt_subj_seq_sched_idx')]:
+            index_names = self.index_names(model_cls)
+            self.assertIn(index_name, index_names)
+            for index in parent_indexes:
+                self.assertIn(index.name, index_names)
+
+    def test_appointment_index_covers_previous_timepoint_lookup(self):
+        index = [index for index in Appointment._meta.indexes
+                 if index.name == 'child_appt_subj_seq_sched_idx'][0]
+        self.assertEqual(
+            index.fields,
+            ['subject_identifier', 'visit_code_sequence', 'schedule_name',
+             'timepoint'])
+
+    def test_subject_identifier_from_data(self):
+        self.assertEqual(
+            QueryPlanCheck().subject_identifier, self.subject_identifier)
+        self.assertEqual(
+            QueryPlanCheck('B142-040990002-6-10').subject_identifier,
+            'B142-040990002-6-10')
+
+    def test_plan_for_each_hot_query(self):
+        query_plan_check = QueryPlanCheck()
+        plans = query_plan_check.check()
+        self.assertEqual(
+            [plan.name for plan in plans],
+            [name for name, _ in query_plan_check.hot_queries()])
+        self.assertIn(
+            'onschedulechildcohortaenrollment by subject',
+            [plan.name for plan in plans])
+        for plan in plans:
+            self.assertTrue(plan.plan)
+
+    def test_indexed_lookups_not_full_scans(self):
+        plans = {plan.name: plan for plan in QueryPlanCheck().check()}
+        for name in ['childdummysubjectconsent by subject, latest',
+                     'appointment previous timepoint']:
+            self.assertFalse(plans[name].full_scan, plans[name].plan)
+
+    def test_full_scan_patterns(self):
+        patterns = QueryPlanCheck.full_scan_patterns
+        self.assertTrue(patterns['postgresql'].search(
+            'Seq Scan on flourish_child_appointment'))
+        self.assertFalse(patterns['postgresql'].search(
+            'Index Scan using child_appt_subj_seq_sched_idx'))
+        self.assertTrue(patterns['mysql'].search(
+            '1\tSIMPLE\tflourish_child_appointment\tALL\tNULL'))
+        self.assertTrue(patterns['sqlite'].search(
+            '2 0 0 SCAN flourish_child_appointment'))
+        self.assertFalse(patterns['sqlite'].search(
+            '2 0 0 SEARCH flourish_child_appointment USING INDEX '
+            'child_appt_subj_seq_sched_idx (subject_identifier=?)'))
+        self.assertFalse(patterns['sqlite'].search(
+            '2 0 0 SCAN flourish_child_appointment USING COVERING INDEX '
+            'child_appt_subj_seq_sched_idx'))
+
+    def test_unknown_vendor_not_flagged(self):
+        with mock.patch.object(connection, 'vendor', 'oracle'):
+            plans = QueryPlanCheck().check()
+        self.assertFalse(any(plan.full_scan for plan in plans))
+
+
+@tag('query_plans')
+class TestCheckQueryPlansCommand(TestCase):
+
+    plans = [QueryPlan('appointment previous timepoint', 'SEARCH ...', False),
+             QueryPlan('childoffschedule by subject', 'SCAN ...', True)]
+
+    def call_command(self, *args):
+        out = StringIO()
+        with mock.patch.object(QueryPlanCheck, 'check', return_value=self.plans):
+            call_command('check_query_plans', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reports_full_scans(self):
+        out = self.call_command()
+        self.assertIn('ok         appointment previous timepoint', out)
+        self.assertIn('FULL SCAN  childoffschedule by subject', out)
+        self.assertIn('    SCAN ...', out)
+        self.assertNotIn('    SEARCH ...', out)
+        self.assertIn('2 lookups checked, 1 full scans.', out)
+
+    def test_verbose_prints_every_plan(self):
+        self.assertIn('    SEARCH ...', self.call_command('--verbosity', '2'))
+
+    def test_fail(self):
+        with self.assertRaisesMessage(CommandError, '1 lookups scan a whole table.'):
+            self.call_command('--fail')
+
+    def test_runs_against_the_database(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('lookups checked', out.getvalue())
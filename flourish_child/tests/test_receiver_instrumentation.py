@@ -0,0 +1,60 @@
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, tag
+from edc_base.utils import get_utcnow
+
+from ..helper_classes import receiver_instrumentation
+from ..models import ReceiverTiming
+
+
+@tag('receiver_timings')
+class TestReceiverTimingSummary(TestCase):
+
+    def setUp(self):
+        for duration in range(1, 11):
+            ReceiverTiming.objects.create(
+                dispatch_uid='child_visit_on_post_save', sender='flourish_child.childvisit',
+                duration=duration, query_count=duration * 2,
+                exception='ValueError: failed' if duration == 10 else None)
+        ReceiverTiming.objects.create(
+            dispatch_uid='child_consent_on_post_save',
+            sender='flourish_child.childdummysubjectconsent',
+            duration=500, query_count=40)
+        ReceiverTiming.objects.filter(
+            dispatch_uid='child_consent_on_post_save').update(
+                created=get_utcnow() - relativedelta(days=2))
+
+    def test_summary_aggregates(self):
+        row, = receiver_instrumentation.summary(ReceiverTiming.objects.all())
+        self.assertEqual(row['dispatch_uid'], 'child_visit_on_post_save')
+        self.assertEqual(row['calls'], 10)
+        self.assertEqual(row['errors'], 1)
+        self.assertEqual(row['mean'], 5.5)
+        self.assertEqual(row['max'], 10)
+        self.assertEqual(row['p50'], 5)
+        self.assertEqual(row['p90'], 9)
+        self.assertEqual(row['queries'], 110)
+        self.assertEqual(row['queries_mean'], 11)
+        self.assertEqual(row['queries_max'], 20)
+
+    def test_summary_window(self):
+        summary = receiver_instrumentation.summary(
+            ReceiverTiming.objects.all(), since=get_utcnow() - relativedelta(days=3))
+        self.assertEqual(
+            [row['dispatch_uid'] for row in summary],
+            ['child_consent_on_post_save', 'child_visit_on_post_save'])
+
+    def test_percentiles_from_recent_sample(self):
+        sample_size = receiver_instrumentation.sample_size
+        receiver_instrumentation.sample_size = 5
+        self.addCleanup(setattr, receiver_instrumentation, 'sample_size', sample_size)
+        ReceiverTiming.objects.filter(duration__lte=5).update(
+            created=get_utcnow() - relativedelta(hours=1))
+
+        row, = receiver_instrumentation.summary(ReceiverTiming.objects.all())
+        self.assertEqual(row['calls'], 10)
+        self.assertEqual(row['p50'], 8)
+
+    def test_summary_queries_bounded(self):
+        # the aggregate, then one sample per receiver
+        with self.assertNumQueries(2):
+            receiver_instrumentation.summary(ReceiverTiming.objects.all())
@@ -0,0 +1,76 @@
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+
+from ..helper_classes import ScheduleSimulator, SubjectSnapshots, cohort_schedule_table
+from ..helper_classes.export_benchmark import SyntheticCohort
+from ..models import Appointment, ChildDummySubjectConsent
+
+
+@tag('schedule_simulator')
+class TestScheduleSimulator(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        # consented and on schedule, with the enrolment visit captured
+        SyntheticCohort(size=2, visits_per_child=1).create()
+        self.subject_identifiers = list(
+            ChildDummySubjectConsent.objects.order_by(
+                'subject_identifier').values_list('subject_identifier', flat=True))
+        self.simulations = [
+            ScheduleSimulator().simulate(snapshot)
+            for snapshot in SubjectSnapshots(self.subject_identifiers)]
+
+    def appointments(self, subject_identifier):
+        return Appointment.objects.filter(
+            subject_identifier=subject_identifier, visit_code_sequence=0)
+
+    def test_no_errors(self):
+        self.assertEqual(len(self.simulations), 2)
+        for simulation in self.simulations:
+            self.assertEqual(simulation.errors, [])
+            self.assertTrue(simulation.placements)
+
+    def test_timepoints_match_put_on_schedule(self):
+        for simulation in self.simulations:
+            simulated = sorted(
+                (placement.schedule_name, visit_code, timepoint_datetime)
+                for placement in simulation.placements
+                for visit_code, timepoint_datetime in placement.appointments)
+            self.assertEqual(
+                simulated,
+                sorted(self.appointments(simulation.subject_identifier).values_list(
+                    'schedule_name', 'visit_code', 'timepoint_datetime')))
+
+    def test_appt_datetimes_within_visit_window(self):
+        # the facility may move an appointment off its timepoint, but not
+        # out of the visit window
+        for simulation in self.simulations:
+            appt_datetimes = dict(
+                ((schedule_name, visit_code), appt_datetime)
+                for schedule_name, visit_code, appt_datetime in self.appointments(
+                    simulation.subject_identifier).values_list(
+                        'schedule_name', 'visit_code', 'appt_datetime'))
+            for placement in simulation.placements:
+                _, schedule = cohort_schedule_table.get(placement.cohort)
+                for visit_code, timepoint_datetime in placement.appointments:
+                    visit = schedule.visits.get(visit_code)
+                    appt_datetime = appt_datetimes[
+                        (placement.schedule_name, visit_code)]
+                    self.assertGreaterEqual(
+                        appt_datetime.date(),
+                        (timepoint_datetime - visit.rlower).date())
+                    self.assertLessEqual(
+                        appt_datetime.date(),
+                        (timepoint_datetime + visit.rupper).date())
+
+    def test_simulated_visits_match_captured_visits(self):
+        simulated = [
+            ScheduleSimulator().simulate(snapshot)
+            for snapshot in SubjectSnapshots(
+                self.subject_identifiers, simulate_visits=True)]
+        self.assertEqual(
+            [[(placement.schedule_name, placement.trigger)
+              for placement in simulation.placements] for simulation in simulated],
+            [[(placement.schedule_name, placement.trigger)
+              for placement in simulation.placements]
+             for simulation in self.simulations])
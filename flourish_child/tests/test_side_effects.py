@@ -0,0 +1,261 @@
+from types import SimpleNamespace
+import tempfile
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.core import serializers
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings, tag
+from edc_action_item.site_action_items import site_action_items
+from edc_base.utils import get_utcnow
+from edc_constants.constants import YES
+from edc_facility.import_holidays import import_holidays
+from edc_visit_tracking.constants import SCHEDULED
+from flourish_prn.action_items import CHILD_DEATH_REPORT_ACTION
+from model_mommy import mommy
+
+from ..helper_classes import SideEffectQueue, side_effects
+from ..helper_classes.side_effects import load_signal_kwargs
+from ..models import Appointment, ChildDummySubjectConsent, ChildVisit
+from ..models import SideEffectFailure
+
+
+@tag('side_effects')
+@override_settings(FLOURISH_CHILD_SIDE_EFFECTS={'mode': 'on_commit', 'retries': 3})
+class TestSideEffectQueue(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.queue = SideEffectQueue()
+        self.queue.register(
+            'test_side_effect',
+            lambda sender, instance, **kwargs: self.calls.append(kwargs))
+        self.instance = SimpleNamespace(pk=1, subject_identifier='B142-040990001-6-10')
+
+    def save(self, **kwargs):
+        self.queue.enqueue(
+            'test_side_effect', ChildVisit, self.instance,
+            update_fields=kwargs.pop('update_fields', None), raw=False, **kwargs)
+
+    def test_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.save(created=True)
+            self.assertEqual(self.calls, [])
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(self.calls[0]['created'])
+
+    def test_create_then_save_runs_once_as_created(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.save(created=True)
+            self.save(created=False)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(self.calls[0]['created'])
+
+    def test_update_fields_merged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.save(created=False, update_fields=frozenset(['a']))
+            self.save(created=False, update_fields=frozenset(['b']))
+        self.assertEqual(self.calls[0]['update_fields'], frozenset(['a', 'b']))
+
+    def test_rollback_runs_and_keeps_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.save(created=True)
+                    raise ValueError
+            except ValueError:
+                pass
+            self.assertIsNone(self.queue.queued(
+                self.queue.key('test_side_effect', self.instance)))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.calls, [])
+
+    def test_save_after_rollback_queued_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.save(created=True)
+                    raise ValueError
+            except ValueError:
+                pass
+            self.save(created=False)
+        self.assertEqual(len(self.calls), 1)
+        self.assertFalse(self.calls[0]['created'])
+
+    def test_failed_attempts_retried(self):
+        attempts = []
+
+        def flaky(sender, instance, **kwargs):
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ValueError
+        self.queue.register('flaky_side_effect', flaky)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.enqueue('flaky_side_effect', ChildVisit, self.instance,
+                               created=True)
+        self.assertEqual(len(attempts), 2)
+
+    def test_failure_after_retries_recorded(self):
+        def failing(sender, instance, **kwargs):
+            raise ValueError('failed')
+        self.queue.register('failing_side_effect', failing)
+        instance = ChildVisit(subject_identifier='B142-040990001-6-10')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.enqueue('failing_side_effect', ChildVisit, instance,
+                               created=True, update_fields=frozenset(['reason']),
+                               raw=False)
+
+        failure = SideEffectFailure.objects.get(dispatch_uid='failing_side_effect')
+        self.assertEqual(failure.object_id, str(instance.pk))
+        self.assertEqual(failure.subject_identifier, instance.subject_identifier)
+        self.assertEqual(failure.exception, 'ValueError: failed')
+        self.assertEqual(
+            load_signal_kwargs(failure.signal_kwargs),
+            {'created': True, 'update_fields': frozenset(['reason']), 'raw': False})
+
+    def test_zero_attempts_not_replaced_by_default(self):
+        self.queue.run('test_side_effect', ChildVisit, self.instance, attempts=0)
+        self.assertEqual(self.calls, [])
+
+    def test_queued_lookup_does_not_scan_callbacks(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for pk in range(50):
+                self.queue.enqueue(
+                    'test_side_effect', ChildVisit,
+                    SimpleNamespace(pk=pk, subject_identifier=None),
+                    created=True, raw=False)
+            with mock.patch.object(
+                    transaction, 'get_connection',
+                    side_effect=AssertionError('scanned the callbacks')):
+                self.assertIsNotNone(self.queue.queued(
+                    self.queue.key('test_side_effect', SimpleNamespace(
+                        pk=49, subject_identifier=None))))
+        self.assertEqual(len(callbacks), 50)
+        self.assertEqual(len(self.calls), 50)
+
+    def test_save_by_receiver_queued_afresh(self):
+        key = self.queue.key('test_side_effect', self.instance)
+        queued = []
+
+        def resave(sender, instance, **kwargs):
+            self.calls.append(kwargs)
+            queued.append(self.queue.queued(key))
+            self.save(created=False)
+            queued.append(self.queue.queued(key))
+        self.queue.register('test_side_effect', resave)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.save(created=True)
+        self.assertEqual(len(self.calls), 1)
+        self.assertIsNone(queued[0])
+        self.assertIsNotNone(queued[1])
+        self.assertFalse(queued[1].kwargs['created'])
+
+
+@tag('side_effects')
+class TestBulkLoadFailures(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.queue = SideEffectQueue()
+        self.queue.register('failing_side_effect', self.fail)
+        self.queue.register(
+            'test_side_effect',
+            lambda sender, instance, **kwargs: self.calls.append(kwargs))
+
+    def fail(self, sender, instance, **kwargs):
+        raise ValueError('failed')
+
+    def test_failure_does_not_stop_other_calls(self):
+        with self.queue.bulk_load() as failures:
+            for pk in [1, 2]:
+                instance = SimpleNamespace(pk=pk, subject_identifier=None)
+                self.queue.enqueue(
+                    'failing_side_effect', ChildVisit, instance, raw=False)
+                self.queue.enqueue(
+                    'test_side_effect', ChildVisit, instance, raw=False,
+                    created=True)
+                self.queue.enqueue(
+                    'test_side_effect', ChildVisit, instance, raw=False,
+                    created=False)
+        self.assertEqual(len(failures), 2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertTrue(all(kwargs['created'] for kwargs in self.calls))
+
+
+@tag('side_effects')
+class TestLoaddataBulk(TestCase):
+
+    def setUp(self):
+        import_holidays()
+
+        maternal_dataset_obj = mommy.make_recipe(
+            'flourish_caregiver.maternaldataset',
+            delivdt=get_utcnow() - relativedelta(years=2, months=5),
+            mom_enrolldate=get_utcnow(),
+            mom_hivstatus='HIV-infected',
+            study_maternal_identifier='89721',
+            protocol='Tshilo Dikotla')
+
+        mommy.make_recipe(
+            'flourish_child.childdataset',
+            dob=get_utcnow() - relativedelta(years=2, months=5),
+            infant_hiv_exposed='Exposed',
+            infant_enrolldate=get_utcnow(),
+            study_maternal_identifier='89721',
+            study_child_identifier='1234')
+
+        mommy.make_recipe(
+            'flourish_caregiver.screeningpriorbhpparticipants',
+            screening_identifier=maternal_dataset_obj.screening_identifier)
+
+        subject_consent = mommy.make_recipe(
+            'flourish_caregiver.subjectconsent',
+            screening_identifier=maternal_dataset_obj.screening_identifier,
+            breastfeed_intent=YES,
+            consent_datetime=get_utcnow(),
+            version='2')
+
+        self.subject_identifier = mommy.make_recipe(
+            'flourish_caregiver.caregiverchildconsent',
+            subject_consent=subject_consent,
+            version='2').subject_identifier
+
+        with side_effects.bulk_load():
+            mommy.make_recipe(
+                'flourish_caregiver.caregiverpreviouslyenrolled',
+                subject_identifier=subject_consent.subject_identifier)
+            ChildDummySubjectConsent.objects.get(
+                subject_identifier=self.subject_identifier).save()
+
+    def test_bulk_load_puts_on_schedule(self):
+        self.assertTrue(Appointment.objects.filter(
+            subject_identifier=self.subject_identifier,
+            visit_code='2000').exists())
+
+    def test_loaddata_bulk_reconciles_action_items(self):
+        with side_effects.suppressed():
+            child_visit = mommy.make_recipe(
+                'flourish_child.childvisit',
+                appointment=Appointment.objects.get(
+                    subject_identifier=self.subject_identifier, visit_code='2000'),
+                report_datetime=get_utcnow(),
+                reason=SCHEDULED,
+                survival_status='dead')
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fixture:
+            fixture.write(serializers.serialize('json', [child_visit]))
+            fixture.flush()
+            child_visit.delete()
+            call_command('loaddata_bulk', fixture.name, verbosity=0)
+
+        self.assertTrue(ChildVisit.objects.filter(pk=child_visit.pk).exists())
+        self.assertTrue(Appointment.objects.filter(
+            subject_identifier=self.subject_identifier,
+            visit_code='2000').exists())
+        action_item_cls = site_action_items.get(
+            CHILD_DEATH_REPORT_ACTION).action_item_model_cls()
+        self.assertTrue(action_item_cls.objects.filter(
+            subject_identifier=self.subject_identifier,
+            action_type__name=CHILD_DEATH_REPORT_ACTION).exists())
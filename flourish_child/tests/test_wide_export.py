@@ -0,0 +1,120 @@
+import csv
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+
+from ..helper_classes import WideExport
+from ..helper_classes.export_benchmark import SyntheticCohort
+from ..models import ChildClinicalMeasurements, ChildSocioDemographic, ChildVisit
+
+
+@tag('wide_export')
+class TestWideExport(TestCase):
+
+    crf_fields = {
+        'flourish_child.childsociodemographic': ['stay_with_caregiver'],
+        'flourish_child.childclinicalmeasurements': ['child_weight_kg', 'child_height']}
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(
+            size=2, visits_per_child=2,
+            crf_models=list(self.crf_fields)).create()
+
+    def rows(self, **kwargs):
+        rows = list(WideExport(crf_fields=self.crf_fields, **kwargs).rows())
+        return rows[0], rows[1:]
+
+    def test_column_layout(self):
+        header, _ = self.rows()
+        self.assertEqual(
+            header,
+            ['subject_identifier', 'visit_code', 'visit_code_sequence',
+             'schedule_name', 'report_datetime',
+             'childsociodemographic__stay_with_caregiver',
+             'childclinicalmeasurements__child_weight_kg',
+             'childclinicalmeasurements__child_height'])
+
+    def test_one_row_per_subject_visit(self):
+        header, rows = self.rows()
+        visits = ChildVisit.objects.values_list(
+            'subject_identifier', 'visit_code', 'visit_code_sequence')
+        self.assertEqual(len(rows), visits.count())
+        self.assertCountEqual([tuple(row[:3]) for row in rows], list(visits))
+        self.assertEqual(
+            len({row[0] for row in rows}),
+            visits.values('subject_identifier').distinct().count())
+
+    def test_crf_values_joined_to_their_visit(self):
+        header, rows = self.rows()
+        weight = header.index('childclinicalmeasurements__child_weight_kg')
+        for crf in ChildClinicalMeasurements.objects.select_related('child_visit'):
+            row, = [row for row in rows
+                    if row[0] == crf.child_visit.subject_identifier
+                    and row[1] == crf.child_visit.visit_code]
+            self.assertEqual(row[weight], crf.child_weight_kg)
+
+    def test_missing_timepoint_left_empty(self):
+        crf = ChildSocioDemographic.objects.select_related('child_visit').first()
+        child_visit = crf.child_visit
+        crf.delete()
+
+        header, rows = self.rows()
+        column = header.index('childsociodemographic__stay_with_caregiver')
+        row, = [row for row in rows
+                if row[0] == child_visit.subject_identifier
+                and row[1] == child_visit.visit_code]
+        self.assertIsNone(row[column])
+        self.assertEqual(
+            len([row for row in rows if row[column] is not None]),
+            ChildSocioDemographic.objects.count())
+
+    def test_subject_missing_visit(self):
+        child_visit = ChildVisit.objects.order_by('-report_datetime').first()
+        visit_queryset = ChildVisit.objects.exclude(pk=child_visit.pk)
+
+        _, rows = self.rows(visit_queryset=visit_queryset)
+        self.assertEqual(len(rows), visit_queryset.count())
+        self.assertNotIn(
+            (child_visit.subject_identifier, child_visit.visit_code),
+            [(row[0], row[1]) for row in rows])
+
+    def test_reads_each_crf_once(self):
+        wide_export = WideExport(crf_fields=self.crf_fields)
+        # one query per CRF model and one for the visits
+        with self.assertNumQueries(len(self.crf_fields) + 1):
+            list(wide_export.rows())
+
+
+@tag('wide_export')
+class TestExportWideCommand(TestCase):
+
+    def setUp(self):
+        import_holidays()
+        SyntheticCohort(
+            size=2, visits_per_child=2,
+            crf_models=['flourish_child.childclinicalmeasurements']).create()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def test_export_wide(self):
+        output = os.path.join(self.output_dir, 'wide.csv')
+        subject_identifier = ChildVisit.objects.values_list(
+            'subject_identifier', flat=True).first()
+        call_command(
+            'export_wide', output,
+            '--crf', 'flourish_child.childclinicalmeasurements:child_weight_kg',
+            '--subject-identifier', subject_identifier, stdout=StringIO())
+
+        with open(output, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][-1], 'childclinicalmeasurements__child_weight_kg')
+        self.assertEqual(
+            len(rows) - 1,
+            ChildVisit.objects.filter(subject_identifier=subject_identifier).count())
+        self.assertEqual({row[0] for row in rows[1:]}, {subject_identifier})
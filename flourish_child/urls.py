@@ -3,9 +3,13 @@ from django.views.generic.base import RedirectView
 
 from flourish_child.admin_site import flourish_child_admin
 
+from .views import export_job_download
+
 app_name = 'flourish_child'
 
 urlpatterns = [
     path('admin/', flourish_child_admin.urls),
+    path('export/<uuid:export_job_id>/download/', export_job_download,
+         name='export_job_download'),
     path('', RedirectView.as_view(url='admin/'), name='home_url'),
 ]
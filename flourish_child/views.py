@@ -0,0 +1,23 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+
+from .constants import EXPORT_COMPLETE
+from .models import ExportJob
+
+
+@staff_member_required
+def export_job_download(request, export_job_id):
+    """Streams the file built by a completed export job.
+    """
+    export_job = get_object_or_404(ExportJob, id=export_job_id)
+    if (not request.user.is_superuser
+            and export_job.user_created != request.user.username):
+        raise Http404('Export not found.')
+    if export_job.status != EXPORT_COMPLETE or not export_job.document:
+        raise Http404('Export is not ready.')
+    return FileResponse(
+        export_job.document.open('rb'), as_attachment=True,
+        filename=os.path.basename(export_job.document.name))